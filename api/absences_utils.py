@@ -0,0 +1,157 @@
+# ============================================================================
+# ABSENCES_UTILS.PY - CHEVAUCHEMENTS DE CONGÉS ET COUVERTURE DES SERVICES
+# ============================================================================
+# Une seule requête d'intervalles par question :
+#   date_debut <= fin AND date_fin >= debut  (index demandeconge_intervalle_idx)
+# - qui est absent sur une période dans un service ?
+# - une nouvelle demande ferait-elle passer le service sous effectif_minimum ?
+# ============================================================================
+
+from datetime import timedelta
+
+from .models import DemandeConge, Salarie
+
+
+# Demandes prises en compte : en attente + approuvées
+STATUTS_ABSENCE = ('soumise', 'validée_direct', 'validée_service', 'approuvée')
+
+# Statuts salarié comptés dans l'effectif du service
+STATUTS_EFFECTIF = ('actif',)
+
+# Borne de sécurité pour les calculs jour par jour
+MAX_JOURS_PERIODE = 366
+
+
+def iterer_jours(date_debut, date_fin):
+    """Itère sur chaque jour de [date_debut, date_fin]"""
+    jour = date_debut
+    while jour <= date_fin:
+        yield jour
+        jour += timedelta(days=1)
+
+
+def demandes_chevauchantes(date_debut, date_fin, statuts=STATUTS_ABSENCE):
+    """QuerySet des demandes dont l'intervalle chevauche [date_debut, date_fin]"""
+    return DemandeConge.objects.filter(
+        statut__in=statuts,
+        date_debut__lte=date_fin,
+        date_fin__gte=date_debut,
+    )
+
+
+def absences_service(service_id, date_debut, date_fin, exclude_demande_id=None):
+    """
+    Liste des absences d'un service sur la période (une seule requête)
+    Retourne une liste de dicts: salarie_id, nom, prenom, matricule,
+    demande_id, date_debut, date_fin, statut, type_conge
+    """
+    qs = demandes_chevauchantes(date_debut, date_fin).filter(salarie__service_id=service_id)
+    if exclude_demande_id:
+        qs = qs.exclude(id=exclude_demande_id)
+    return [
+        {
+            'salarie_id': row['salarie_id'],
+            'nom': row['salarie__nom'],
+            'prenom': row['salarie__prenom'],
+            'matricule': row['salarie__matricule'],
+            'demande_id': row['id'],
+            'date_debut': row['date_debut'],
+            'date_fin': row['date_fin'],
+            'statut': row['statut'],
+            'type_conge': row['type_conge'],
+        }
+        for row in qs.order_by('date_debut').values(
+            'id', 'salarie_id', 'salarie__nom', 'salarie__prenom', 'salarie__matricule',
+            'date_debut', 'date_fin', 'statut', 'type_conge',
+        )
+    ]
+
+
+def absents_par_jour(absences, date_debut, date_fin):
+    """{jour: set(salarie_id)} à partir des intervalles d'absence"""
+    par_jour = {jour: set() for jour in iterer_jours(date_debut, date_fin)}
+    for absence in absences:
+        debut = max(absence['date_debut'], date_debut)
+        fin = min(absence['date_fin'], date_fin)
+        for jour in iterer_jours(debut, fin):
+            par_jour[jour].add(absence['salarie_id'])
+    return par_jour
+
+
+def effectif_service(service_id):
+    """Nombre de salariés comptés dans l'effectif du service"""
+    return Salarie.objects.filter(service_id=service_id, statut__in=STATUTS_EFFECTIF).count()
+
+
+def couverture_service(service_id, date_debut, date_fin, salarie_ajoute=None, exclude_demande_id=None):
+    """
+    Couverture jour par jour du service sur la période
+
+    - salarie_ajoute: salarié de la demande en cours (simulé absent sur toute la période)
+    Retourne {'effectif', 'absences', 'jours': [{'date', 'absents', 'presents'}], 'presents_min'}
+    """
+    absences = absences_service(service_id, date_debut, date_fin, exclude_demande_id)
+    par_jour = absents_par_jour(absences, date_debut, date_fin)
+    if salarie_ajoute is not None:
+        for absents in par_jour.values():
+            absents.add(salarie_ajoute)
+
+    effectif = effectif_service(service_id)
+    jours = [
+        {
+            'date': jour,
+            'absents': sorted(absents),
+            'presents': max(0, effectif - len(absents)),
+        }
+        for jour, absents in par_jour.items()
+    ]
+    return {
+        'effectif': effectif,
+        'absences': absences,
+        'jours': jours,
+        'presents_min': min((j['presents'] for j in jours), default=effectif),
+    }
+
+
+def verifier_demande_conge(salarie, date_debut, date_fin, exclude_demande_id=None):
+    """
+    Contrôles à la création d'une demande de congé
+    Retourne une liste de messages d'erreur (vide si OK)
+    """
+    erreurs = []
+
+    if date_fin < date_debut:
+        return ['La date de fin doit être postérieure à la date de début']
+    if (date_fin - date_debut).days >= MAX_JOURS_PERIODE:
+        return [f'La période ne peut pas dépasser {MAX_JOURS_PERIODE} jours']
+
+    # 1️⃣ CHEVAUCHEMENT AVEC UNE AUTRE DEMANDE DU SALARIÉ
+    chevauchements = demandes_chevauchantes(date_debut, date_fin).filter(salarie=salarie)
+    if exclude_demande_id:
+        chevauchements = chevauchements.exclude(id=exclude_demande_id)
+    conflit = chevauchements.order_by('date_debut').values('id', 'date_debut', 'date_fin').first()
+    if conflit:
+        erreurs.append(
+            f"Chevauchement avec la demande #{conflit['id']} "
+            f"({conflit['date_debut']:%d/%m/%Y} - {conflit['date_fin']:%d/%m/%Y})"
+        )
+
+    # 2️⃣ COUVERTURE MINIMUM DU SERVICE
+    service = salarie.service
+    if service and service.effectif_minimum:
+        couverture = couverture_service(
+            service.id, date_debut, date_fin,
+            salarie_ajoute=salarie.id,
+            exclude_demande_id=exclude_demande_id,
+        )
+        if couverture['presents_min'] < service.effectif_minimum:
+            jours_critiques = [
+                j['date'].strftime('%d/%m/%Y') for j in couverture['jours']
+                if j['presents'] < service.effectif_minimum
+            ]
+            erreurs.append(
+                f"Effectif minimum du service {service.nom} ({service.effectif_minimum}) "
+                f"non respecté le(s): {', '.join(jours_critiques[:10])}"
+            )
+
+    return erreurs
@@ -12,7 +12,7 @@ from .models import (
     OutilFichePoste, AmeliorationProposee, EquipementInstance, CreneauTravail,
     HoraireSalarie, DocumentSalarie, DemandeConge, SoldeConge, TravauxExceptionnels,
     TypeApplicationAcces, AccesApplication, FicheParametresUser, Role,
-    DemandeAcompte, DemandeSortie, ImportLog
+    DemandeAcompte, DemandeSortie, ImportLog, MouvementConge, HistoriqueEquipement
 )
 
 # ============================================================================
@@ -202,6 +202,21 @@ class EquipementInstanceAdmin(BatchImportExportMixin, admin.ModelAdmin):
     search_fields = ('numero_serie', 'salarie__matricule')
 
 
+@admin.register(HistoriqueEquipement)
+class HistoriqueEquipementAdmin(BatchImportExportMixin, admin.ModelAdmin):
+    list_display = ('numero_serie', 'equipement', 'salarie', 'type_evenement', 'etat', 'date_effet')
+    list_filter = ('type_evenement', 'etat')
+    search_fields = ('numero_serie', 'salarie__matricule', 'salarie__nom')
+    readonly_fields = ('date_creation',)
+
+    def has_change_permission(self, request, obj=None):
+        """Historique append-only"""
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(TypeApplicationAcces)
 class TypeApplicationAccesAdmin(BatchImportExportMixin, admin.ModelAdmin):
     list_display = ('nom', 'actif')
@@ -287,6 +302,21 @@ class SoldeCongeAdmin(BatchImportExportMixin, admin.ModelAdmin):
     readonly_fields = ('date_derniere_maj',)
 
 
+@admin.register(MouvementConge)
+class MouvementCongeAdmin(BatchImportExportMixin, admin.ModelAdmin):
+    list_display = ('salarie', 'type_mouvement', 'nombre_jours', 'periode', 'demande', 'date_creation')
+    list_filter = ('type_mouvement', 'periode')
+    search_fields = ('salarie__matricule', 'salarie__nom')
+    readonly_fields = ('date_creation',)
+
+    def has_change_permission(self, request, obj=None):
+        """Registre append-only"""
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(DemandeAcompte)
 class DemandeAcompteAdmin(BatchImportExportMixin, admin.ModelAdmin):
     list_display = ('salarie', 'montant', 'date_demande', 'statut')
@@ -351,3 +381,4 @@ class FicheParametresUserAdmin(BatchImportExportMixin, admin.ModelAdmin):
 class RoleAdmin(BatchImportExportMixin, admin.ModelAdmin):
     list_display = ('nom', 'can_view_salaries', 'can_edit_salaries', 'can_validate_requests')
     list_filter = ('nom',)
+
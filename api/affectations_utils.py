@@ -0,0 +1,52 @@
+# ============================================================================
+# AFFECTATIONS_UTILS.PY - DÉTENTEURS D'ÉQUIPEMENTS À UNE DATE DONNÉE
+# ============================================================================
+# Requêtes "as-of" sur HistoriqueEquipement :
+# - numéro de série -> détenteur au jour J : index (numero_serie, date_effet)
+# - salarié -> équipements détenus au jour J : index (salarie, date_effet),
+#   puis dernier événement de chaque instance via (instance, date_effet)
+# ============================================================================
+
+from django.db.models import F, OuterRef, Subquery
+
+from .models import HistoriqueEquipement
+
+
+def _dernier_evenement(jour):
+    """Sous-requête : id du dernier événement ≤ jour de l'instance courante"""
+    return Subquery(
+        HistoriqueEquipement.objects.filter(
+            instance_id=OuterRef('instance_id'),
+            date_effet__lte=jour,
+        ).order_by('-date_effet', '-id').values('id')[:1]
+    )
+
+
+def detenteur_a_date(numero_serie, jour):
+    """
+    Dernier événement ≤ jour pour un numéro de série (None si inconnu à cette date)
+    Le détenteur est evenement.salarie, sauf si l'événement est un retrait / une suppression
+    """
+    return (
+        HistoriqueEquipement.objects
+        .filter(numero_serie=numero_serie, date_effet__lte=jour)
+        .select_related('salarie', 'equipement')
+        .order_by('-date_effet', '-id')
+        .first()
+    )
+
+
+def equipements_detenus_a_date(salarie_id, jour):
+    """
+    Événements "en cours" au jour J pour les équipements détenus par le salarié
+    (dernier événement de l'instance ≤ J, attribué au salarié, pas un retrait)
+    """
+    return (
+        HistoriqueEquipement.objects
+        .filter(salarie_id=salarie_id, date_effet__lte=jour)
+        .exclude(type_evenement__in=HistoriqueEquipement.TYPES_SANS_DETENTEUR)
+        .annotate(dernier_id=_dernier_evenement(jour))
+        .filter(id=F('dernier_id'))
+        .select_related('salarie', 'equipement')
+        .order_by('equipement__type_equipement', 'numero_serie')
+    )
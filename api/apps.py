@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Connexion des signaux (invalidation des caches, historique, index de recherche)
+        from . import signals
+
+        # Comptes User des salariés : création à l'embauche, synchronisation de l'identité
+        signals.connecter_comptes_salaries()
+
+        # Temps de sérialisation mesuré par InstrumentationMiddleware
+        from .metriques_utils import instrumenter_serialisation
+        instrumenter_serialisation()
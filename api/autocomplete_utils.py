@@ -0,0 +1,115 @@
+# ============================================================================
+# AUTOCOMPLETE_UTILS.PY - SUGGESTIONS DE SAISIE (TYPEAHEAD)
+# ============================================================================
+# Une requête par frappe : filtre "contient" sur une colonne couverte par un
+# index trigramme (pg_trgm, migration 0007), suggestions qui commencent par
+# la saisie d'abord, au plus LIMITE_MAX lignes compactes {id, label, detail}.
+#
+# Les saisies fréquentes sont servies par un LRU en mémoire du processus
+# (TTL court : les autres workers ne voient pas les invalidations locales).
+# ============================================================================
+
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Concat, Length
+
+from .cache_backends import CacheLRU
+from .models import Departement, Equipement, Grade, Salarie, Service
+from .recherche_utils import termes_recherche
+
+
+LIMITE_DEFAUT = 10
+LIMITE_MAX = 25
+CACHE_TAILLE = 1024
+CACHE_TTL = 30
+
+
+cache_autocomplete = CacheLRU(taille=CACHE_TAILLE, ttl=CACHE_TTL)
+
+
+# ============================================================================
+# ENTITÉS
+# ============================================================================
+
+def _salaries(queryset, saisie):
+    termes = termes_recherche(saisie)
+    if not termes:
+        return queryset.none()
+    for terme in termes:
+        queryset = queryset.filter(texte_recherche__contains=terme)
+    return (
+        queryset
+        .annotate(
+            debut=Case(When(texte_recherche__startswith=termes[0], then=0), default=1,
+                       output_field=IntegerField()),
+            label=Concat('prenom', Value(' '), 'nom'),
+            detail=F('matricule'),
+        )
+        .order_by('debut', 'nom', 'prenom')
+    )
+
+
+def _par_nom(champ_detail=None):
+    """Entités recherchées sur `nom` (icontains), les plus courtes d'abord"""
+    def rechercher(queryset, saisie):
+        saisie = saisie.strip()
+        return (
+            queryset
+            .filter(nom__icontains=saisie, actif=True)
+            .annotate(
+                debut=Case(When(nom__istartswith=saisie, then=0), default=1,
+                           output_field=IntegerField()),
+                label=F('nom'),
+                detail=F(champ_detail) if champ_detail else Value(''),
+            )
+            .order_by('debut', Length('nom'), 'nom')
+        )
+    return rechercher
+
+
+def _departements(queryset, saisie):
+    saisie = saisie.strip()
+    return (
+        queryset
+        .filter(Q(nom__icontains=saisie) | Q(numero__startswith=saisie), actif=True)
+        .annotate(
+            debut=Case(When(Q(numero=saisie) | Q(nom__istartswith=saisie), then=0), default=1,
+                       output_field=IntegerField()),
+            label=Concat('numero', Value(' - '), 'nom'),
+            detail=F('region'),
+        )
+        .order_by('debut', 'numero')
+    )
+
+
+# entité -> (modèle, fonction de recherche)
+ENTITES_AUTOCOMPLETE = {
+    'salaries': (Salarie, _salaries),
+    'services': (Service, _par_nom('societe__nom')),
+    'grades': (Grade, _par_nom('societe__nom')),
+    'departements': (Departement, _departements),
+    'equipements': (Equipement, _par_nom('type_equipement')),
+}
+
+
+def suggestions(entite, saisie, queryset=None, limite=LIMITE_DEFAUT, portee=''):
+    """
+    Au plus `limite` suggestions [{id, label, detail}] pour l'entité
+    - queryset: restreint les lignes visibles (défaut: toutes)
+    - portee: identifie cette restriction dans la clé de cache
+    KeyError si l'entité est inconnue
+    """
+    modele, rechercher = ENTITES_AUTOCOMPLETE[entite]
+    limite = max(1, min(limite, LIMITE_MAX))
+    saisie = ' '.join(saisie.split())
+    if not saisie:
+        return []
+
+    cle = (entite, portee, saisie.lower(), limite)
+    resultats = cache_autocomplete.get(cle)
+    if resultats is None:
+        queryset = modele.objects.all() if queryset is None else queryset
+        resultats = list(
+            rechercher(queryset, saisie).values('id', 'label', 'detail')[:limite]
+        )
+        cache_autocomplete.set(cle, resultats)
+    return resultats
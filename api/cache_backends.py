@@ -0,0 +1,567 @@
+# ============================================================================
+# CACHE_BACKENDS.PY - CACHE PARTAGÉ ENTRE WORKERS
+# ============================================================================
+# - RespCache       : backend Django parlant le protocole Redis (RESP2) sur
+#                     socket, sans dépendance externe. Une connexion par thread.
+#                     Serveur indisponible : lectures manquées, écritures
+#                     ignorées (le cache ne doit pas faire tomber l'API)
+# - CacheDeuxNiveaux: LRU en mémoire du processus devant un cache partagé.
+#                     Les clés locales sont préfixées par une génération lue
+#                     dans le cache partagé (au plus une fois par seconde) :
+#                     delete / incr / clear incrémentent la génération, ce qui
+#                     invalide le niveau local de tous les workers, de même que
+#                     set() / add() d'une clé sans expiration (versions,
+#                     index : valeurs de coordination entre workers).
+#                     set() d'une clé à durée de vie n'invalide pas les autres
+#                     workers (au pire TTL_LOCAL secondes de valeur ancienne) :
+#                     cache_partage() donne le niveau partagé aux clés écrites
+#                     souvent et relues par tous les workers.
+#
+# Configuration : settings.CACHES (voir CACHE_BACKEND dans settings.py)
+# Serveur local de substitution : `python manage.py fauxredis`
+# ============================================================================
+
+import pickle
+import socket
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import unquote, urlparse
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+# ============================================================================
+# LRU EN MÉMOIRE
+# ============================================================================
+
+class CacheLRU:
+    """LRU borné avec expiration, partagé par les threads du processus"""
+
+    def __init__(self, taille=1024, ttl=30):
+        self.taille = taille
+        self.ttl = ttl
+        self._donnees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def get(self, cle):
+        with self._verrou:
+            entree = self._donnees.get(cle)
+            if entree is None:
+                return None
+            expiration, valeur = entree
+            if expiration < time.monotonic():
+                del self._donnees[cle]
+                return None
+            self._donnees.move_to_end(cle)
+            return valeur
+
+    def set(self, cle, valeur, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._verrou:
+            self._donnees[cle] = (time.monotonic() + ttl, valeur)
+            self._donnees.move_to_end(cle)
+            while len(self._donnees) > self.taille:
+                self._donnees.popitem(last=False)
+
+    def supprimer(self, cle):
+        with self._verrou:
+            self._donnees.pop(cle, None)
+
+    def vider(self):
+        with self._verrou:
+            self._donnees.clear()
+
+    def __len__(self):
+        return len(self._donnees)
+
+
+class _Compteurs:
+    """Compteurs de statistiques thread-safe"""
+
+    def __init__(self, *noms):
+        self._valeurs = dict.fromkeys(noms, 0)
+        self._verrou = threading.Lock()
+
+    def ajouter(self, nom, n=1):
+        with self._verrou:
+            self._valeurs[nom] = self._valeurs.get(nom, 0) + n
+
+    def valeurs(self):
+        with self._verrou:
+            return dict(self._valeurs)
+
+
+def _taux(succes, echecs):
+    total = succes + echecs
+    return round(succes / total, 3) if total else None
+
+
+# ============================================================================
+# PROTOCOLE REDIS (RESP2)
+# ============================================================================
+
+class ErreurRedis(Exception):
+    """Réponse d'erreur du serveur (-ERR ...)"""
+
+
+def encoder_commande(*arguments):
+    """('SET', 'k', b'v') -> b'*3\\r\\n$3\\r\\nSET\\r\\n...'"""
+    morceaux = [b'*%d\r\n' % len(arguments)]
+    for argument in arguments:
+        if isinstance(argument, str):
+            argument = argument.encode()
+        elif isinstance(argument, int):
+            argument = str(argument).encode()
+        morceaux.append(b'$%d\r\n%s\r\n' % (len(argument), argument))
+    return b''.join(morceaux)
+
+
+def lire_reponse(fichier):
+    """Lit une réponse RESP depuis un fichier socket (makefile('rb'))"""
+    ligne = fichier.readline()
+    if not ligne:
+        raise ConnectionError('Connexion fermée par le serveur')
+    prefixe, contenu = ligne[:1], ligne[1:-2]
+    if prefixe == b'+':
+        return contenu.decode()
+    if prefixe == b'-':
+        raise ErreurRedis(contenu.decode())
+    if prefixe == b':':
+        return int(contenu)
+    if prefixe == b'$':
+        longueur = int(contenu)
+        if longueur == -1:
+            return None
+        donnees = fichier.read(longueur + 2)
+        return donnees[:-2]
+    if prefixe == b'*':
+        nombre = int(contenu)
+        if nombre == -1:
+            return None
+        return [lire_reponse(fichier) for _ in range(nombre)]
+    raise ConnectionError(f'Réponse RESP invalide: {ligne!r}')
+
+
+class ClientRedis:
+    """Client RESP minimal : une connexion par thread, reconnexion à la demande"""
+
+    def __init__(self, url, timeout=0.5):
+        parse = urlparse(url)
+        self.hote = parse.hostname or '127.0.0.1'
+        self.port = parse.port or 6379
+        self.base = int(parse.path.lstrip('/') or 0)
+        self.mot_de_passe = unquote(parse.password) if parse.password else None
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connexion(self):
+        connexion = getattr(self._local, 'connexion', None)
+        if connexion is None:
+            sock = socket.create_connection((self.hote, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connexion = (sock, sock.makefile('rb'))
+            self._local.connexion = connexion
+            if self.mot_de_passe:
+                self._envoyer(connexion, [('AUTH', self.mot_de_passe)])
+            if self.base:
+                self._envoyer(connexion, [('SELECT', self.base)])
+        return connexion
+
+    def _envoyer(self, connexion, commandes):
+        """
+        Toutes les réponses sont lues avant de lever la première erreur serveur :
+        une réponse laissée sur la socket serait lue par la commande suivante
+        """
+        sock, fichier = connexion
+        sock.sendall(b''.join(encoder_commande(*commande) for commande in commandes))
+        reponses, erreur = [], None
+        for _ in commandes:
+            try:
+                reponses.append(lire_reponse(fichier))
+            except ErreurRedis as e:
+                erreur = erreur or e
+                reponses.append(None)
+        if erreur is not None:
+            raise erreur
+        return reponses
+
+    def fermer(self):
+        connexion = getattr(self._local, 'connexion', None)
+        self._local.connexion = None
+        if connexion:
+            try:
+                connexion[1].close()
+                connexion[0].close()
+            except OSError:
+                pass
+
+    def pipeline(self, commandes):
+        """Envoie toutes les commandes puis lit toutes les réponses (un aller-retour)"""
+        try:
+            return self._envoyer(self._connexion(), commandes)
+        except ErreurRedis:
+            raise
+        except BaseException:
+            # Réponses éventuellement non lues (timeout, interruption) : connexion désynchronisée
+            self.fermer()
+            raise
+
+    def executer(self, *commande):
+        return self.pipeline([commande])[0]
+
+
+# ============================================================================
+# BACKEND PARTAGÉ
+# ============================================================================
+
+class RespCache(BaseCache):
+    """
+    CACHES = {'default': {
+        'BACKEND': 'api.cache_backends.RespCache',
+        'LOCATION': 'redis://127.0.0.1:6379/0',
+        'OPTIONS': {'SOCKET_TIMEOUT': 0.5, 'IGNORER_ERREURS': True},
+    }}
+    Valeurs : entiers en clair (INCRBY), le reste en pickle
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.client = ClientRedis(server, timeout=options.get('SOCKET_TIMEOUT', 0.5))
+        self.ignorer_erreurs = options.get('IGNORER_ERREURS', True)
+        self.compteurs = _Compteurs('hits', 'misses', 'sets', 'deletes', 'erreurs')
+
+    # Sérialisation ----------------------------------------------------------
+
+    @staticmethod
+    def _serialiser(valeur):
+        if type(valeur) is int:
+            return str(valeur).encode()
+        return pickle.dumps(valeur, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _deserialiser(donnees):
+        try:
+            return int(donnees)
+        except ValueError:
+            return pickle.loads(donnees)
+
+    def _expiration(self, timeout):
+        """Arguments SET d'expiration ([] = jamais)"""
+        secondes = self.get_backend_timeout(timeout)
+        if secondes is None:
+            return []
+        return ['PX', max(1, int(secondes * 1000))]
+
+    def _pipeline(self, commandes, defaut=None):
+        try:
+            return self.client.pipeline(commandes)
+        except (OSError, ConnectionError):
+            self.compteurs.ajouter('erreurs')
+            if not self.ignorer_erreurs:
+                raise
+            return defaut
+
+    def _executer(self, *commande, defaut=None):
+        reponses = self._pipeline([commande])
+        return defaut if reponses is None else reponses[0]
+
+    # API Django -------------------------------------------------------------
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None and timeout <= 0:
+            return False
+        self.compteurs.ajouter('sets')
+        return self._executer(
+            'SET', key, self._serialiser(value), 'NX', *self._expiration(timeout)
+        ) == 'OK'
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        donnees = self._executer('GET', key)
+        if donnees is None:
+            self.compteurs.ajouter('misses')
+            return default
+        self.compteurs.ajouter('hits')
+        return self._deserialiser(donnees)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None and timeout <= 0:
+            self._executer('DEL', key)
+            return
+        self.compteurs.ajouter('sets')
+        self._executer('SET', key, self._serialiser(value), *self._expiration(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expiration = self._expiration(timeout)
+        if expiration:
+            return bool(self._executer('PEXPIRE', key, expiration[1]))
+        return bool(self._executer('PERSIST', key)) or self.has_key(key)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.compteurs.ajouter('deletes')
+        return bool(self._executer('DEL', key, defaut=0))
+
+    def get_many(self, keys, version=None):
+        cles = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not cles:
+            return {}
+        valeurs = self._executer('MGET', *cles, defaut=[None] * len(cles))
+        resultat = {
+            cles[cle]: self._deserialiser(donnees)
+            for cle, donnees in zip(cles, valeurs)
+            if donnees is not None
+        }
+        self.compteurs.ajouter('hits', len(resultat))
+        self.compteurs.ajouter('misses', len(cles) - len(resultat))
+        return resultat
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        expiration = self._expiration(timeout)
+        commandes = [
+            ('SET', self.make_and_validate_key(key, version=version), self._serialiser(value), *expiration)
+            for key, value in data.items()
+        ]
+        self.compteurs.ajouter('sets', len(commandes))
+        return [] if self._pipeline(commandes) is not None else list(data)
+
+    def delete_many(self, keys, version=None):
+        cles = [self.make_and_validate_key(key, version=version) for key in keys]
+        if cles:
+            self.compteurs.ajouter('deletes', len(cles))
+            self._executer('DEL', *cles)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self._executer('EXISTS', key, defaut=0))
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        reponses = self._pipeline([('EXISTS', key), ('INCRBY', key, delta)])
+        if reponses is None:
+            raise ValueError(f"Key '{key}' not found")
+        existait, valeur = reponses
+        if not existait:
+            # INCRBY a créé la clé : on la retire pour respecter la sémantique Django
+            self._executer('DEL', key)
+            raise ValueError(f"Key '{key}' not found")
+        return int(valeur)
+
+    def clear(self):
+        self._executer('FLUSHDB')
+
+    def close(self, **kwargs):
+        # Connexions persistantes par thread : rien à fermer en fin de requête
+        pass
+
+    def statistiques(self):
+        valeurs = self.compteurs.valeurs()
+        return {
+            'backend': 'resp',
+            'serveur': f'{self.client.hote}:{self.client.port}/{self.client.base}',
+            **valeurs,
+            'taux_hits': _taux(valeurs['hits'], valeurs['misses']),
+            'cles': self._executer('DBSIZE'),
+        }
+
+
+# ============================================================================
+# BACKEND DEUX NIVEAUX
+# ============================================================================
+
+class CacheDeuxNiveaux(BaseCache):
+    """
+    CACHES = {
+        'partage': {'BACKEND': 'api.cache_backends.RespCache', 'LOCATION': 'redis://...'},
+        'default': {
+            'BACKEND': 'api.cache_backends.CacheDeuxNiveaux',
+            'OPTIONS': {'PARTAGE': 'partage', 'TAILLE': 2000, 'TTL_LOCAL': 30, 'VERIFICATION': 1.0},
+        },
+    }
+    """
+    CLE_GENERATION = 'deux-niveaux:generation'
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.alias_partage = options.get('PARTAGE', 'partage')
+        self.local = CacheLRU(taille=options.get('TAILLE', 2000), ttl=options.get('TTL_LOCAL', 30))
+        self.verification = options.get('VERIFICATION', 1.0)
+        self._generation = 0
+        self._derniere_verification = 0.0
+        self._verrou = threading.Lock()
+        self.compteurs = _Compteurs('hits_local', 'hits_partage', 'misses', 'invalidations')
+
+    @property
+    def partage(self):
+        return caches[self.alias_partage]
+
+    # Génération -------------------------------------------------------------
+
+    def generation(self):
+        """Génération courante, relue dans le cache partagé au plus toutes les `verification` s"""
+        maintenant = time.monotonic()
+        if maintenant - self._derniere_verification >= self.verification:
+            generation = self.partage.get(self.CLE_GENERATION) or 0
+            with self._verrou:
+                if generation != self._generation:
+                    self.local.vider()
+                self._generation = generation
+                self._derniere_verification = maintenant
+        return self._generation
+
+    def invalider_workers(self):
+        """Nouvelle génération : le niveau local de chaque worker est abandonné"""
+        try:
+            generation = self.partage.incr(self.CLE_GENERATION)
+        except ValueError:
+            self.partage.add(self.CLE_GENERATION, 1, timeout=None)
+            generation = self.partage.get(self.CLE_GENERATION) or 1
+        with self._verrou:
+            self.local.vider()
+            self._generation = generation
+            self._derniere_verification = time.monotonic()
+        self.compteurs.ajouter('invalidations')
+
+    def _cle_locale(self, key, version):
+        return (self.generation(), self.make_and_validate_key(key, version=version))
+
+    def _ttl_local(self, timeout):
+        secondes = self.get_backend_timeout(timeout)
+        return None if secondes is None else max(secondes, 0)
+
+    # API Django -------------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        cle = self._cle_locale(key, version)
+        entree = self.local.get(cle)
+        if entree is not None:
+            self.compteurs.ajouter('hits_local')
+            return entree[0]
+        manquant = object()
+        valeur = self.partage.get(key, manquant, version=version)
+        if valeur is manquant:
+            self.compteurs.ajouter('misses')
+            return default
+        self.compteurs.ajouter('hits_partage')
+        self.local.set(cle, (valeur,))
+        return valeur
+
+    def get_many(self, keys, version=None):
+        resultat, restants = {}, []
+        for key in keys:
+            entree = self.local.get(self._cle_locale(key, version))
+            if entree is not None:
+                resultat[key] = entree[0]
+            else:
+                restants.append(key)
+        self.compteurs.ajouter('hits_local', len(resultat))
+        if restants:
+            partages = self.partage.get_many(restants, version=version)
+            for key, valeur in partages.items():
+                self.local.set(self._cle_locale(key, version), (valeur,))
+            self.compteurs.ajouter('hits_partage', len(partages))
+            self.compteurs.ajouter('misses', len(restants) - len(partages))
+            resultat.update(partages)
+        return resultat
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.partage.set(key, value, timeout=self.get_backend_timeout(timeout), version=version)
+        ttl = self._ttl_local(timeout)
+        if ttl is None:
+            # Clé sans expiration : les autres workers ne doivent pas garder l'ancienne valeur
+            self.invalider_workers()
+        if ttl == 0:
+            self.local.supprimer(self._cle_locale(key, version))
+        else:
+            self.local.set(self._cle_locale(key, version), (value,), ttl)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        echecs = self.partage.set_many(data, timeout=self.get_backend_timeout(timeout), version=version)
+        ttl = self._ttl_local(timeout)
+        if ttl is None:
+            self.invalider_workers()
+        for key, value in data.items():
+            if key not in echecs and ttl != 0:
+                self.local.set(self._cle_locale(key, version), (value,), ttl)
+        return echecs
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        ajoute = self.partage.add(key, value, timeout=self.get_backend_timeout(timeout), version=version)
+        if ajoute and self._ttl_local(timeout) is None:
+            self.invalider_workers()
+        if ajoute and self._ttl_local(timeout) != 0:
+            self.local.set(self._cle_locale(key, version), (value,), self._ttl_local(timeout))
+        return ajoute
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.partage.touch(key, timeout=self.get_backend_timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        supprime = self.partage.delete(key, version=version)
+        self.invalider_workers()
+        return supprime
+
+    def delete_many(self, keys, version=None):
+        self.partage.delete_many(keys, version=version)
+        self.invalider_workers()
+
+    def has_key(self, key, version=None):
+        if self.local.get(self._cle_locale(key, version)) is not None:
+            return True
+        return self.partage.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        valeur = self.partage.incr(key, delta, version=version)
+        self.invalider_workers()
+        return valeur
+
+    def clear(self):
+        self.partage.clear()
+        self.invalider_workers()
+
+    def close(self, **kwargs):
+        self.partage.close(**kwargs)
+
+    def statistiques(self):
+        valeurs = self.compteurs.valeurs()
+        hits = valeurs['hits_local'] + valeurs['hits_partage']
+        return {
+            'backend': 'deux_niveaux',
+            'partage': self.alias_partage,
+            'generation': self._generation,
+            'cles_locales': len(self.local),
+            **valeurs,
+            'taux_hits': _taux(hits, valeurs['misses']),
+            'taux_hits_local': _taux(valeurs['hits_local'], valeurs['hits_partage'] + valeurs['misses']),
+        }
+
+
+def statistiques_caches():
+    """{alias: statistiques} de tous les caches configurés"""
+    resultat = {}
+    for alias in caches.settings:
+        backend = caches[alias]
+        if hasattr(backend, 'statistiques'):
+            resultat[alias] = backend.statistiques()
+        else:
+            resultat[alias] = {'backend': type(backend).__name__}
+    return resultat
+
+
+def cache_partage(alias='default'):
+    """
+    Niveau partagé du cache `alias` (lui-même s'il n'a qu'un niveau)
+    Pour les clés écrites souvent et relues par tous les workers : les lire
+    depuis un niveau local les retarderait jusqu'à TTL_LOCAL secondes
+    """
+    cache = caches[alias]
+    return cache.partage if isinstance(cache, CacheDeuxNiveaux) else cache
@@ -0,0 +1,208 @@
+# ============================================================================
+# CALENDRIER_UTILS.PY - CALENDRIER D'ÉQUIPE (MATRICE SALARIÉS × JOURS)
+# ============================================================================
+# Pour un service et un mois : une requête par type (congés, sorties,
+# travaux exceptionnels approuvés). Chaque salarié reçoit un bitmap par type
+# (bit 0 = 1er jour). Le mois construit est mis en cache, la clé inclut une
+# version par service incrémentée à chaque écriture (voir signals.py).
+# ============================================================================
+
+import calendar
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import DemandeConge, DemandeSortie, Salarie, TravauxExceptionnels
+
+
+TYPES_CALENDRIER = ('conge', 'sortie', 'travaux')
+STATUT_CALENDRIER = 'approuvée'
+CALENDRIER_CACHE_TIMEOUT = 60 * 15
+MAX_JOURS_CALENDRIER = 93
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def _cle_version(service_id):
+    return f'calendrier:version:{service_id}'
+
+
+def version_calendrier(service_id):
+    """Version courante du calendrier d'un service"""
+    return cache.get_or_set(_cle_version(service_id), 1, timeout=None)
+
+
+def _incrementer_version(service_id):
+    try:
+        cache.incr(_cle_version(service_id))
+    except ValueError:
+        cache.set(_cle_version(service_id), 1, timeout=None)
+
+
+def invalider_calendrier(service_id):
+    """
+    Invalide tous les mois en cache d'un service, au commit : avant, un
+    lecteur concurrent mettrait en cache l'état non commité sous la nouvelle version
+    """
+    if service_id is None:
+        return
+    transaction.on_commit(lambda: _incrementer_version(service_id))
+
+
+# ============================================================================
+# CONSTRUCTION D'UN MOIS
+# ============================================================================
+
+def fin_de_mois(jour):
+    """Dernier jour du mois de `jour`"""
+    return jour.replace(day=calendar.monthrange(jour.year, jour.month)[1])
+
+
+def _bits_intervalle(debut, fin, premier_jour, dernier_jour):
+    """Bitmap des jours de [debut, fin] dans le mois (bit 0 = 1er du mois)"""
+    debut = max(debut, premier_jour)
+    fin = min(fin, dernier_jour)
+    if fin < debut:
+        return 0
+    longueur = (fin - debut).days + 1
+    return ((1 << longueur) - 1) << (debut - premier_jour).days
+
+
+def construire_mois(service_id, annee, mois):
+    """
+    Matrice du mois pour un service (sans cache)
+    Retourne {'salaries': [...], 'conge': {id: bits}, 'sortie': {...}, 'travaux': {...}}
+    """
+    premier_jour = date(annee, mois, 1)
+    dernier_jour = fin_de_mois(premier_jour)
+
+    salaries = list(
+        Salarie.objects.filter(service_id=service_id)
+        .exclude(statut='inactif')
+        .order_by('nom', 'prenom')
+        .values('id', 'nom', 'prenom', 'matricule')
+    )
+    bitmaps = {type_: {} for type_ in TYPES_CALENDRIER}
+
+    # 1️⃣ CONGÉS (intervalles)
+    for row in DemandeConge.objects.filter(
+        salarie__service_id=service_id,
+        statut=STATUT_CALENDRIER,
+        date_debut__lte=dernier_jour,
+        date_fin__gte=premier_jour,
+    ).order_by().values_list('salarie_id', 'date_debut', 'date_fin'):
+        salarie_id, debut, fin = row
+        bitmaps['conge'][salarie_id] = bitmaps['conge'].get(salarie_id, 0) | _bits_intervalle(
+            debut, fin, premier_jour, dernier_jour
+        )
+
+    # 2️⃣ SORTIES / 3️⃣ TRAVAUX EXCEPTIONNELS (un jour)
+    for type_, model, champ_date in (
+        ('sortie', DemandeSortie, 'date_sortie'),
+        ('travaux', TravauxExceptionnels, 'date_travail'),
+    ):
+        for salarie_id, jour in model.objects.filter(
+            salarie__service_id=service_id,
+            statut=STATUT_CALENDRIER,
+            **{f'{champ_date}__range': (premier_jour, dernier_jour)},
+        ).order_by().values_list('salarie_id', champ_date):
+            bitmaps[type_][salarie_id] = bitmaps[type_].get(salarie_id, 0) | (1 << (jour.day - 1))
+
+    return {'salaries': salaries, **bitmaps}
+
+
+def mois_en_cache(service_id, annee, mois):
+    """Matrice du mois, depuis le cache si la version du service n'a pas changé"""
+    cle = f'calendrier:{service_id}:{version_calendrier(service_id)}:{annee}-{mois:02d}'
+    donnees = cache.get(cle)
+    if donnees is None:
+        donnees = construire_mois(service_id, annee, mois)
+        cache.set(cle, donnees, CALENDRIER_CACHE_TIMEOUT)
+    return donnees
+
+
+# ============================================================================
+# ASSEMBLAGE D'UNE PÉRIODE
+# ============================================================================
+
+def _mois_de_la_periode(date_debut, date_fin):
+    """Liste des (annee, mois) couverts par la période"""
+    annee, mois = date_debut.year, date_debut.month
+    resultat = []
+    while (annee, mois) <= (date_fin.year, date_fin.month):
+        resultat.append((annee, mois))
+        mois += 1
+        if mois > 12:
+            annee, mois = annee + 1, 1
+    return resultat
+
+
+def calendrier_service(service_id, date_debut, date_fin):
+    """
+    Calendrier d'un service sur [date_debut, date_fin]
+    Bitmaps par salarié et par type encodés en hexadécimal (bit 0 = date_debut)
+    + occupation: nombre de salariés absents (congé ou sortie) par jour
+    """
+    nb_jours = (date_fin - date_debut).days + 1
+    masque = (1 << nb_jours) - 1
+
+    salaries = {}
+    ordre = []
+    bitmaps = {type_: {} for type_ in TYPES_CALENDRIER}
+
+    for annee, mois in _mois_de_la_periode(date_debut, date_fin):
+        donnees = mois_en_cache(service_id, annee, mois)
+        decalage = (date(annee, mois, 1) - date_debut).days
+
+        for salarie in donnees['salaries']:
+            if salarie['id'] not in salaries:
+                salaries[salarie['id']] = salarie
+                ordre.append(salarie['id'])
+
+        for type_ in TYPES_CALENDRIER:
+            for salarie_id, bits in donnees[type_].items():
+                bits = bits << decalage if decalage >= 0 else bits >> -decalage
+                bitmaps[type_][salarie_id] = bitmaps[type_].get(salarie_id, 0) | (bits & masque)
+
+    occupation = [0] * nb_jours
+    lignes = []
+    for salarie_id in ordre:
+        absent = bitmaps['conge'].get(salarie_id, 0) | bitmaps['sortie'].get(salarie_id, 0)
+        for i in range(nb_jours):
+            if absent >> i & 1:
+                occupation[i] += 1
+        lignes.append({
+            **salaries[salarie_id],
+            **{type_: format(bitmaps[type_].get(salarie_id, 0), 'x') for type_ in TYPES_CALENDRIER},
+        })
+
+    return {
+        'date_debut': date_debut,
+        'date_fin': date_fin,
+        'jours': nb_jours,
+        'types': list(TYPES_CALENDRIER),
+        'encodage': 'hex, bit 0 = date_debut',
+        'salaries': lignes,
+        'occupation': occupation,
+    }
+
+
+# ============================================================================
+# INVALIDATION
+# ============================================================================
+
+def invalider_calendrier_demandes(model, demande_ids):
+    """Invalide le calendrier des services concernés par des demandes (mise à jour en masse)"""
+    if not demande_ids or model not in (DemandeConge, DemandeSortie, TravauxExceptionnels):
+        return
+    service_ids = (
+        model.objects.filter(id__in=demande_ids)
+        .order_by()
+        .values_list('salarie__service_id', flat=True)
+        .distinct()
+    )
+    for service_id in service_ids:
+        invalider_calendrier(service_id)
@@ -0,0 +1,277 @@
+# ============================================================================
+# CONGES_UTILS.PY - REGISTRE DE CONGÉS (MouvementConge) ET SOLDES
+# ============================================================================
+# Chaque acquisition / consommation / ajustement est un MouvementConge
+# (append-only). SoldeConge est le solde matérialisé : il est mis à jour
+# par incréments F() dans la même transaction que le mouvement.
+# ============================================================================
+
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from dateutil.relativedelta import relativedelta
+
+from .models import DemandeConge, MouvementConge, Salarie, SoldeConge
+
+
+# Jours acquis par mois travaillé (25 jours ouvrés / an)
+CONGES_ACQUIS_PAR_MOIS = Decimal(str(getattr(settings, 'CONGES_ACQUIS_PAR_MOIS', '2.08')))
+
+# Types de congé qui consomment le solde
+TYPES_CONGE_DECOMPTES = ('normal',)
+
+# Statuts salarié qui acquièrent des congés
+STATUTS_ACQUISITION = ('actif', 'conge', 'arret_maladie')
+
+
+# ============================================================================
+# UTILITAIRES
+# ============================================================================
+
+def _montant(valeurs_par_salarie, champ_salarie='salarie_id'):
+    """Expression Case/When : un montant par salarié, 0 sinon"""
+    return Case(
+        *[When(**{champ_salarie: salarie_id}, then=Value(montant))
+          for salarie_id, montant in valeurs_par_salarie.items()],
+        default=Value(Decimal('0')),
+        output_field=DecimalField(max_digits=6, decimal_places=2),
+    )
+
+
+def _assurer_soldes(salarie_ids):
+    """Crée les SoldeConge manquants (un seul INSERT)"""
+    existants = set(
+        SoldeConge.objects.filter(salarie_id__in=salarie_ids).values_list('salarie_id', flat=True)
+    )
+    manquants = [SoldeConge(salarie_id=sid) for sid in salarie_ids if sid not in existants]
+    if manquants:
+        SoldeConge.objects.bulk_create(manquants, ignore_conflicts=True)
+
+
+def _appliquer_aux_soldes(acquis=None, utilises=None):
+    """
+    Applique des deltas aux soldes en un seul UPDATE
+    acquis / utilises: {salarie_id: Decimal}
+    conges_restants = conges_restants + acquis - utilises
+    """
+    acquis = acquis or {}
+    utilises = utilises or {}
+    salarie_ids = set(acquis) | set(utilises)
+    if not salarie_ids:
+        return 0
+
+    _assurer_soldes(salarie_ids)
+
+    valeurs = {}
+    if acquis:
+        valeurs['conges_acquis'] = F('conges_acquis') + _montant(acquis)
+    if utilises:
+        valeurs['conges_utilises'] = F('conges_utilises') + _montant(utilises)
+    valeurs['conges_restants'] = (
+        F('conges_restants') + _montant(acquis) - _montant(utilises)
+    )
+    return SoldeConge.objects.filter(salarie_id__in=salarie_ids).update(**valeurs)
+
+
+# ============================================================================
+# CONSOMMATION (validation service d'une demande)
+# ============================================================================
+
+def _demandes_avec_net(demande_ids):
+    """Demandes annotées du total net de leurs mouvements (0 si aucun)"""
+    return (
+        DemandeConge.objects.filter(id__in=demande_ids)
+        .annotate(net=Coalesce(
+            Sum('mouvements_conge__nombre_jours'),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=6, decimal_places=2),
+        ))
+        .order_by()
+    )
+
+
+def enregistrer_consommations(demande_ids, user=None):
+    """
+    Enregistre la consommation des demandes approuvées
+    - un mouvement 'consommation' par demande décomptée (bulk_create)
+    - un UPDATE des soldes concernés
+    Idempotent : une demande dont le net est déjà débité est ignorée
+    """
+    with transaction.atomic():
+        demandes = list(
+            _demandes_avec_net(demande_ids)
+            .filter(type_conge__in=TYPES_CONGE_DECOMPTES, net=0)
+            .values('id', 'salarie_id', 'nombre_jours')
+        )
+        if not demandes:
+            return 0
+
+        MouvementConge.objects.bulk_create([
+            MouvementConge(
+                salarie_id=d['salarie_id'],
+                type_mouvement='consommation',
+                nombre_jours=-d['nombre_jours'],
+                demande_id=d['id'],
+                motif='Demande de congé approuvée',
+                cree_par=user,
+            )
+            for d in demandes
+        ])
+
+        utilises = {}
+        for d in demandes:
+            utilises[d['salarie_id']] = utilises.get(d['salarie_id'], Decimal('0')) + d['nombre_jours']
+        _appliquer_aux_soldes(utilises=utilises)
+        return len(demandes)
+
+
+def annuler_consommations(demande_ids, user=None):
+    """
+    Recrédite les jours d'une demande consommée puis rejetée
+    (mouvement 'annulation' positif, le mouvement initial reste dans le registre)
+    """
+    with transaction.atomic():
+        demandes = list(
+            _demandes_avec_net(demande_ids)
+            .filter(net__lt=0)
+            .values('id', 'salarie_id', 'net')
+        )
+        if not demandes:
+            return 0
+
+        MouvementConge.objects.bulk_create([
+            MouvementConge(
+                salarie_id=d['salarie_id'],
+                type_mouvement='annulation',
+                nombre_jours=-d['net'],
+                demande_id=d['id'],
+                motif='Annulation de la consommation (demande rejetée)',
+                cree_par=user,
+            )
+            for d in demandes
+        ])
+
+        utilises = {}
+        for d in demandes:
+            utilises[d['salarie_id']] = utilises.get(d['salarie_id'], Decimal('0')) + d['net']
+        _appliquer_aux_soldes(utilises=utilises)
+        return len(demandes)
+
+
+# ============================================================================
+# AJUSTEMENT MANUEL
+# ============================================================================
+
+def ajuster_solde(salarie, nombre_jours, motif, user=None):
+    """Ajoute un mouvement 'ajustement' (positif ou négatif) et met à jour le solde"""
+    nombre_jours = Decimal(str(nombre_jours))
+    with transaction.atomic():
+        mouvement = MouvementConge.objects.create(
+            salarie=salarie,
+            type_mouvement='ajustement',
+            nombre_jours=nombre_jours,
+            motif=motif,
+            cree_par=user,
+        )
+        _appliquer_aux_soldes(acquis={salarie.id: nombre_jours})
+    return mouvement
+
+
+# ============================================================================
+# ACQUISITION MENSUELLE (batch nocturne)
+# ============================================================================
+
+def salaries_eligibles_acquisition(periode):
+    """Salariés présents sur le mois `periode` (1er du mois)"""
+    fin_mois = periode + relativedelta(months=1) - relativedelta(days=1)
+    return Salarie.objects.filter(
+        statut__in=STATUTS_ACQUISITION,
+    ).filter(
+        Q(date_embauche__isnull=True) | Q(date_embauche__lte=fin_mois),
+        Q(date_sortie__isnull=True) | Q(date_sortie__gte=periode),
+    )
+
+
+def crediter_acquisition_mensuelle(periode=None, nombre_jours=None, dry_run=False, batch_size=1000):
+    """
+    Crédite l'acquisition du mois pour tous les salariés éligibles
+    - periode: date du mois à créditer (défaut : mois précédent)
+    - un SELECT des salariés non encore crédités, un bulk_create, un UPDATE
+    Idempotent : relancer le job pour la même période ne crédite rien
+
+    Retourne {'periode', 'nombre_jours', 'credites'}
+    """
+    if periode is None:
+        periode = date.today().replace(day=1) - relativedelta(months=1)
+    periode = periode.replace(day=1)
+    nombre_jours = Decimal(str(nombre_jours)) if nombre_jours is not None else CONGES_ACQUIS_PAR_MOIS
+
+    with transaction.atomic():
+        salarie_ids = list(
+            salaries_eligibles_acquisition(periode)
+            .exclude(mouvements_conge__type_mouvement='acquisition',
+                     mouvements_conge__periode=periode)
+            .order_by()
+            .values_list('id', flat=True)
+        )
+
+        if salarie_ids and not dry_run:
+            MouvementConge.objects.bulk_create(
+                [
+                    MouvementConge(
+                        salarie_id=sid,
+                        type_mouvement='acquisition',
+                        nombre_jours=nombre_jours,
+                        periode=periode,
+                        motif=f"Acquisition {periode.strftime('%m/%Y')}",
+                    )
+                    for sid in salarie_ids
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            _assurer_soldes(salarie_ids)
+            SoldeConge.objects.filter(salarie_id__in=salarie_ids).update(
+                conges_acquis=F('conges_acquis') + nombre_jours,
+                conges_restants=F('conges_restants') + nombre_jours,
+            )
+
+    return {
+        'periode': periode.isoformat(),
+        'nombre_jours': str(nombre_jours),
+        'credites': len(salarie_ids),
+        'dry_run': dry_run,
+    }
+
+
+# ============================================================================
+# RECONSTRUCTION DEPUIS LE REGISTRE
+# ============================================================================
+
+def recalculer_solde(salarie):
+    """
+    Recalcule le SoldeConge d'un salarié à partir du registre
+    (contrôle / correction d'un solde désynchronisé)
+    Répartition par type de mouvement : la suppression d'une demande
+    (demande -> NULL) ne change pas le classement de ses mouvements
+    """
+    totaux = MouvementConge.objects.filter(salarie=salarie).aggregate(
+        acquis=Sum('nombre_jours', filter=Q(type_mouvement__in=MouvementConge.TYPES_ACQUIS)),
+        utilises=Sum('nombre_jours', filter=Q(type_mouvement__in=MouvementConge.TYPES_UTILISES)),
+    )
+    acquis = totaux['acquis'] or Decimal('0')
+    utilises = -(totaux['utilises'] or Decimal('0'))
+
+    solde, _ = SoldeConge.objects.update_or_create(
+        salarie=salarie,
+        defaults={
+            'conges_acquis': acquis,
+            'conges_utilises': utilises,
+            'conges_restants': acquis - utilises,
+        },
+    )
+    return solde
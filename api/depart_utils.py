@@ -0,0 +1,153 @@
+# ============================================================================
+# DEPART_UTILS.PY - TRAITEMENT DES DÉPARTS DE SALARIÉS (OFFBOARDING)
+# ============================================================================
+# Pour un ou plusieurs salariés sortants, dans une seule transaction :
+# - retour des équipements affectés (un UPDATE, stock ajusté une fois par équipement)
+# - clôture des accès applicatifs et des accès locaux (un UPDATE chacun)
+# Une affectation ou un accès ouvert après la date de sortie est clos à sa
+# date de début (jamais de fin antérieure au début).
+# - statut 'inactif' + date_sortie, désactivation des comptes User
+# Retourne une checklist par salarié.
+# ============================================================================
+
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q, Value
+from django.db.models.functions import Greatest
+
+from .models import (
+    AccesApplication, AccesSalarie, EquipementInstance, Salarie, SoldeConge,
+)
+from .calendrier_utils import invalider_calendrier
+from .stock_utils import retourner_en_masse
+
+
+def salaries_a_traiter(jour=None):
+    """
+    Salariés sortis (date_sortie ≤ jour ou statut inactif) ayant encore
+    un équipement, un accès ouvert ou un compte actif
+    """
+    jour = jour or date.today()
+    equipement_ouvert = EquipementInstance.objects.filter(salarie=OuterRef('pk'), date_retrait__isnull=True)
+    acces_app_ouvert = AccesApplication.objects.filter(salarie=OuterRef('pk'), date_fin__isnull=True)
+    acces_local_ouvert = AccesSalarie.objects.filter(salarie=OuterRef('pk'), date_fin__isnull=True)
+    return Salarie.objects.filter(
+        Q(date_sortie__lte=jour) | Q(statut='inactif')
+    ).filter(
+        Exists(equipement_ouvert) | Exists(acces_app_ouvert) | Exists(acces_local_ouvert)
+        | Q(user__is_active=True) | ~Q(statut='inactif')
+    )
+
+
+def _grouper(lignes, cle='salarie_id'):
+    """{salarie_id: [lignes]}"""
+    groupes = {}
+    for ligne in lignes:
+        groupes.setdefault(ligne[cle], []).append(ligne)
+    return groupes
+
+
+def traiter_departs(salarie_ids, date_sortie=None, dry_run=False):
+    """
+    Clôture tout ce qui est ouvert pour les salariés sortants
+    - date_sortie: date utilisée pour les salariés sans date_sortie (défaut: aujourd'hui)
+    - dry_run: produit la checklist sans rien écrire
+    Retourne {'total', 'dry_run', 'salaries': [checklist par salarié]}
+    """
+    date_defaut = date_sortie or date.today()
+
+    with transaction.atomic():
+        salaries = list(
+            Salarie.objects.filter(id__in=salarie_ids).select_for_update(of=('self',))
+            .order_by('nom', 'prenom')
+            .values('id', 'matricule', 'nom', 'prenom', 'service_id', 'statut',
+                    'date_sortie', 'user_id', 'user__is_active')
+        )
+        ids = [s['id'] for s in salaries]
+        dates = {s['id']: s['date_sortie'] or date_defaut for s in salaries}
+
+        # 1️⃣ ÉTAT OUVERT (une requête par table)
+        equipements = _grouper(
+            EquipementInstance.objects.filter(salarie_id__in=ids, date_retrait__isnull=True)
+            .order_by().values('id', 'salarie_id', 'numero_serie', 'equipement__nom', 'date_affectation')
+        )
+        acces_applicatifs = _grouper(
+            AccesApplication.objects.filter(salarie_id__in=ids, date_fin__isnull=True)
+            .order_by().values('id', 'salarie_id', 'application', 'identifiant', 'date_debut')
+        )
+        acces_locaux = _grouper(
+            AccesSalarie.objects.filter(salarie_id__in=ids, date_fin__isnull=True)
+            .order_by().values('id', 'salarie_id', 'type_acces__nom', 'date_debut')
+        )
+        soldes = dict(
+            SoldeConge.objects.filter(salarie_id__in=ids).values_list('salarie_id', 'conges_restants')
+        )
+
+        if not dry_run and ids:
+            # 2️⃣ CLÔTURES : une série d'UPDATE par date (en pratique une seule),
+            # jamais avant le début de l'affectation / de l'accès
+            retours = {}
+            for sid in ids:
+                for e in equipements.get(sid, []):
+                    retours.setdefault(max(dates[sid], e['date_affectation']), []).append(e['id'])
+            for jour, instance_ids in retours.items():
+                retourner_en_masse(EquipementInstance.objects.all(), instance_ids, jour)
+
+            for jour in set(dates.values()):
+                ids_jour = [sid for sid in ids if dates[sid] == jour]
+                for modele in (AccesApplication, AccesSalarie):
+                    modele.objects.filter(
+                        salarie_id__in=ids_jour, date_fin__isnull=True
+                    ).update(date_fin=Greatest(Value(jour), F('date_debut')))
+                Salarie.objects.filter(id__in=ids_jour, date_sortie__isnull=True).update(date_sortie=jour)
+
+            # 3️⃣ STATUT ET COMPTES
+            Salarie.objects.filter(id__in=ids).exclude(statut='inactif').update(statut='inactif')
+            User.objects.filter(
+                id__in=[s['user_id'] for s in salaries if s['user_id']], is_active=True
+            ).update(is_active=False)
+
+    # update() ne déclenche pas post_save : le calendrier est invalidé explicitement
+    if not dry_run:
+        for service_id in {s['service_id'] for s in salaries}:
+            invalider_calendrier(service_id)
+
+    return {
+        'total': len(salaries),
+        'dry_run': dry_run,
+        'salaries': [
+            {
+                'salarie_id': s['id'],
+                'matricule': s['matricule'],
+                'nom': f"{s['prenom']} {s['nom']}",
+                'date_sortie': dates[s['id']],
+                'statut_precedent': s['statut'],
+                'equipements_retournes': [
+                    {
+                        'id': e['id'], 'numero_serie': e['numero_serie'], 'equipement': e['equipement__nom'],
+                        'date_retrait': max(dates[s['id']], e['date_affectation']),
+                    }
+                    for e in equipements.get(s['id'], [])
+                ],
+                'acces_applicatifs_clos': [
+                    {
+                        'id': a['id'], 'application': a['application'], 'identifiant': a['identifiant'],
+                        'date_fin': max(dates[s['id']], a['date_debut']),
+                    }
+                    for a in acces_applicatifs.get(s['id'], [])
+                ],
+                'acces_locaux_clos': [
+                    {
+                        'id': a['id'], 'type_acces': a['type_acces__nom'],
+                        'date_fin': max(dates[s['id']], a['date_debut']),
+                    }
+                    for a in acces_locaux.get(s['id'], [])
+                ],
+                'compte_desactive': bool(s['user_id'] and s['user__is_active']),
+                'solde_conges_restant': soldes.get(s['id']),
+            }
+            for s in salaries
+        ],
+    }
@@ -0,0 +1,136 @@
+# ============================================================================
+# ETAG_UTILS.PY - REQUÊTES CONDITIONNELLES (ETAG / LAST-MODIFIED)
+# ============================================================================
+# L'empreinte d'une réponse est calculée AVANT sérialisation :
+# - version des données : horodatage de la dernière écriture validée en base
+#   (INSERT / UPDATE / DELETE détectés au niveau de la connexion, y compris
+#   update(), bulk_create() et SQL brut) ; couvre les changements de
+#   relations sérialisées (service renommé, équipement affecté...)
+# - agrégats de la collection filtrée : nombre, id max, date max
+#   (date_modification, sinon date_creation) - une requête
+# - portée : utilisateur, URL complète (filtres, page), format de rendu
+#
+# La version est stockée dans le cache Django : elle n'est partagée entre
+# workers qu'avec un cache partagé (CACHE_BACKEND=redis / deux_niveaux),
+# d'où settings.REQUETES_CONDITIONNELLES désactivé par défaut avec locmem
+# hors DEBUG. Avec deux_niveaux elle est lue et écrite dans le niveau
+# partagé : un LRU local servirait une version périmée (304 à tort).
+# ============================================================================
+
+import hashlib
+import re
+import time
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from .cache_backends import cache_partage
+
+
+VERSION_CACHE_KEY = 'donnees:version'
+
+# Écritures sans effet sur les réponses de l'API
+TABLES_IGNOREES = {
+    'django_session', 'django_admin_log', 'django_migrations', 'django_content_type',
+}
+
+_ECRITURE = re.compile(r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+["`]?(\w+)', re.IGNORECASE)
+
+
+# ============================================================================
+# VERSION DES DONNÉES
+# ============================================================================
+
+def version_donnees():
+    """Horodatage (float) de la dernière écriture validée, 0 si inconnu"""
+    return cache_partage().get(VERSION_CACHE_KEY) or 0
+
+
+def _marquer_ecriture():
+    cache_partage().set(VERSION_CACHE_KEY, time.time(), timeout=None)
+
+
+def _detecteur_ecritures(execute, sql, params, many, context):
+    """execute_wrapper : programme la mise à jour de la version au commit"""
+    resultat = execute(sql, params, many, context)
+    correspondance = _ECRITURE.match(sql)
+    if correspondance and correspondance.group(1) not in TABLES_IGNOREES:
+        connection = context['connection']
+        # Un seul callback par transaction (les imports écrivent des milliers de lignes)
+        if not any(entree[1] is _marquer_ecriture for entree in connection.run_on_commit):
+            transaction.on_commit(_marquer_ecriture, using=connection.alias)
+    return resultat
+
+
+def installer_detecteur_ecritures(connection):
+    """À appeler à la création de chaque connexion (signals.py)"""
+    if _detecteur_ecritures not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_detecteur_ecritures)
+
+
+# ============================================================================
+# EMPREINTES
+# ============================================================================
+
+def champ_date_modele(modele):
+    """Champ daté le plus fin du modèle (None s'il n'en a pas)"""
+    noms = {champ.name for champ in modele._meta.concrete_fields}
+    for nom in ('date_modification', 'date_derniere_maj', 'date_creation'):
+        if nom in noms:
+            return nom
+    return None
+
+
+def agregats_queryset(queryset):
+    """(nombre, id max, date max) de la collection filtrée, en une requête"""
+    champ = champ_date_modele(queryset.model)
+    agregats = {'nombre': Count('pk'), 'max_id': Max('pk')}
+    if champ:
+        agregats['derniere'] = Max(champ)
+    valeurs = queryset.order_by().aggregate(**agregats)
+    return valeurs['nombre'], valeurs['max_id'], valeurs.get('derniere')
+
+
+def calculer_etag(*parties):
+    return 'W/"%s"' % hashlib.sha1(repr(parties).encode()).hexdigest()[:32]
+
+
+def derniere_modification(version, date=None):
+    """Timestamp Last-Modified : la plus récente de la version et de la date agrégée"""
+    horodatages = [version or 0]
+    if date is not None and hasattr(date, 'timestamp'):
+        horodatages.append(date.timestamp())
+    return max(horodatages) or None
+
+
+# ============================================================================
+# ÉVALUATION DES EN-TÊTES
+# ============================================================================
+
+def non_modifie(request, etag, horodatage):
+    """
+    True si la copie du client est à jour (-> 304)
+    - If-None-Match prioritaire (comparaison faible)
+    - If-Modified-Since : uniquement si la dernière écriture est strictement
+      antérieure à la seconde indiquée (les dates HTTP sont à la seconde)
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        if if_none_match.strip() == '*':
+            return True
+        valeur = etag.removeprefix('W/')
+        return any(e.removeprefix('W/') == valeur for e in parse_etags(if_none_match))
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return bool(horodatage and if_modified_since and horodatage < if_modified_since)
+
+
+def ajouter_entetes(response, etag, horodatage):
+    response['ETag'] = etag
+    if horodatage:
+        response['Last-Modified'] = http_date(horodatage)
+    # Réponses propres à l'utilisateur, toujours revalidées
+    response['Cache-Control'] = 'private, no-cache'
+    response['Vary'] = 'Accept, Authorization, Cookie'
+    return response
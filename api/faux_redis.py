@@ -0,0 +1,238 @@
+# ============================================================================
+# FAUX_REDIS.PY - SERVEUR DE SUBSTITUTION (PROTOCOLE REDIS) POUR LE LOCAL
+# ============================================================================
+# Sous-ensemble des commandes utilisées par api.cache_backends.RespCache :
+# PING, AUTH, SELECT, GET, SET [NX|XX] [EX|PX], DEL, EXISTS, INCR, INCRBY,
+# DECRBY, MGET, PEXPIRE, PERSIST, FLUSHDB, DBSIZE, INFO, QUIT
+# Données en mémoire du processus, une base par numéro SELECT.
+# Développement et tests uniquement : pas de persistance, pas de sécurité.
+# ============================================================================
+
+import socketserver
+import threading
+import time
+
+from .cache_backends import ErreurRedis, lire_reponse
+
+
+# ============================================================================
+# ENCODAGE DES RÉPONSES
+# ============================================================================
+
+def _simple(texte):
+    return b'+%s\r\n' % texte.encode()
+
+
+def _erreur(texte):
+    return b'-%s\r\n' % texte.encode()
+
+
+def _entier(n):
+    return b':%d\r\n' % n
+
+
+def _bulk(donnees):
+    if donnees is None:
+        return b'$-1\r\n'
+    return b'$%d\r\n%s\r\n' % (len(donnees), donnees)
+
+
+def _tableau(elements):
+    return b'*%d\r\n' % len(elements) + b''.join(_bulk(e) for e in elements)
+
+
+# ============================================================================
+# STOCKAGE
+# ============================================================================
+
+class Stockage:
+    """Bases clé -> (valeur, expiration monotonic ou None), protégées par un verrou"""
+
+    def __init__(self, mot_de_passe=None):
+        self.mot_de_passe = mot_de_passe
+        self.bases = {}
+        self.verrou = threading.Lock()
+        self.commandes = 0
+
+    def base(self, numero):
+        return self.bases.setdefault(numero, {})
+
+    @staticmethod
+    def lire(base, cle):
+        entree = base.get(cle)
+        if entree is None:
+            return None
+        if entree[1] is not None and entree[1] <= time.monotonic():
+            del base[cle]
+            return None
+        return entree
+
+
+class Session:
+    """État d'une connexion cliente (base sélectionnée, authentification)"""
+
+    def __init__(self, stockage):
+        self.stockage = stockage
+        self.numero = 0
+        self.authentifie = stockage.mot_de_passe is None
+
+    def executer(self, arguments):
+        if not arguments:
+            return _erreur('ERR empty command')
+        nom = arguments[0].decode().upper()
+        args = arguments[1:]
+        if nom == 'AUTH':
+            if args and args[-1].decode() == self.stockage.mot_de_passe:
+                self.authentifie = True
+                return _simple('OK')
+            return _erreur('WRONGPASS invalid password')
+        if not self.authentifie:
+            return _erreur('NOAUTH Authentication required.')
+        methode = getattr(self, f'cmd_{nom.lower()}', None)
+        if methode is None:
+            return _erreur(f"ERR unknown command '{nom}'")
+        with self.stockage.verrou:
+            self.stockage.commandes += 1
+            try:
+                return methode(self.stockage.base(self.numero), *args)
+            except (TypeError, ValueError, IndexError):
+                return _erreur(f"ERR syntax error or wrong number of arguments for '{nom}'")
+
+    # Commandes ----------------------------------------------------------------
+
+    def cmd_ping(self, base, *args):
+        return _bulk(args[0]) if args else _simple('PONG')
+
+    def cmd_select(self, base, numero):
+        self.numero = int(numero)
+        return _simple('OK')
+
+    def cmd_get(self, base, cle):
+        entree = Stockage.lire(base, cle)
+        return _bulk(entree[0] if entree else None)
+
+    def cmd_set(self, base, cle, valeur, *options):
+        options = [o.decode().upper() for o in options]
+        expiration = None
+        i = 0
+        while i < len(options):
+            option = options[i]
+            if option in ('EX', 'PX'):
+                duree = int(options[i + 1])
+                expiration = time.monotonic() + (duree if option == 'EX' else duree / 1000)
+                i += 2
+                continue
+            if option not in ('NX', 'XX'):
+                return _erreur('ERR syntax error')
+            i += 1
+        existe = Stockage.lire(base, cle) is not None
+        if ('NX' in options and existe) or ('XX' in options and not existe):
+            return _bulk(None)
+        base[cle] = (valeur, expiration)
+        return _simple('OK')
+
+    def cmd_del(self, base, *cles):
+        return _entier(sum(1 for cle in cles if Stockage.lire(base, cle) and base.pop(cle)))
+
+    def cmd_exists(self, base, *cles):
+        return _entier(sum(1 for cle in cles if Stockage.lire(base, cle)))
+
+    def cmd_incrby(self, base, cle, delta):
+        entree = Stockage.lire(base, cle)
+        try:
+            valeur = int(entree[0]) if entree else 0
+        except ValueError:
+            return _erreur('ERR value is not an integer or out of range')
+        valeur += int(delta)
+        base[cle] = (str(valeur).encode(), entree[1] if entree else None)
+        return _entier(valeur)
+
+    def cmd_incr(self, base, cle):
+        return self.cmd_incrby(base, cle, b'1')
+
+    def cmd_decrby(self, base, cle, delta):
+        return self.cmd_incrby(base, cle, str(-int(delta)).encode())
+
+    def cmd_mget(self, base, *cles):
+        return _tableau([(Stockage.lire(base, cle) or (None,))[0] for cle in cles])
+
+    def cmd_pexpire(self, base, cle, duree):
+        entree = Stockage.lire(base, cle)
+        if entree is None:
+            return _entier(0)
+        base[cle] = (entree[0], time.monotonic() + int(duree) / 1000)
+        return _entier(1)
+
+    def cmd_persist(self, base, cle):
+        entree = Stockage.lire(base, cle)
+        if entree is None or entree[1] is None:
+            return _entier(0)
+        base[cle] = (entree[0], None)
+        return _entier(1)
+
+    def cmd_flushdb(self, base):
+        base.clear()
+        return _simple('OK')
+
+    def cmd_dbsize(self, base):
+        return _entier(sum(1 for cle in list(base) if Stockage.lire(base, cle)))
+
+    def cmd_info(self, base, *args):
+        lignes = [
+            '# Server', 'redis_version:0.0.0-faux',
+            '# Stats', f'total_commands_processed:{self.stockage.commandes}',
+            '# Keyspace',
+        ] + [f'db{n}:keys={len(b)}' for n, b in sorted(self.stockage.bases.items()) if b]
+        return _bulk('\r\n'.join(lignes).encode())
+
+
+# ============================================================================
+# SERVEUR
+# ============================================================================
+
+class _Gestionnaire(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        session = Session(self.server.stockage)
+        while True:
+            try:
+                arguments = lire_reponse(self.rfile)
+            except (ConnectionError, ErreurRedis, OSError, ValueError):
+                return
+            if not isinstance(arguments, list):
+                self.wfile.write(_erreur('ERR protocol error'))
+                return
+            if arguments and arguments[0].upper() == b'QUIT':
+                self.wfile.write(_simple('OK'))
+                return
+            self.wfile.write(session.executer(arguments))
+
+
+class FauxRedis(socketserver.ThreadingTCPServer):
+    """
+    serveur = FauxRedis(('127.0.0.1', 0))   # port 0 : port libre
+    serveur.demarrer()                      # thread en arrière-plan
+    serveur.url -> 'redis://127.0.0.1:<port>/0'
+    serveur.arreter()
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, adresse=('127.0.0.1', 6379), mot_de_passe=None):
+        super().__init__(adresse, _Gestionnaire)
+        self.stockage = Stockage(mot_de_passe)
+        self._thread = None
+
+    @property
+    def url(self):
+        hote, port = self.server_address[:2]
+        return f'redis://{hote}:{port}/0'
+
+    def demarrer(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='faux-redis', daemon=True)
+        self._thread.start()
+        return self
+
+    def arreter(self):
+        self.shutdown()
+        self.server_close()
@@ -10,6 +10,11 @@ import logging
 from django.apps import apps
 from django.db import transaction
 from datetime import datetime
+from .models import HistoriqueSalarie
+from .referentiel_utils import entite_referentiel, referentiel
+from .onboarding_utils import (
+    creation_user_suspendue, creer_comptes_salaries,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -87,6 +92,8 @@ IMPORTABLE_MODELS = {
         'name': 'Salarié',
         'unique_field': 'matricule',
         'exclude_fields': ['id', 'date_creation', 'date_modification'],
+        # Comptes User créés en masse après l'import (signal suspendu)
+        'creer_comptes': True,
     },
         'accesapplication': {'app': 'api', 'model': 'AccesApplication', 'name': 'Accès Application', 'unique_field': None, 'exclude_fields': ['id', 'date_creation']},
     'equipementinstance': {'app': 'api', 'model': 'EquipementInstance', 'name': 'Équipement Instance', 'unique_field': 'numero_serie', 'exclude_fields': ['id', 'date_creation']},
@@ -127,6 +134,7 @@ class GenericImporter:
             'errors': [],
             'warnings': []
         }
+        self.created_ids = []
 
     def get_model_structure(self) -> dict:
         """
@@ -341,7 +349,8 @@ class GenericImporter:
             logger.info(f"Import de {len(df)} lignes pour {self.model_name}")
             
             # Importer chaque ligne
-            with transaction.atomic():
+            # Historique salarié (service / grade) inséré en une fois à la fin
+            with transaction.atomic(), creation_user_suspendue(), HistoriqueSalarie.collecte():
                 for idx, row in df.iterrows():
                     try:
                         self._import_row(row, idx + 2)  # +2 car idx commence à 0 et ligne 1 est l'en-tête
@@ -351,6 +360,14 @@ class GenericImporter:
                             'error': str(e)
                         })
                         logger.error(f"Erreur ligne {idx + 2}: {str(e)}")
+                
+                # Comptes User des nouveaux salariés : en masse plutôt que par le signal
+                # (mot de passe inutilisable : réinitialisation requise)
+                if self.config.get('creer_comptes') and self.created_ids:
+                    comptes = creer_comptes_salaries(self.Model.objects.filter(id__in=self.created_ids))
+                    self.results['users_crees'] = len(comptes['crees'])
+                    for ignore in comptes['ignores']:
+                        self.results['warnings'].append({'row': 0, 'warning': ignore['raison']})
             
             return self.results
         except Exception as e:
@@ -391,6 +408,7 @@ class GenericImporter:
             # Aucune clé unique, créer directement
             obj = self.Model.objects.create(**data)
             self.results['inserted'] += 1
+            self.created_ids.append(obj.pk)
             return
         
         # Update or create
@@ -402,6 +420,7 @@ class GenericImporter:
         
         if created:
             self.results['inserted'] += 1
+            self.created_ids.append(obj.pk)
         else:
             self.results['updated'] += 1
 
@@ -425,6 +444,13 @@ class GenericImporter:
             if field_type == 'ForeignKey':
                 # Résoudre la relation par le champ 'nom' (cas courant)
                 related_model = field.related_model
+                entite = entite_referentiel(related_model)
+                if entite:
+                    # Données de référence : résolues en mémoire, sans requête par ligne
+                    pk = referentiel.resoudre(entite, value)
+                    if pk is None:
+                        raise ValueError(f"Impossible de trouver {related_model.__name__} avec nom ou id='{value}'")
+                    return referentiel.get(entite, pk)
                 try:
                     # D'abord essayer par 'nom'
                     return related_model.objects.get(nom=str(value).strip())
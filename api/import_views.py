@@ -176,7 +176,7 @@ class ImportViewSet(viewsets.ViewSet):
         Récupère l'historique des 50 derniers imports
         """
         try:
-            logs = ImportLog.objects.all().order_by('-date_creation')[:50]
+            logs = ImportLog.objects.select_related('cree_par').order_by('-date_creation')[:50]
             serializer = ImportLogSerializer(logs, many=True)
             return Response({
                 'success': True,
@@ -0,0 +1,149 @@
+# ============================================================================
+# INVENTAIRE_UTILS.PY - RAPPROCHEMENT D'UN INVENTAIRE PHYSIQUE (SCAN CSV)
+# ============================================================================
+# - les instances attendues sont chargées une fois dans un dict
+#   {numero_serie normalisé: ligne} (une requête)
+# - le fichier scanné est lu en flux, ligne par ligne, sans être chargé
+# - un seul passage produit : manquants, inattendus, détenteur différent, doublons
+# ============================================================================
+
+import csv
+import io
+from itertools import chain
+
+from .models import EquipementInstance
+
+
+# En-têtes reconnus pour les colonnes du fichier
+COLONNES_SERIE = ('numero_serie', 'serie', 'serial', 'sn')
+COLONNES_MATRICULE = ('matricule', 'detenteur', 'salarie')
+
+
+def normaliser_serie(valeur):
+    """Numéro de série comparable (espaces retirés, majuscules)"""
+    return (valeur or '').strip().upper()
+
+
+def charger_instances(service_id=None):
+    """
+    {numero_serie normalisé: instance (dict)} en une requête
+    service_id: restreint les instances attendues au service du détenteur
+    """
+    qs = EquipementInstance.objects.exclude(numero_serie__isnull=True).exclude(numero_serie='')
+    if service_id:
+        qs = qs.filter(salarie__service_id=service_id)
+    return {
+        normaliser_serie(ligne['numero_serie']): ligne
+        for ligne in qs.order_by().values(
+            'id', 'numero_serie', 'date_retrait', 'equipement__nom',
+            'salarie_id', 'salarie__matricule', 'salarie__nom', 'salarie__prenom',
+        ).iterator(chunk_size=5000)
+    }
+
+
+def lire_scan(fichier, encoding='utf-8-sig'):
+    """
+    Itère sur (numero_ligne, numero_serie, matricule) d'un fichier scanné
+    - fichier binaire lu en flux (UploadedFile, open(..., 'rb'))
+    - séparateur ; ou , détecté sur la première ligne
+    - en-tête optionnel : sinon 1re colonne = série, 2e = matricule
+    """
+    texte = io.TextIOWrapper(fichier, encoding=encoding, newline='')
+    premiere = texte.readline()
+    if not premiere:
+        return
+    separateur = ';' if premiere.count(';') > premiere.count(',') else ','
+
+    entete = [c.strip().lower() for c in next(csv.reader([premiere], delimiter=separateur))]
+    col_serie = next((entete.index(c) for c in COLONNES_SERIE if c in entete), None)
+    col_matricule = next((entete.index(c) for c in COLONNES_MATRICULE if c in entete), None)
+
+    lignes = csv.reader(texte, delimiter=separateur)
+    if col_serie is None:
+        # Pas d'en-tête : la première ligne est une donnée
+        col_serie, col_matricule = 0, 1
+        lignes = chain([next(csv.reader([premiere], delimiter=separateur))], lignes)
+        debut = 1
+    else:
+        debut = 2
+
+    for numero_ligne, colonnes in enumerate(lignes, start=debut):
+        if not colonnes or len(colonnes) <= col_serie:
+            continue
+        matricule = (
+            colonnes[col_matricule].strip()
+            if col_matricule is not None and len(colonnes) > col_matricule else ''
+        )
+        yield numero_ligne, colonnes[col_serie], matricule
+
+
+def rapprocher_inventaire(fichier, service_id=None):
+    """
+    Rapproche un fichier scanné avec les instances en base
+    Retourne {'total_scannes', 'total_attendus', 'trouves', 'manquants',
+              'inattendus', 'detenteur_different', 'doublons'}
+    """
+    instances = charger_instances(service_id)
+    # Attendues sur site : instances non retirées
+    attendues = {serie for serie, ligne in instances.items() if ligne['date_retrait'] is None}
+
+    vus = set()
+    inattendus = []
+    detenteur_different = []
+    doublons = []
+    total_scannes = 0
+
+    for numero_ligne, serie_brute, matricule in lire_scan(fichier):
+        serie = normaliser_serie(serie_brute)
+        if not serie:
+            continue
+        total_scannes += 1
+
+        if serie in vus:
+            doublons.append({'ligne': numero_ligne, 'numero_serie': serie_brute.strip()})
+            continue
+        vus.add(serie)
+
+        instance = instances.get(serie)
+        if instance is None or instance['date_retrait'] is not None:
+            inattendus.append({
+                'ligne': numero_ligne,
+                'numero_serie': serie_brute.strip(),
+                'matricule_scanne': matricule or None,
+                'motif': 'inconnu' if instance is None else 'retire',
+                'instance_id': instance['id'] if instance else None,
+            })
+        elif matricule and matricule.upper() != (instance['salarie__matricule'] or '').upper():
+            detenteur_different.append({
+                'ligne': numero_ligne,
+                'numero_serie': instance['numero_serie'],
+                'instance_id': instance['id'],
+                'equipement': instance['equipement__nom'],
+                'matricule_scanne': matricule,
+                'matricule_attendu': instance['salarie__matricule'],
+            })
+
+    manquants = [
+        {
+            'instance_id': instances[serie]['id'],
+            'numero_serie': instances[serie]['numero_serie'],
+            'equipement': instances[serie]['equipement__nom'],
+            'salarie_id': instances[serie]['salarie_id'],
+            'matricule': instances[serie]['salarie__matricule'],
+            'salarie_nom': (
+                f"{instances[serie]['salarie__prenom']} {instances[serie]['salarie__nom']}"
+                if instances[serie]['salarie_id'] else None
+            ),
+        }
+        for serie in sorted(attendues - vus)
+    ]
+
+    return {
+        'total_scannes': total_scannes,
+        'total_attendus': len(attendues),
+        'trouves': len(attendues & vus),
+        'manquants': manquants,
+        'inattendus': inattendus,
+        'detenteur_different': detenteur_different,
+        'doublons': doublons,
+    }
@@ -0,0 +1,204 @@
+# ============================================================================
+# JOURS_OUVRES_UTILS.PY - CALCUL SERVEUR DE DemandeConge.nombre_jours
+# ============================================================================
+# - Jours fériés français précalculés et mis en cache par année
+# - Jours travaillés de la semaine issus du CreneauTravail du salarié
+# - Calcul vectorisé (numpy.busday_count) : toutes les demandes d'une année
+#   sont recalculées en un appel par masque de semaine
+# - Décompte en jours entiers : les demi-journées ne sont pas gérées
+# ============================================================================
+
+from datetime import date, timedelta
+from decimal import Decimal
+from functools import lru_cache
+
+import numpy as np
+
+from .models import DemandeConge
+
+
+# Jours travaillés par défaut (ISO : 1 = lundi ... 7 = dimanche)
+JOURS_SEMAINE_DEFAUT = '12345'
+
+# Demandes encore modifiables : nombre_jours recalculé en batch
+STATUTS_DEMANDE_OUVERTE = ('brouillon', 'soumise', 'validée_direct', 'validée_service')
+
+
+# ============================================================================
+# JOURS FÉRIÉS
+# ============================================================================
+
+def date_paques(annee):
+    """Dimanche de Pâques (algorithme de Meeus/Jones/Butcher)"""
+    a = annee % 19
+    b, c = divmod(annee, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mois, jour = divmod(h + l - 7 * m + 114, 31)
+    return date(annee, mois, jour + 1)
+
+
+@lru_cache(maxsize=64)
+def jours_feries(annee):
+    """
+    Jours fériés français de l'année {date: nom}
+    Calculé une fois par année (cache process)
+    """
+    paques = date_paques(annee)
+    return {
+        date(annee, 1, 1): "Jour de l'An",
+        paques + timedelta(days=1): 'Lundi de Pâques',
+        date(annee, 5, 1): 'Fête du Travail',
+        date(annee, 5, 8): 'Victoire 1945',
+        paques + timedelta(days=39): 'Ascension',
+        paques + timedelta(days=50): 'Lundi de Pentecôte',
+        date(annee, 7, 14): 'Fête Nationale',
+        date(annee, 8, 15): 'Assomption',
+        date(annee, 11, 1): 'Toussaint',
+        date(annee, 11, 11): 'Armistice 1918',
+        date(annee, 12, 25): 'Noël',
+    }
+
+
+@lru_cache(maxsize=64)
+def _feries_np(annee_debut, annee_fin):
+    """Tableau numpy datetime64[D] des fériés entre deux années (incluses)"""
+    feries = []
+    for annee in range(annee_debut, annee_fin + 1):
+        feries.extend(jours_feries(annee))
+    return np.array(sorted(feries), dtype='datetime64[D]')
+
+
+def est_ferie(jour):
+    """True si le jour est férié"""
+    return jour in jours_feries(jour.year)
+
+
+# ============================================================================
+# MASQUE DE SEMAINE
+# ============================================================================
+
+def masque_semaine(jours_semaine):
+    """'12345' -> '1111100' (format weekmask numpy, lundi -> dimanche)"""
+    jours_semaine = jours_semaine or JOURS_SEMAINE_DEFAUT
+    return ''.join('1' if str(i) in jours_semaine else '0' for i in range(1, 8))
+
+
+def jours_semaine_salarie(salarie):
+    """Jours travaillés du salarié selon son créneau de travail"""
+    creneau = salarie.creneau_travail if salarie else None
+    return creneau.jours_semaine if creneau and creneau.jours_semaine else JOURS_SEMAINE_DEFAUT
+
+
+# ============================================================================
+# CALCUL
+# ============================================================================
+
+def compter_jours_ouvres_batch(debuts, fins, jours_semaine=JOURS_SEMAINE_DEFAUT):
+    """
+    Nombre de jours travaillés pour des listes de périodes [debut, fin] incluses
+    Un seul appel numpy pour toutes les périodes partageant le même masque
+    Retourne un np.ndarray d'entiers
+    """
+    if len(debuts) == 0:
+        return np.array([], dtype=int)
+
+    debuts_np = np.array(debuts, dtype='datetime64[D]')
+    fins_np = np.array(fins, dtype='datetime64[D]') + np.timedelta64(1, 'D')
+    annee_min = min(d.year for d in debuts)
+    annee_max = max(f.year for f in fins)
+
+    comptes = np.busday_count(
+        debuts_np,
+        fins_np,
+        weekmask=masque_semaine(jours_semaine),
+        holidays=_feries_np(annee_min, annee_max),
+    )
+    # Période inversée -> 0 plutôt qu'un nombre négatif
+    return np.maximum(comptes, 0)
+
+
+def compter_jours_ouvres(date_debut, date_fin, jours_semaine=JOURS_SEMAINE_DEFAUT):
+    """Nombre de jours travaillés entre deux dates incluses"""
+    return int(compter_jours_ouvres_batch([date_debut], [date_fin], jours_semaine)[0])
+
+
+def calculer_nombre_jours(salarie, date_debut, date_fin):
+    """nombre_jours (Decimal) d'une demande de congé"""
+    return Decimal(compter_jours_ouvres(date_debut, date_fin, jours_semaine_salarie(salarie)))
+
+
+def detail_periode(date_debut, date_fin, jours_semaine=JOURS_SEMAINE_DEFAUT):
+    """
+    Détail d'une période pour l'affichage (jours ouvrés, fériés, repos)
+    Retourne {'jours_ouvres', 'jours_feries': [{'date', 'nom'}], 'jours_repos'}
+    """
+    masque = masque_semaine(jours_semaine)
+    feries = []
+    repos = 0
+    jour = date_debut
+    while jour <= date_fin:
+        if masque[jour.weekday()] == '0':
+            repos += 1
+        elif est_ferie(jour):
+            feries.append({'date': jour, 'nom': jours_feries(jour.year)[jour]})
+        jour += timedelta(days=1)
+    return {
+        'jours_ouvres': compter_jours_ouvres(date_debut, date_fin, jours_semaine),
+        'jours_feries': feries,
+        'jours_repos': repos,
+    }
+
+
+# ============================================================================
+# RECALCUL EN MASSE
+# ============================================================================
+
+def recalculer_demandes_ouvertes(annee, dry_run=False, batch_size=500):
+    """
+    Recalcule nombre_jours de toutes les demandes ouvertes débutant dans l'année
+    - 1 SELECT, 1 busday_count par masque de semaine, bulk_update des seules
+      demandes modifiées
+    Retourne {'annee', 'total', 'modifiees'}
+    """
+    lignes = list(
+        DemandeConge.objects.filter(
+            statut__in=STATUTS_DEMANDE_OUVERTE,
+            date_debut__year=annee,
+        )
+        .order_by()
+        .values('id', 'date_debut', 'date_fin', 'nombre_jours',
+                'salarie__creneau_travail__jours_semaine')
+    )
+
+    par_masque = {}
+    for ligne in lignes:
+        masque = ligne['salarie__creneau_travail__jours_semaine'] or JOURS_SEMAINE_DEFAUT
+        par_masque.setdefault(masque, []).append(ligne)
+
+    a_modifier = []
+    for jours_semaine, groupe in par_masque.items():
+        comptes = compter_jours_ouvres_batch(
+            [l['date_debut'] for l in groupe],
+            [l['date_fin'] for l in groupe],
+            jours_semaine,
+        )
+        for ligne, compte in zip(groupe, comptes):
+            nouveau = Decimal(int(compte))
+            if ligne['nombre_jours'] != nouveau:
+                a_modifier.append(DemandeConge(id=ligne['id'], nombre_jours=nouveau))
+
+    if a_modifier and not dry_run:
+        DemandeConge.objects.bulk_update(a_modifier, ['nombre_jours'], batch_size=batch_size)
+
+    return {
+        'annee': annee,
+        'total': len(lignes),
+        'modifiees': len(a_modifier),
+        'dry_run': dry_run,
+    }
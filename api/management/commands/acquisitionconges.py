@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.conges_utils import crediter_acquisition_mensuelle
+
+
+class Command(BaseCommand):
+    help = "Credite l'acquisition mensuelle de conges pour tous les salaries (job nocturne, idempotent)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periode',
+            help="Mois a crediter au format AAAA-MM (defaut: mois precedent)",
+        )
+        parser.add_argument(
+            '--jours',
+            help="Nombre de jours acquis par mois (defaut: CONGES_ACQUIS_PAR_MOIS)",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Affiche le nombre de salaries a crediter sans rien ecrire",
+        )
+
+    def handle(self, *args, **options):
+        periode = None
+        if options['periode']:
+            try:
+                periode = datetime.strptime(options['periode'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("Format de periode invalide (attendu: AAAA-MM)")
+
+        resultat = crediter_acquisition_mensuelle(
+            periode=periode,
+            nombre_jours=options['jours'],
+            dry_run=options['dry_run'],
+        )
+
+        prefixe = "[DRY-RUN] " if resultat['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixe}Periode {resultat['periode']}: {resultat['credites']} salarie(s) "
+            f"credite(s) de {resultat['nombre_jours']} jour(s)"
+        ))
@@ -0,0 +1,98 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from api.models import Salarie, Service, Societe
+from api.recherche_utils import composer_texte, rechercher_salaries
+
+
+NOMS = ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand',
+        'Leroy', 'Moreau', 'Simon', 'Laurent', 'Lefèvre', 'Michel', 'Garcia', 'Bénard']
+PRENOMS = ['Hélène', 'Jérôme', 'Zoé', 'Léa', 'François', 'Chloé', 'Noël', 'Anaïs',
+           'Lucas', 'Hugo', 'Emma', 'Inès', 'Raphaël', 'Maël', 'Céline', 'Gaëlle']
+POSTES = ['Technicien', 'Chargé de clientèle', 'Comptable', 'Développeur', 'Assistante RH']
+SERVICES = ['Support', 'Comptabilité', 'Ressources humaines', 'Télévente', 'Logistique']
+
+REQUETES = ['helene', 'Hélène Martin', 'ber', 'dev', 'comptab', 'MAT0004', '4512', 'zzz']
+CHAMPS_ANCIENS = ['nom', 'prenom', 'matricule', 'mail_professionnel']
+
+
+def _ancienne_recherche(queryset, saisie):
+    """Equivalent de SearchFilter(search_fields=CHAMPS_ANCIENS)"""
+    for terme in saisie.split():
+        condition = Q()
+        for champ in CHAMPS_ANCIENS:
+            condition |= Q(**{f'{champ}__icontains': terme})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+class Command(BaseCommand):
+    help = ("Mesure la latence de la recherche de l'annuaire (plein texte vs ILIKE) "
+            "sur un jeu de salaries genere puis annule")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salaries', type=int, default=100000)
+        parser.add_argument('--repetitions', type=int, default=10)
+
+    def _mesurer(self, fonction, repetitions):
+        durees = []
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            fonction()
+            durees.append((time.perf_counter() - debut) * 1000)
+        durees.sort()
+        return statistics.median(durees), durees[int(len(durees) * 0.95) - 1 if len(durees) > 1 else 0]
+
+    def _generer(self, nombre):
+        rng = random.Random(42)
+        societe = Societe.objects.create(nom='Benchmark recherche')
+        services = [Service.objects.create(nom=nom, societe=societe) for nom in SERVICES]
+        salaries = []
+        for i in range(nombre):
+            service = rng.choice(services)
+            valeurs = {
+                'nom': rng.choice(NOMS), 'prenom': rng.choice(PRENOMS),
+                'matricule': f'MAT{i:07d}', 'poste': rng.choice(POSTES),
+                'extension_3cx': str(rng.randint(1000, 9999)),
+            }
+            valeurs['mail_professionnel'] = f"{valeurs['prenom']}.{valeurs['nom']}{i}@exemple.fr".lower()
+            salaries.append(Salarie(
+                societe=societe, service=service, genre='f',
+                texte_recherche=composer_texte({**valeurs, 'service_nom': service.nom}),
+                **valeurs,
+            ))
+        Salarie.objects.bulk_create(salaries, batch_size=5000)
+
+    def handle(self, *args, **options):
+        repetitions = options['repetitions']
+        with transaction.atomic():
+            debut = time.perf_counter()
+            self._generer(options['salaries'])
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {Salarie._meta.db_table}')
+            self.stdout.write(
+                f"{options['salaries']} salaries generes en {time.perf_counter() - debut:.1f}s "
+                f"({connection.vendor})"
+            )
+            self.stdout.write(f"{'requete':<16}{'resultats':>10}{'plein texte p50/p95':>24}{'ILIKE p50/p95':>20}")
+
+            base = Salarie.objects.all()
+            for saisie in REQUETES:
+                nouvelle = rechercher_salaries(base, saisie).order_by('-rang', 'nom', 'prenom')
+                ancienne = _ancienne_recherche(base, saisie).order_by('nom', 'prenom')
+
+                # Page de liste : COUNT + 20 premières lignes
+                p50, p95 = self._mesurer(lambda: (nouvelle.count(), list(nouvelle[:20])), repetitions)
+                a50, a95 = self._mesurer(lambda: (ancienne.count(), list(ancienne[:20])), repetitions)
+                self.stdout.write(
+                    f"{saisie:<16}{nouvelle.count():>10}{f'{p50:.1f}/{p95:.1f} ms':>24}"
+                    f"{f'{a50:.1f}/{a95:.1f} ms':>20}"
+                )
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Jeu de test annule"))
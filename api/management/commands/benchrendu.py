@@ -0,0 +1,97 @@
+import gzip
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.middleware import QUALITE_BROTLI, brotli
+from api.models import Grade, Salarie, Service, Societe
+from api.renderers import OrjsonRenderer, orjson
+from api.views import SalarieViewSet
+
+
+NOMS = ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand']
+PRENOMS = ['Hélène', 'Jérôme', 'Zoé', 'Léa', 'François', 'Chloé', 'Noël', 'Anaïs']
+POSTES = ['Technicien', 'Chargé de clientèle', 'Comptable', 'Développeur', 'Assistante RH']
+SERVICES = ['Support', 'Comptabilité', 'Ressources humaines', 'Télévente', 'Logistique']
+
+
+class Command(BaseCommand):
+    help = ("Compare le rendu JSON (DRF / orjson) et la compression (gzip / brotli) "
+            "d'une page de la liste des salaries, sur un jeu genere puis annule")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salaries', type=int, default=50, help="Taille de la page rendue")
+        parser.add_argument('--repetitions', type=int, default=50)
+
+    def _mesurer(self, fonction, repetitions):
+        durees = []
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            resultat = fonction()
+            durees.append((time.perf_counter() - debut) * 1000)
+        return resultat, statistics.median(durees)
+
+    def _generer(self, nombre):
+        rng = random.Random(42)
+        societe = Societe.objects.create(nom='Benchmark rendu')
+        services = [Service.objects.create(nom=nom, societe=societe) for nom in SERVICES]
+        grade = Grade.objects.create(nom='Agent', societe=societe)
+        Salarie.objects.bulk_create([
+            Salarie(
+                societe=societe, service=rng.choice(services), grade=grade, genre='f',
+                nom=rng.choice(NOMS), prenom=rng.choice(PRENOMS), matricule=f'REN{i:06d}',
+                poste=rng.choice(POSTES), mail_professionnel=f'salarie{i}@exemple.fr',
+            )
+            for i in range(nombre)
+        ])
+        return societe
+
+    def handle(self, *args, **options):
+        repetitions = options['repetitions']
+        with transaction.atomic():
+            societe = self._generer(options['salaries'])
+            vue = SalarieViewSet(action='list', format_kwarg=None)
+            salaries = Salarie.objects.filter(societe=societe).order_by('nom', 'prenom')
+            donnees = vue.get_serializer_class()(salaries, many=True).data
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{len(donnees)} salaries ({vue.get_serializer_class().__name__}), "
+            f"mediane sur {repetitions} rendus"
+        )
+
+        rendus = [('DRF JSONRenderer', JSONRenderer())]
+        if orjson is not None:
+            rendus.append(('OrjsonRenderer', OrjsonRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING("orjson non installe : rendu orjson ignore"))
+
+        self.stdout.write(f"{'rendu':<20}{'temps':>12}{'octets':>12}")
+        contenus = []
+        for nom, renderer in rendus:
+            contenu, duree = self._mesurer(lambda: renderer.render(donnees), repetitions)
+            contenus.append(contenu)
+            self.stdout.write(f"{nom:<20}{f'{duree:.2f} ms':>12}{len(contenu):>12}")
+        if len(set(contenus)) > 1:
+            self.stdout.write(self.style.WARNING("Sorties JSON differentes entre les rendus"))
+
+        compressions = [('gzip -6', lambda: gzip.compress(contenu, compresslevel=6))]
+        if brotli is not None:
+            compressions.append(
+                (f'brotli q{QUALITE_BROTLI}', lambda: brotli.compress(contenu, quality=QUALITE_BROTLI))
+            )
+        else:
+            self.stdout.write(self.style.WARNING("brotli non installe : compression brotli ignoree"))
+
+        self.stdout.write(f"{'compression':<20}{'temps':>12}{'octets':>12}{'ratio':>8}")
+        for nom, compresser in compressions:
+            compresse, duree = self._mesurer(compresser, repetitions)
+            self.stdout.write(
+                f"{nom:<20}{f'{duree:.2f} ms':>12}{len(compresse):>12}"
+                f"{len(compresse) / len(contenu):>8.1%}"
+            )
+        self.stdout.write(self.style.SUCCESS("Jeu de test annule"))
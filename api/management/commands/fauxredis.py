@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.faux_redis import FauxRedis
+
+
+class Command(BaseCommand):
+    help = "Lance un serveur local compatible Redis (cache partage de developpement, donnees en memoire)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hote', default='127.0.0.1', help="Adresse d'ecoute")
+        parser.add_argument('--port', type=int, default=6379, help="Port d'ecoute")
+        parser.add_argument('--mot-de-passe', default=None, help="Mot de passe AUTH (optionnel)")
+
+    def handle(self, *args, **options):
+        serveur = FauxRedis((options['hote'], options['port']), mot_de_passe=options['mot_de_passe'])
+        self.stdout.write(self.style.SUCCESS(f"Serveur en ecoute sur {serveur.url} (Ctrl+C pour arreter)"))
+        try:
+            serveur.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            serveur.server_close()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api.recherche_utils import installer_fts_sqlite, reindexer_salaries
+
+
+class Command(BaseCommand):
+    help = "Recalcule le texte de recherche plein texte des salaries (et l'index FTS5 sous SQLite)"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            nombre = reindexer_salaries()
+            reconstruit = installer_fts_sqlite(connection)
+
+        self.stdout.write(self.style.SUCCESS(f"{nombre} salarie(s) reindexe(s)"))
+        if reconstruit:
+            self.stdout.write(self.style.SUCCESS("Index FTS5 reconstruit"))
@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.inventaire_utils import rapprocher_inventaire
+
+
+class Command(BaseCommand):
+    help = "Rapproche un fichier d'inventaire scanne (CSV numero_serie[;matricule]) avec les equipements"
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Chemin du fichier CSV scanne")
+        parser.add_argument('--service', type=int, help="Restreindre aux equipements d'un service")
+        parser.add_argument('--rapport', help="Ecrit le rapport complet (JSON) dans ce fichier")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['fichier'], 'rb') as fichier:
+                rapport = rapprocher_inventaire(fichier, service_id=options['service'])
+        except OSError as e:
+            raise CommandError(f"Lecture impossible: {e}")
+
+        self.stdout.write(
+            f"Scannes: {rapport['total_scannes']} | Attendus: {rapport['total_attendus']} | "
+            f"Trouves: {rapport['trouves']}"
+        )
+        self.stdout.write(
+            f"Manquants: {len(rapport['manquants'])} | Inattendus: {len(rapport['inattendus'])} | "
+            f"Detenteur different: {len(rapport['detenteur_different'])} | "
+            f"Doublons: {len(rapport['doublons'])}"
+        )
+
+        if options['rapport']:
+            with open(options['rapport'], 'w', encoding='utf-8') as sortie:
+                json.dump(rapport, sortie, ensure_ascii=False, indent=2, default=str)
+            self.stdout.write(self.style.SUCCESS(f"Rapport ecrit dans {options['rapport']}"))
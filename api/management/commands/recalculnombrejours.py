@@ -0,0 +1,31 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from api.jours_ouvres_utils import recalculer_demandes_ouvertes
+
+
+class Command(BaseCommand):
+    help = "Recalcule nombre_jours (jours ouvres) de toutes les demandes de conge ouvertes d'une annee"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--annee',
+            type=int,
+            default=date.today().year,
+            help="Annee de debut des demandes (defaut: annee en cours)",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Affiche le nombre de demandes a corriger sans rien ecrire",
+        )
+
+    def handle(self, *args, **options):
+        resultat = recalculer_demandes_ouvertes(options['annee'], dry_run=options['dry_run'])
+
+        prefixe = "[DRY-RUN] " if resultat['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixe}Annee {resultat['annee']}: {resultat['modifiees']} demande(s) corrigee(s) "
+            f"sur {resultat['total']} demande(s) ouverte(s)"
+        ))
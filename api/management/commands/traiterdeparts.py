@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.depart_utils import salaries_a_traiter, traiter_departs
+
+
+class Command(BaseCommand):
+    help = "Cloture equipements, acces et comptes des salaries sortis (date_sortie depassee ou statut inactif)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help="Date de reference AAAA-MM-JJ (defaut: aujourd'hui)",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Affiche la checklist sans rien ecrire",
+        )
+
+    def handle(self, *args, **options):
+        jour = None
+        if options['date']:
+            try:
+                jour = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("Format de date invalide (attendu: AAAA-MM-JJ)")
+
+        ids = list(salaries_a_traiter(jour).values_list('id', flat=True))
+        resultat = traiter_departs(ids, date_sortie=jour, dry_run=options['dry_run'])
+
+        prefixe = "[DRY-RUN] " if resultat['dry_run'] else ""
+        for s in resultat['salaries']:
+            self.stdout.write(
+                f"{prefixe}{s['matricule']} {s['nom']} (sortie {s['date_sortie']}): "
+                f"{len(s['equipements_retournes'])} equipement(s), "
+                f"{len(s['acces_applicatifs_clos'])} acces applicatif(s), "
+                f"{len(s['acces_locaux_clos'])} acces local(aux), "
+                f"compte {'desactive' if s['compte_desactive'] else 'deja inactif'}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{prefixe}{resultat['total']} salarie(s) traite(s)"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from api.stock_utils import recalculate_all_stock
+
+
+class Command(BaseCommand):
+    help = "Verifie la coherence de stock_disponible des equipements (et corrige avec --corriger)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corriger',
+            action='store_true',
+            help="Corrige les ecarts detectes (sinon simple rapport)",
+        )
+
+    def handle(self, *args, **options):
+        corriger = options['corriger']
+        ecarts = recalculate_all_stock(dry_run=not corriger)
+
+        if not ecarts:
+            self.stdout.write(self.style.SUCCESS("Tous les stocks sont coherents"))
+            return
+
+        for e in ecarts:
+            self.stdout.write(
+                f"  #{e['id']} {e['nom']}: stock_disponible={e['stock_disponible']} "
+                f"stock_affecte={e['stock_affecte']} attendu={e['attendu']} "
+                f"(total={e['stock_total']}, affectes={e['affectes']})"
+            )
+        message = f"{len(ecarts)} equipement(s) en ecart"
+        if corriger:
+            self.stdout.write(self.style.SUCCESS(f"{message} corrige(s)"))
+        else:
+            self.stdout.write(self.style.WARNING(f"{message} (relancer avec --corriger)"))
@@ -0,0 +1,333 @@
+# ============================================================================
+# METRIQUES_UTILS.PY - INSTRUMENTATION DES REQUÊTES (PROMETHEUS)
+# ============================================================================
+# Par requête (InstrumentationMiddleware) : nombre de requêtes SQL, temps
+# base, temps de sérialisation (Serializer.data + rendu JSON, requêtes
+# paresseuses comprises) et latence totale, étiquetés par vue / action.
+#
+# - Agrégats par processus, publiés dans le niveau partagé du cache toutes
+#   les PUBLICATION_SECONDES : /metrics expose une série par worker visible
+#   (étiquette worker="hôte:pid" ; tous avec un cache partagé, le worker
+#   courant seulement avec locmem). Pas de somme entre workers : un worker
+#   qui disparaît ferait baisser le total, lu comme une remise à zéro.
+# - Index des workers : SLOTS_WORKERS emplacements réservés par add()
+#   (atomique), sans lecture-modification-écriture d'une liste partagée
+# - Requêtes lentes : les LENTES_MAX dernières au-delà de SEUIL_LENT_MS,
+#   journalisées dans 'api.lent'
+# - SQL : jamais journalisé requête par requête ; pour une requête HTTP lente
+#   ou trop bavarde, un échantillon (TAUX_ECHANTILLON_SQL) des requêtes SQL
+#   les plus lentes est écrit dans 'api.sql'
+# ============================================================================
+
+import contextvars
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cache_backends import cache_partage
+
+
+logger_lent = logging.getLogger('api.lent')
+logger_sql = logging.getLogger('api.sql')
+
+BUCKETS_LATENCE = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_REQUETES_SQL = (1, 5, 10, 20, 50, 100, 200, 500)
+LENTES_MAX = 100
+SQL_CONSERVEES_MAX = 500
+SQL_JOURNALISEES = 10
+PUBLICATION_SECONDES = 10
+DUREE_VIE_PUBLICATION = PUBLICATION_SECONDES * 30
+SLOTS_WORKERS = 64
+CLE_SLOT = 'metriques:slot:{}'
+
+
+def _reglage(nom, defaut):
+    return getattr(settings, nom, defaut)
+
+
+# ============================================================================
+# MESURE D'UNE REQUÊTE
+# ============================================================================
+
+class MesureRequete:
+    """Compteurs d'une requête HTTP en cours"""
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.requetes = 0
+        self.db = 0.0
+        self.serialisation = 0.0
+        self.sql = []
+        self._profondeur = 0
+        self.vue = 'non_resolue'
+        self.action = ''
+        self.detecteur = None  # DetecteurNPlusUn si NPLUS1_MODE != 'off'
+
+    def executer(self, execute, sql, params, many, context):
+        """execute_wrapper : chronomètre chaque requête SQL"""
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duree = time.perf_counter() - debut
+            self.requetes += 1
+            self.db += duree
+            if len(self.sql) < SQL_CONSERVEES_MAX:
+                self.sql.append((duree, sql))
+            if self.detecteur is not None:
+                self.detecteur.observer(sql)
+
+    @contextmanager
+    def chronometrer_serialisation(self):
+        """Seul le niveau le plus externe compte (serializers imbriqués)"""
+        self._profondeur += 1
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._profondeur -= 1
+            if self._profondeur == 0:
+                self.serialisation += time.perf_counter() - debut
+
+
+mesure_courante = contextvars.ContextVar('mesure_courante', default=None)
+
+
+@contextmanager
+def chronometrer_serialisation():
+    mesure = mesure_courante.get()
+    if mesure is None:
+        yield
+        return
+    with mesure.chronometrer_serialisation():
+        yield
+
+
+def instrumenter_serialisation():
+    """
+    Chronomètre Serializer.data / ListSerializer.data (appelé une fois dans
+    ApiConfig.ready) : DRF n'offre pas de point d'extension global
+    """
+    from rest_framework import serializers
+
+    for classe in (serializers.Serializer, serializers.ListSerializer):
+        propriete = classe.__dict__['data']
+        if getattr(propriete.fget, 'instrumente', False):
+            continue
+
+        def data(self, _fget=propriete.fget):
+            with chronometrer_serialisation():
+                return _fget(self)
+
+        data.instrumente = True
+        classe.data = property(data)
+
+
+# ============================================================================
+# AGRÉGATS DU PROCESSUS
+# ============================================================================
+
+class _Histogramme:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.comptes = [0] * len(buckets)
+        self.somme = 0.0
+        self.nombre = 0
+
+    def observer(self, valeur):
+        for i, borne in enumerate(self.buckets):
+            if valeur <= borne:
+                self.comptes[i] += 1
+        self.somme += valeur
+        self.nombre += 1
+
+    def exporter(self):
+        return {'comptes': list(self.comptes), 'somme': self.somme, 'nombre': self.nombre}
+
+
+class Metriques:
+    """Compteurs / histogrammes par (vue, action, méthode) et requêtes lentes"""
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self.requetes = Counter()        # (vue, action, methode, statut) -> nombre
+        self.latence = {}                # (vue, action, methode) -> _Histogramme
+        self.requetes_sql = {}           # (vue, action, methode) -> _Histogramme
+        self.db = Counter()              # (vue, action, methode) -> secondes
+        self.serialisation = Counter()   # (vue, action, methode) -> secondes
+        self.lentes = deque(maxlen=LENTES_MAX)
+        self._publie_le = 0.0
+        self._slot = None
+
+    def enregistrer(self, mesure, methode, statut, duree):
+        cle = (mesure.vue, mesure.action, methode)
+        with self._verrou:
+            self.requetes[cle + (str(statut),)] += 1
+            self.latence.setdefault(cle, _Histogramme(BUCKETS_LATENCE)).observer(duree)
+            self.requetes_sql.setdefault(cle, _Histogramme(BUCKETS_REQUETES_SQL)).observer(mesure.requetes)
+            self.db[cle] += mesure.db
+            self.serialisation[cle] += mesure.serialisation
+
+    def ajouter_lente(self, entree):
+        with self._verrou:
+            self.lentes.append(entree)
+
+    def requetes_lentes(self):
+        with self._verrou:
+            return list(reversed(self.lentes))
+
+    def instantane(self):
+        with self._verrou:
+            return {
+                'requetes': dict(self.requetes),
+                'latence': {cle: h.exporter() for cle, h in self.latence.items()},
+                'requetes_sql': {cle: h.exporter() for cle, h in self.requetes_sql.items()},
+                'db': dict(self.db),
+                'serialisation': dict(self.serialisation),
+            }
+
+    def publier(self, force=False):
+        """Publie l'instantané du worker dans le cache (au plus toutes les PUBLICATION_SECONDES)"""
+        maintenant = time.monotonic()
+        if not force and maintenant - self._publie_le < PUBLICATION_SECONDES:
+            return
+        self._publie_le = maintenant
+        cache = cache_partage()
+        cle = cle_worker()
+        cache.set(cle, self.instantane(), DUREE_VIE_PUBLICATION)
+        # Emplacement dans l'index : repris par un autre worker après expiration -> nouvel emplacement
+        if self._slot is not None and cache.get(CLE_SLOT.format(self._slot)) == cle:
+            cache.touch(CLE_SLOT.format(self._slot), DUREE_VIE_PUBLICATION)
+            return
+        self._slot = next(
+            (n for n in range(SLOTS_WORKERS) if cache.add(CLE_SLOT.format(n), cle, DUREE_VIE_PUBLICATION)),
+            None,
+        )
+
+
+def cle_worker():
+    """Clé de l'instantané du worker (hôte:pid : plusieurs hôtes partagent le cache)"""
+    return f'metriques:{socket.gethostname()}:{os.getpid()}'
+
+
+metriques = Metriques()
+
+
+# ============================================================================
+# FIN DE REQUÊTE : LENTES / ÉCHANTILLON SQL
+# ============================================================================
+
+def terminer_mesure(mesure, request, statut):
+    duree = time.perf_counter() - mesure.debut
+    metriques.enregistrer(mesure, request.method, statut, duree)
+
+    ms = duree * 1000
+    lente = ms >= _reglage('METRIQUES_SEUIL_LENT_MS', 500)
+    bavarde = mesure.requetes >= _reglage('METRIQUES_SEUIL_REQUETES_SQL', 50)
+    if lente:
+        entree = {
+            'date': timezone.now().isoformat(timespec='seconds'),
+            'methode': request.method,
+            'chemin': request.get_full_path()[:300],
+            'vue': mesure.vue,
+            'action': mesure.action,
+            'statut': statut,
+            'ms': round(ms, 1),
+            'requetes_sql': mesure.requetes,
+            'db_ms': round(mesure.db * 1000, 1),
+            'serialisation_ms': round(mesure.serialisation * 1000, 1),
+        }
+        metriques.ajouter_lente(entree)
+        logger_lent.warning(
+            '%(methode)s %(chemin)s %(statut)s %(ms)sms sql=%(requetes_sql)s '
+            'db=%(db_ms)sms serialisation=%(serialisation_ms)sms', entree,
+        )
+    if (lente or bavarde) and random.random() < _reglage('METRIQUES_TAUX_ECHANTILLON_SQL', 0.1):
+        journaliser_sql(mesure, request, ms)
+    metriques.publier()
+
+
+def journaliser_sql(mesure, request, ms):
+    """Les SQL_JOURNALISEES requêtes les plus lentes + les requêtes répétées (N+1)"""
+    repetees = Counter(sql for _, sql in mesure.sql)
+    lignes = [
+        f'{request.method} {request.path} {ms:.0f}ms : {mesure.requetes} requetes SQL, '
+        f'{mesure.db * 1000:.0f}ms en base'
+    ]
+    for duree, sql in sorted(mesure.sql, key=lambda r: r[0], reverse=True)[:SQL_JOURNALISEES]:
+        lignes.append(f'  {duree * 1000:7.1f}ms x{repetees[sql]} {sql[:500]}')
+    logger_sql.info('\n'.join(lignes))
+
+
+# ============================================================================
+# EXPORT PROMETHEUS
+# ============================================================================
+
+def instantanes_workers():
+    """
+    {worker: instantané} : le worker courant (valeurs vives) + ceux publiés
+    par les autres workers encore présents dans l'index
+    """
+    cache = cache_partage()
+    propre = cle_worker()
+    cles = set(cache.get_many([CLE_SLOT.format(n) for n in range(SLOTS_WORKERS)]).values()) - {propre}
+    instantanes = {propre: metriques.instantane(), **cache.get_many(sorted(cles))}
+    return {cle.split(':', 1)[1]: instantane for cle, instantane in instantanes.items()}
+
+
+def _etiquettes(vue, action, methode, **autres):
+    valeurs = {'vue': vue, 'action': action, 'methode': methode, **autres}
+    return ','.join(
+        '{}="{}"'.format(nom, str(valeur).replace('\\', '\\\\').replace('"', '\\"'))
+        for nom, valeur in valeurs.items()
+    )
+
+
+def _histogramme(lignes, nom, buckets, valeurs, worker):
+    for cle, h in sorted(valeurs.items()):
+        for borne, compte in zip(buckets, h['comptes']):
+            lignes.append(f'{nom}_bucket{{{_etiquettes(*cle, le=borne, worker=worker)}}} {compte}')
+        lignes.append(f'{nom}_bucket{{{_etiquettes(*cle, le="+Inf", worker=worker)}}} {h["nombre"]}')
+        lignes.append(f'{nom}_sum{{{_etiquettes(*cle, worker=worker)}}} {h["somme"]:.6f}')
+        lignes.append(f'{nom}_count{{{_etiquettes(*cle, worker=worker)}}} {h["nombre"]}')
+
+
+def exporter_prometheus():
+    """Format texte d'exposition Prometheus (version 0.0.4), une série par worker"""
+    workers = sorted(instantanes_workers().items())
+    lignes = [
+        '# HELP msi_http_requests_total Requetes HTTP traitees',
+        '# TYPE msi_http_requests_total counter',
+    ]
+    for worker, instantane in workers:
+        for (vue, action, methode, statut), nombre in sorted(instantane['requetes'].items()):
+            lignes.append(
+                f'msi_http_requests_total{{{_etiquettes(vue, action, methode, statut=statut, worker=worker)}}} {nombre}'
+            )
+
+    for nom, cle, buckets, aide in (
+        ('msi_http_request_duration_seconds', 'latence', BUCKETS_LATENCE, 'Latence totale des requetes HTTP'),
+        ('msi_db_queries_per_request', 'requetes_sql', BUCKETS_REQUETES_SQL, 'Requetes SQL par requete HTTP'),
+    ):
+        lignes += [f'# HELP {nom} {aide}', f'# TYPE {nom} histogram']
+        for worker, instantane in workers:
+            _histogramme(lignes, nom, buckets, instantane[cle], worker)
+
+    for nom, cle, aide in (
+        ('msi_db_duration_seconds_total', 'db', 'Temps passe en base'),
+        ('msi_serialization_duration_seconds_total', 'serialisation',
+         'Temps de serialisation et de rendu (requetes paresseuses comprises)'),
+    ):
+        lignes += [f'# HELP {nom} {aide}', f'# TYPE {nom} counter']
+        for worker, instantane in workers:
+            for etiquettes, secondes in sorted(instantane[cle].items()):
+                lignes.append(f'{nom}{{{_etiquettes(*etiquettes, worker=worker)}}} {secondes:.6f}')
+    return '\n'.join(lignes) + '\n'
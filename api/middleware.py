@@ -0,0 +1,115 @@
+# ============================================================================
+# MIDDLEWARE.PY - MIDDLEWARES DE L'API
+# ============================================================================
+
+import re
+from contextlib import ExitStack
+
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from .metriques_utils import MesureRequete, mesure_courante, terminer_mesure
+from .nplus1_utils import creer_detecteur, verifier_nplus1
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    brotli = None
+
+
+# ============================================================================
+# INSTRUMENTATION (REQUÊTES SQL, TEMPS BASE / SÉRIALISATION, LATENCE)
+# ============================================================================
+
+class InstrumentationMiddleware:
+    """
+    Mesure chaque requête HTTP (voir metriques_utils) ; à placer en tête de
+    MIDDLEWARE pour que la latence couvre toute la chaîne
+    Détection des N+1 selon NPLUS1_MODE (voir nplus1_utils)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mesure = MesureRequete()
+        mesure.detecteur = creer_detecteur()
+        jeton = mesure_courante.set(mesure)
+        try:
+            with ExitStack() as pile:
+                for connection in connections.all():
+                    pile.enter_context(connection.execute_wrapper(mesure.executer))
+                response = self.get_response(request)
+        finally:
+            mesure_courante.reset(jeton)
+        terminer_mesure(mesure, request, response.status_code)
+        verifier_nplus1(mesure.detecteur, f'{request.method} {request.get_full_path()} ({mesure.vue}.{mesure.action})')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Étiquettes : classe du viewset (ou nom de la vue) et action DRF"""
+        mesure = mesure_courante.get()
+        if mesure is None:
+            return None
+        classe = getattr(view_func, 'cls', None)
+        mesure.vue = classe.__name__ if classe else getattr(view_func, '__name__', 'vue')
+        actions = getattr(view_func, 'actions', None) or {}
+        mesure.action = actions.get(request.method.lower(), '')
+        return None
+
+
+# ============================================================================
+# COMPRESSION DES RÉPONSES (BROTLI / GZIP)
+# ============================================================================
+
+TAILLE_MIN_COMPRESSION = 1024
+QUALITE_BROTLI = 5  # 4-6 : bon compromis taille / CPU pour du JSON dynamique
+
+_ENCODAGE = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+
+def encodages_acceptes(accept_encoding):
+    """{encodage: q} depuis l'en-tête Accept-Encoding (q=0 : refusé)"""
+    acceptes = {}
+    for morceau in accept_encoding.lower().split(','):
+        correspondance = _ENCODAGE.fullmatch(morceau)
+        if correspondance:
+            try:
+                acceptes[correspondance.group(1)] = float(correspondance.group(2) or 1)
+            except ValueError:
+                continue
+    return acceptes
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresse les réponses d'au moins TAILLE_MIN_COMPRESSION octets
+    - brotli si le client l'accepte et que le module est installé
+    - gzip sinon (GZipMiddleware de Django, réponses en flux comprises)
+    Les réponses déjà encodées ou trop petites sont laissées telles quelles
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or response.streaming:
+            return super().process_response(request, response)
+        if len(response.content) < TAILLE_MIN_COMPRESSION:
+            return response
+
+        acceptes = encodages_acceptes(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is None or acceptes.get('br', 0) <= 0:
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compresse = brotli.compress(response.content, quality=QUALITE_BROTLI)
+        if len(compresse) >= len(response.content):
+            return response
+
+        response.content = compresse
+        response['Content-Length'] = str(len(compresse))
+        # Corps différent : l'ETag fort devient faible (comme GZipMiddleware)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'br'
+        return response
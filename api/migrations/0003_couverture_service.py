@@ -0,0 +1,22 @@
+# Generated by Django 4.2.11 on 2026-10-19 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_mouvementconge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='effectif_minimum',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='demandeconge',
+            index=models.Index(fields=['date_fin', 'date_debut'], name='demandeconge_intervalle_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-19 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_couverture_service'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creneautravail',
+            name='jours_semaine',
+            field=models.CharField(default='12345', max_length=7),
+        ),
+    ]
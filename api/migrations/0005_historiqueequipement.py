@@ -0,0 +1,58 @@
+# Generated by Django 4.2.11 on 2026-10-19 11:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def initialiser_historique(apps, schema_editor):
+    """Un événement d'affectation (et de retrait) par instance existante"""
+    EquipementInstance = apps.get_model('api', 'EquipementInstance')
+    HistoriqueEquipement = apps.get_model('api', 'HistoriqueEquipement')
+    evenements = []
+    for instance in EquipementInstance.objects.order_by('id').iterator():
+        valeurs = {
+            'instance_id': instance.id,
+            'equipement_id': instance.equipement_id,
+            'numero_serie': instance.numero_serie,
+            'salarie_id': instance.salarie_id,
+            'etat': instance.etat,
+        }
+        evenements.append(HistoriqueEquipement(
+            type_evenement='affectation', date_effet=instance.date_affectation, **valeurs
+        ))
+        if instance.date_retrait:
+            evenements.append(HistoriqueEquipement(
+                type_evenement='retrait', date_effet=instance.date_retrait, **valeurs
+            ))
+    HistoriqueEquipement.objects.bulk_create(evenements, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_creneautravail_jours_semaine'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoriqueEquipement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero_serie', models.CharField(blank=True, max_length=255, null=True)),
+                ('type_evenement', models.CharField(choices=[('affectation', 'Affectation'), ('reaffectation', 'Réaffectation'), ('retrait', 'Retrait'), ('changement_etat', "Changement d'état"), ('suppression', 'Suppression')], max_length=20)),
+                ('etat', models.CharField(choices=[('neuf', 'Neuf'), ('bon', 'Bon état'), ('usure', 'Usure légère'), ('defaut', 'Défaut'), ('hors_service', 'Hors service')], max_length=50)),
+                ('date_effet', models.DateField()),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('equipement', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historique', to='api.equipement')),
+                ('instance', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='historique', to='api.equipementinstance')),
+                ('salarie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historique_equipements', to='api.salarie')),
+            ],
+            options={
+                'verbose_name': "Historique d'équipement",
+                'verbose_name_plural': 'Historique des équipements',
+                'ordering': ['-date_effet', '-id'],
+                'indexes': [models.Index(fields=['numero_serie', 'date_effet'], name='histoequip_serie_date_idx'), models.Index(fields=['salarie', 'date_effet'], name='histoequip_salarie_date_idx'), models.Index(fields=['instance', 'date_effet'], name='histoequip_instance_date_idx')],
+            },
+        ),
+        migrations.RunPython(initialiser_historique, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 4.2.11 on 2026-10-19 11:17
+
+import re
+import unicodedata
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+
+# Copies figées de recherche_utils (la migration ne doit pas suivre le code courant)
+CONFIG_RECHERCHE = 'simple'
+INDEX_RECHERCHE_PG = 'api_salarie_recherche_gin'
+TABLE_FTS = 'api_salarie_fts'
+
+
+def normaliser_texte(texte):
+    texte = unicodedata.normalize('NFKD', str(texte or ''))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', texte))
+
+
+def composer_texte(valeurs, departements=()):
+    morceaux = [
+        valeurs.get('nom'), valeurs.get('prenom'), valeurs.get('matricule'),
+        valeurs.get('mail_professionnel'), valeurs.get('poste'),
+        valeurs.get('extension_3cx'), valeurs.get('service_nom'),
+    ]
+    for numero, nom in departements:
+        morceaux += [numero, nom]
+    return normaliser_texte(' '.join(str(m) for m in morceaux if m))
+
+
+def installer_fts_sqlite(schema_editor, table):
+    """Table FTS5 + triggers de synchronisation, remplie depuis `table`"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE_FTS} USING fts5("
+        f"texte_recherche, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE_FTS}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {TABLE_FTS}(rowid, texte_recherche) VALUES (new.id, new.texte_recherche); END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE_FTS}_au AFTER UPDATE OF texte_recherche ON {table} BEGIN "
+        f"UPDATE {TABLE_FTS} SET texte_recherche = new.texte_recherche WHERE rowid = old.id; END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE_FTS}_ad AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM {TABLE_FTS} WHERE rowid = old.id; END"
+    )
+    schema_editor.execute(f"DELETE FROM {TABLE_FTS}")
+    schema_editor.execute(
+        f"INSERT INTO {TABLE_FTS}(rowid, texte_recherche) SELECT id, texte_recherche FROM {table}"
+    )
+
+
+def _index_pg():
+    return GinIndex(
+        SearchVector('texte_recherche', config=CONFIG_RECHERCHE), name=INDEX_RECHERCHE_PG,
+    )
+
+
+def initialiser_recherche(apps, schema_editor):
+    """Calcule texte_recherche des salariés existants puis crée l'index du moteur"""
+    Salarie = apps.get_model('api', 'Salarie')
+    departements = {}
+    for salarie_id, numero, nom in Salarie.departements.through.objects.values_list(
+        'salarie_id', 'departement__numero', 'departement__nom'
+    ):
+        departements.setdefault(salarie_id, []).append((numero, nom))
+
+    salaries = []
+    for valeurs in Salarie.objects.order_by('id').values(
+        'id', 'nom', 'prenom', 'matricule', 'mail_professionnel', 'poste',
+        'extension_3cx', service_nom=models.F('service__nom'),
+    ).iterator():
+        salaries.append(Salarie(
+            id=valeurs['id'],
+            texte_recherche=composer_texte(valeurs, sorted(departements.get(valeurs['id'], ()))),
+        ))
+    Salarie.objects.bulk_update(salaries, ['texte_recherche'], batch_size=1000)
+
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(Salarie, _index_pg())
+    installer_fts_sqlite(schema_editor, Salarie._meta.db_table)
+
+
+def supprimer_recherche(apps, schema_editor):
+    Salarie = apps.get_model('api', 'Salarie')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(Salarie, _index_pg())
+    elif schema_editor.connection.vendor == 'sqlite':
+        for suffixe in ('ai', 'au', 'ad'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {TABLE_FTS}_{suffixe}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE_FTS}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_historiqueequipement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salarie',
+            name='texte_recherche',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(initialiser_recherche, supprimer_recherche),
+    ]
@@ -0,0 +1,41 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# (table, expression indexée) : même forme que les lookups utilisés par
+# autocomplete_utils (contains sur texte_recherche, icontains -> UPPER(x::text))
+INDEX_TRIGRAMMES = [
+    ('api_salarie_texte_trgm', 'api_salarie', 'texte_recherche'),
+    ('api_service_nom_trgm', 'api_service', '(UPPER(nom::text))'),
+    ('api_grade_nom_trgm', 'api_grade', '(UPPER(nom::text))'),
+    ('api_departement_nom_trgm', 'api_departement', '(UPPER(nom::text))'),
+    ('api_equipement_nom_trgm', 'api_equipement', '(UPPER(nom::text))'),
+]
+
+
+def creer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nom, table, expression in INDEX_TRIGRAMMES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nom} ON {table} USING gin ({expression} gin_trgm_ops)'
+        )
+
+
+def supprimer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nom, _, _ in INDEX_TRIGRAMMES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nom}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_salarie_texte_recherche'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(creer_index, supprimer_index),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 4.2.11 on 2026-10-19 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_index_trigrammes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ameliorationproposee',
+            index=models.Index(fields=['statut', '-priorite', '-date_proposition'], name='amelioration_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='demandeacompte',
+            index=models.Index(fields=['-date_demande'], name='acompte_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='demandeacompte',
+            index=models.Index(fields=['salarie', '-date_demande'], name='acompte_salarie_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='demandeacompte',
+            index=models.Index(fields=['statut', '-date_demande'], name='acompte_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='demandeconge',
+            index=models.Index(fields=['statut', 'date_debut'], name='demandeconge_statut_debut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='demandeconge',
+            index=models.Index(fields=['-date_creation'], name='demandeconge_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='demandeconge',
+            index=models.Index(fields=['salarie', '-date_creation'], name='demandeconge_salarie_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='demandeconge',
+            index=models.Index(fields=['statut', '-date_creation'], name='demandeconge_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='demandeconge',
+            index=models.Index(fields=['type_conge', '-date_creation'], name='demandeconge_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='demandesortie',
+            index=models.Index(fields=['-date_sortie'], name='sortie_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='demandesortie',
+            index=models.Index(fields=['salarie', '-date_sortie'], name='sortie_salarie_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='demandesortie',
+            index=models.Index(fields=['statut', '-date_sortie'], name='sortie_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentsalarie',
+            index=models.Index(fields=['-date_upload'], name='document_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentsalarie',
+            index=models.Index(fields=['salarie', '-date_upload'], name='document_salarie_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentsalarie',
+            index=models.Index(fields=['type_document', '-date_upload'], name='document_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipementinstance',
+            index=models.Index(fields=['-date_affectation'], name='equipinst_affectation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipementinstance',
+            index=models.Index(fields=['etat', '-date_affectation'], name='equipinst_etat_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipementinstance',
+            index=models.Index(condition=models.Q(('date_retrait__isnull', True)), fields=['salarie'], name='equipinst_ouvert_salarie_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipementinstance',
+            index=models.Index(condition=models.Q(('date_retrait__isnull', True)), fields=['equipement'], name='equipinst_ouvert_equip_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historiquesalarie',
+            index=models.Index(fields=['salarie', '-date_changement'], name='histosal_salarie_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='horairesalarie',
+            index=models.Index(fields=['salarie', '-date_debut'], name='horaire_salarie_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='importlog',
+            index=models.Index(fields=['api_name', '-date_creation'], name='importlog_api_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='importlog',
+            index=models.Index(fields=['statut', '-date_creation'], name='importlog_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salarie',
+            index=models.Index(fields=['nom', 'prenom'], name='salarie_nom_prenom_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salarie',
+            index=models.Index(fields=['statut', 'nom', 'prenom'], name='salarie_statut_nom_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salarie',
+            index=models.Index(fields=['service', 'nom', 'prenom'], name='salarie_service_nom_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salarie',
+            index=models.Index(condition=models.Q(('date_sortie__isnull', False)), fields=['date_sortie'], name='salarie_sortie_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travauxexceptionnels',
+            index=models.Index(fields=['-date_travail'], name='travaux_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travauxexceptionnels',
+            index=models.Index(fields=['salarie', '-date_travail'], name='travaux_salarie_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travauxexceptionnels',
+            index=models.Index(fields=['statut', '-date_travail'], name='travaux_statut_date_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_index_filtres_viewsets'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='demandeacompte',
+            name='salarie',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='demandes_acompte', to='api.salarie'),
+        ),
+        migrations.AlterField(
+            model_name='demandeconge',
+            name='salarie',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='demandes_conge', to='api.salarie'),
+        ),
+        migrations.AlterField(
+            model_name='demandesortie',
+            name='salarie',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='demandes_sortie', to='api.salarie'),
+        ),
+        migrations.AlterField(
+            model_name='documentsalarie',
+            name='salarie',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='api.salarie'),
+        ),
+        migrations.AlterField(
+            model_name='historiqueequipement',
+            name='instance',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='historique', to='api.equipementinstance'),
+        ),
+        migrations.AlterField(
+            model_name='historiqueequipement',
+            name='salarie',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historique_equipements', to='api.salarie'),
+        ),
+        migrations.AlterField(
+            model_name='historiquesalarie',
+            name='salarie',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='historique', to='api.salarie'),
+        ),
+        migrations.AlterField(
+            model_name='horairesalarie',
+            name='salarie',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='horaires_supplementaires', to='api.salarie'),
+        ),
+        migrations.AlterField(
+            model_name='salarie',
+            name='service',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='salaries', to='api.service'),
+        ),
+        migrations.AlterField(
+            model_name='travauxexceptionnels',
+            name='salarie',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='travaux_exceptionnels', to='api.salarie'),
+        ),
+    ]
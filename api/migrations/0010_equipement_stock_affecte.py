@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-19 14:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def compter_affectes(apps, schema_editor):
+    """stock_affecte initial = instances non retirées (stock_disponible réaligné au passage)"""
+    Equipement = apps.get_model('api', 'Equipement')
+    EquipementInstance = apps.get_model('api', 'EquipementInstance')
+    affectes = (
+        EquipementInstance.objects
+        .filter(equipement=OuterRef('pk'), date_retrait__isnull=True)
+        .order_by().values('equipement')
+        .annotate(n=Count('pk')).values('n')
+    )
+    Equipement.objects.update(stock_affecte=Coalesce(Subquery(affectes), Value(0)))
+    Equipement.objects.update(
+        stock_disponible=Greatest(Value(0), models.F('stock_total') - models.F('stock_affecte'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_index_fk_redondants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipement',
+            name='stock_affecte',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(compter_affectes, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,9 @@
-from django.db import models
+import threading
+from contextlib import contextmanager
+
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from datetime import datetime, date, timedelta
@@ -80,6 +85,9 @@ class Service(models.Model):
         related_name='sousservices'
     )
     
+    # Nombre minimum de salariés présents (contrôle des congés, vide = pas de contrôle)
+    effectif_minimum = models.PositiveIntegerField(null=True, blank=True)
+    
     actif = models.BooleanField(default=True)
     date_creation = models.DateTimeField(auto_now_add=True)
 
@@ -143,6 +151,8 @@ class CreneauTravail(models.Model):
     heure_fin = models.TimeField()
     heure_pause_debut = models.TimeField(null=True, blank=True)
     heure_pause_fin = models.TimeField(null=True, blank=True)
+    # Jours travaillés (ISO : 1 = lundi ... 7 = dimanche), ex: '12345'
+    jours_semaine = models.CharField(max_length=7, default='12345')
     description = models.TextField(null=True, blank=True)
     actif = models.BooleanField(default=True)
     date_creation = models.DateTimeField(auto_now_add=True, null=True)
@@ -280,6 +290,8 @@ class Equipement(models.Model):
     description = models.TextField(null=True, blank=True)
     stock_total = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     stock_disponible = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    # Instances affectées (date_retrait nulle) : compteur exact maintenu par ajuster_stocks
+    stock_affecte = models.IntegerField(default=0, editable=False)
     actif = models.BooleanField(default=True)
     date_creation = models.DateTimeField(auto_now_add=True)
 
@@ -290,25 +302,174 @@ class Equipement(models.Model):
     def __str__(self):
         return f"{self.nom} ({self.type_equipement})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stock_total_initial = instance.__dict__.get('stock_total')
+        return instance
+
     def recalculer_stock(self):
         """Recalcule stock_disponible = stock_total - instances affectées"""
         affected_count = EquipementInstance.objects.filter(
             equipement=self,
             date_retrait__isnull=True
         ).count()
+        self.stock_affecte = affected_count
         self.stock_disponible = max(0, self.stock_total - affected_count)
 
+    @classmethod
+    def ajuster_stocks(cls, deltas):
+        """
+        Applique des variations du nombre d'instances affectées par F()
+        deltas: {equipement_id: +n (affectations) / -n (retraits)}
+        Un UPDATE par valeur de delta ; stock_affecte n'est jamais écrêté,
+        stock_disponible en est déduit (borné à 0 comme recalculer_stock())
+        """
+        par_delta = {}
+        for equipement_id, delta in deltas.items():
+            if delta and equipement_id is not None:
+                par_delta.setdefault(delta, []).append(equipement_id)
+        for delta, equipement_ids in par_delta.items():
+            cls.objects.filter(pk__in=equipement_ids).update(
+                # stock_disponible d'abord : MySQL évalue les SET de gauche à droite
+                stock_disponible=Greatest(Value(0), F('stock_total') - F('stock_affecte') - delta),
+                stock_affecte=F('stock_affecte') + delta,
+            )
+
     def save(self, *args, **kwargs):
-        """Recalcule automatiquement le stock avant sauvegarde"""
-        self.recalculer_stock()
+        """
+        Recompte le stock seulement à la création ou si stock_total change
+        Sinon stock_disponible / stock_affecte (maintenus par ajuster_stocks) ne sont pas réécrits
+        """
+        if self._state.adding or self.stock_total != getattr(self, '_stock_total_initial', None):
+            self.recalculer_stock()
+        elif kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in ('stock_disponible', 'stock_affecte')
+            ]
         super().save(*args, **kwargs)
+        self._stock_total_initial = self.stock_total
+
+
+# ============================================================================
+# SUIVI DES MODIFICATIONS
+# ============================================================================
+
+class SuiviModificationsMixin:
+    """
+    Mémorise les valeurs chargées depuis la base pour savoir quels champs
+    ont réellement changé (utilisé par les signaux post_save)
+
+    - CHAMPS_SUIVIS: noms des champs suivis (None = tous les champs concrets)
+    - champs_modifies() -> {champ: (ancienne valeur, nouvelle valeur)}
+    - a_change('service', 'grade') -> True si l'un d'eux a changé
+    Les valeurs de référence sont mises à jour après chaque save()
+    """
+    CHAMPS_SUIVIS = None
+
+    @classmethod
+    def _attnames_suivis(cls):
+        champs = cls._meta.concrete_fields
+        if cls.CHAMPS_SUIVIS is not None:
+            champs = [f for f in champs if f.name in cls.CHAMPS_SUIVIS]
+        return [f.attname for f in champs]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._memoriser_valeurs()
+        return instance
+
+    def _memoriser_valeurs(self):
+        """Champs différés exclus : ils ne sont pas comparés"""
+        self._valeurs_initiales = {
+            attname: self.__dict__[attname]
+            for attname in self._attnames_suivis()
+            if attname in self.__dict__
+        }
+
+    def champs_modifies(self):
+        """
+        {champ: (ancienne, nouvelle)} depuis le chargement ou la dernière sauvegarde
+        Instance jamais chargée ni sauvegardée : tous les champs sont considérés modifiés
+        """
+        initiales = getattr(self, '_valeurs_initiales', None)
+        if initiales is None:
+            return {attname: (None, self.__dict__.get(attname)) for attname in self._attnames_suivis()}
+        return {
+            attname: (ancienne, self.__dict__.get(attname))
+            for attname, ancienne in initiales.items()
+            if self.__dict__.get(attname) != ancienne
+        }
+
+    def a_change(self, *champs):
+        """True si l'un des champs (name ou attname) a changé"""
+        modifies = self.champs_modifies()
+        return any(
+            champ in modifies or f'{champ}_id' in modifies
+            for champ in champs
+        )
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Les post_save ont vu les changements : nouvelle référence
+        self._memoriser_valeurs()
 
 
 # ============================================================================
 # MODELES SALARIÉS
 # ============================================================================
 
-class Salarie(models.Model):
+class SalarieQuerySet(models.QuerySet):
+    """
+    update() historise les changements de service et de grade
+    (bulk_update() passe aussi par update() avec des expressions Case/When)
+    """
+
+    def _touche_historique(self, champs):
+        return any(
+            champ in HistoriqueSalarie.CHAMPS_HISTORISES or f'{champ}_id' in HistoriqueSalarie.CHAMPS_HISTORISES
+            for champ in champs
+        )
+
+    def update(self, **kwargs):
+        if not self._touche_historique(kwargs):
+            return super().update(**kwargs)
+        champs = ('id',) + HistoriqueSalarie.CHAMPS_HISTORISES
+        with transaction.atomic(using=self.db):
+            avant = {ligne['id']: ligne for ligne in self.order_by().values(*champs)}
+            nombre = super().update(**kwargs)
+            # Relecture : les valeurs peuvent être des expressions (F, Case...)
+            apres = Salarie.objects.using(self.db).filter(id__in=list(avant)).order_by().values(*champs)
+            HistoriqueSalarie.enregistrer_changements(
+                [(ligne['id'], avant[ligne['id']], ligne) for ligne in apres],
+                motif='Mise à jour en masse',
+            )
+        return nombre
+
+    update.alters_data = True
+
+    def visibles_par(self, user):
+        """Salariés visibles selon le rôle de l'utilisateur"""
+        # Admin, RH et comptable voient tout
+        if user.is_staff or user.has_perm('api.view_all_salaries'):
+            return self.all()
+
+        # Team leaders voient leur équipe
+        if user.has_perm('api.view_team_salaries'):
+            if hasattr(user, 'profil_salarie'):
+                return self.filter(service=user.profil_salarie.service)
+
+        # User normal voit sa fiche
+        if user.has_perm('api.view_own_salary'):
+            if hasattr(user, 'profil_salarie'):
+                return self.filter(id=user.profil_salarie.id)
+
+        return self.none()
+
+
+class Salarie(SuiviModificationsMixin, models.Model):
     """Représente un salarié"""
     STATUT_CHOICES = [
         ('actif', 'Actif'),
@@ -339,7 +500,8 @@ class Salarie(models.Model):
 
     # Infos professionnelles
     societe = models.ForeignKey(Societe, on_delete=models.CASCADE, related_name='salaries')
-    service = models.ForeignKey(Service, on_delete=models.SET_NULL, null=True, blank=True, related_name='salaries')
+    # Index : salarie_service_nom_idx (service en tête)
+    service = models.ForeignKey(Service, on_delete=models.SET_NULL, null=True, blank=True, related_name='salaries', db_index=False)
     grade = models.ForeignKey(Grade, on_delete=models.SET_NULL, null=True, blank=True, related_name='salaries')
     responsable_direct = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='subordonnes')
     poste = models.CharField(max_length=255, null=True, blank=True)
@@ -356,13 +518,40 @@ class Salarie(models.Model):
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
 
+    # Texte normalisé pour la recherche plein texte (voir recherche_utils.py)
+    texte_recherche = models.TextField(blank=True, default='', editable=False)
+
+    objects = SalarieQuerySet.as_manager()
+
     class Meta:
         ordering = ['nom', 'prenom']
         unique_together = ['societe', 'matricule']
+        indexes = [
+            # Liste par défaut et filtres statut / service triés par nom
+            models.Index(fields=['nom', 'prenom'], name='salarie_nom_prenom_idx'),
+            models.Index(fields=['statut', 'nom', 'prenom'], name='salarie_statut_nom_idx'),
+            models.Index(fields=['service', 'nom', 'prenom'], name='salarie_service_nom_idx'),
+            # Départs à traiter (date_sortie renseignée sur une minorité de fiches)
+            models.Index(fields=['date_sortie'], name='salarie_sortie_idx',
+                         condition=models.Q(date_sortie__isnull=False)),
+        ]
 
     def __str__(self):
         return f"{self.prenom} {self.nom} ({self.matricule})"
 
+    def save(self, *args, **kwargs):
+        """
+        texte_recherche n'est écrit que par l'indexation (recherche_utils) :
+        une instance chargée avant une réindexation ne réécrit pas l'ancien texte
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            differes = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'texte_recherche' and f.attname not in differes
+            ]
+        super().save(*args, **kwargs)
+
     def get_anciennete(self):
         """Retourne ancienneté au format '5 ans, 3 mois'"""
         if not self.date_embauche:
@@ -394,8 +583,16 @@ class Salarie(models.Model):
 
 
 class HistoriqueSalarie(models.Model):
-    """Historique des évolutions professionnelles du salarié"""
-    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='historique')
+    """
+    Historique des évolutions professionnelles du salarié
+    Alimenté automatiquement quand service ou grade change (save, update(),
+    bulk_update, imports) ; peut aussi être saisi manuellement
+    """
+    # Champs de Salarie historisés automatiquement (attnames)
+    CHAMPS_HISTORISES = ('service_id', 'grade_id')
+
+    # Index : histosal_salarie_date_idx (salarie en tête)
+    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='historique', db_index=False)
     service_ancien = models.ForeignKey(Service, on_delete=models.SET_NULL, null=True, blank=True, related_name='historique_ancien')
     service_nouveau = models.ForeignKey(Service, on_delete=models.SET_NULL, null=True, blank=True, related_name='historique_nouveau')
     grade_ancien = models.ForeignKey(Grade, on_delete=models.SET_NULL, null=True, blank=True, related_name='historique_ancien')
@@ -406,14 +603,67 @@ class HistoriqueSalarie(models.Model):
 
     class Meta:
         ordering = ['-date_changement']
+        indexes = [
+            models.Index(fields=['salarie', '-date_changement'], name='histosal_salarie_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.salarie} - {self.date_changement}"
 
+    @classmethod
+    @contextmanager
+    def collecte(cls):
+        """
+        Regroupe les lignes d'historique créées dans le bloc en un seul bulk_create
+        (imports : un post_save par ligne, une seule insertion à la fin)
+        """
+        if getattr(_collecte_historique, 'lignes', None) is not None:
+            yield
+            return
+        _collecte_historique.lignes = []
+        try:
+            yield
+            lignes = _collecte_historique.lignes
+        finally:
+            _collecte_historique.lignes = None
+        if lignes:
+            cls.objects.bulk_create(lignes, batch_size=500)
+
+    @classmethod
+    def enregistrer_changements(cls, changements, motif=None):
+        """
+        changements: [(salarie_id, avant, apres)] avec avant/apres {service_id, grade_id}
+        Crée une ligne par salarié dont le service ou le grade a réellement changé
+        """
+        lignes = [
+            cls(
+                salarie_id=salarie_id,
+                service_ancien_id=avant['service_id'],
+                service_nouveau_id=apres['service_id'],
+                grade_ancien_id=avant['grade_id'],
+                grade_nouveau_id=apres['grade_id'],
+                motif=motif,
+            )
+            for salarie_id, avant, apres in changements
+            if any(avant[champ] != apres[champ] for champ in cls.CHAMPS_HISTORISES)
+        ]
+        if not lignes:
+            return 0
+        if getattr(_collecte_historique, 'lignes', None) is not None:
+            _collecte_historique.lignes.extend(lignes)
+        else:
+            cls.objects.bulk_create(lignes, batch_size=500)
+        return len(lignes)
+
+
+# Lignes en attente pendant HistoriqueSalarie.collecte() (par thread)
+_collecte_historique = threading.local()
+
 
 class HoraireSalarie(models.Model):
     """Horaires supplémentaires configurés pour un salarié"""
-    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='horaires_supplementaires')
+    # Index : horaire_salarie_date_idx (salarie en tête)
+    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='horaires_supplementaires', db_index=False)
     date_debut = models.DateField()
     date_fin = models.DateField(null=True, blank=True)
     heure_debut = models.TimeField()
@@ -425,6 +675,9 @@ class HoraireSalarie(models.Model):
 
     class Meta:
         ordering = ['-date_debut']
+        indexes = [
+            models.Index(fields=['salarie', '-date_debut'], name='horaire_salarie_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.salarie} - {self.date_debut}"
@@ -456,20 +709,173 @@ class EquipementInstance(models.Model):
 
     class Meta:
         ordering = ['-date_affectation']
+        indexes = [
+            models.Index(fields=['-date_affectation'], name='equipinst_affectation_idx'),
+            models.Index(fields=['etat', '-date_affectation'], name='equipinst_etat_date_idx'),
+            # Instances en cours d'affectation (date_retrait IS NULL) : détenteurs, stocks
+            models.Index(fields=['salarie'], name='equipinst_ouvert_salarie_idx',
+                         condition=models.Q(date_retrait__isnull=True)),
+            models.Index(fields=['equipement'], name='equipinst_ouvert_equip_idx',
+                         condition=models.Q(date_retrait__isnull=True)),
+        ]
 
     def __str__(self):
         return f"{self.equipement.nom} - {self.numero_serie or 'N/A'}"
 
+    # Champs dont les changements font varier le stock / l'historique
+    CHAMPS_SUIVIS = ('equipement_id', 'salarie_id', 'numero_serie', 'date_affectation', 'date_retrait', 'etat')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(champ in instance.__dict__ for champ in cls.CHAMPS_SUIVIS):
+            instance._valeurs_initiales = {champ: instance.__dict__[champ] for champ in cls.CHAMPS_SUIVIS}
+        return instance
+
+    def _etat_initial(self):
+        """Valeurs des champs suivis telles qu'en base avant la sauvegarde (None si création)"""
+        if self._state.adding:
+            return None
+        initial = getattr(self, '_valeurs_initiales', None)
+        if initial is None:
+            initial = EquipementInstance.objects.filter(pk=self.pk).values(*self.CHAMPS_SUIVIS).first()
+        return initial
+
+    @staticmethod
+    def _deltas_stock(avant, apres):
+        """Variations du nombre d'instances affectées par équipement entre deux états"""
+        deltas = {}
+        if avant and avant['date_retrait'] is None:
+            deltas[avant['equipement_id']] = deltas.get(avant['equipement_id'], 0) - 1
+        if apres and apres['date_retrait'] is None:
+            deltas[apres['equipement_id']] = deltas.get(apres['equipement_id'], 0) + 1
+        return deltas
+
     def save(self, *args, **kwargs):
-        """Après création/modification → recalcule stock du parent"""
-        super().save(*args, **kwargs)
-        self.equipement.save()
+        """
+        Affectation / retrait / changement d'équipement → F() sur le stock du parent
+        Chaque transition est ajoutée à HistoriqueEquipement
+        """
+        with transaction.atomic():
+            avant = self._etat_initial()
+            super().save(*args, **kwargs)
+            apres = {champ: getattr(self, champ) for champ in self.CHAMPS_SUIVIS}
+            Equipement.ajuster_stocks(self._deltas_stock(avant, apres))
+            HistoriqueEquipement.objects.bulk_create(
+                HistoriqueEquipement.evenements_transition(self.pk, avant, apres)
+            )
+        self._valeurs_initiales = apres
 
     def delete(self, *args, **kwargs):
-        """Après suppression → recalcule stock du parent"""
-        equipement = self.equipement
-        super().delete(*args, **kwargs)
-        equipement.save()
+        """Suppression d'une instance affectée → stock du parent +1"""
+        with transaction.atomic():
+            avant = self._etat_initial()
+            pk = self.pk
+            resultat = super().delete(*args, **kwargs)
+            Equipement.ajuster_stocks(self._deltas_stock(avant, None))
+            if avant:
+                HistoriqueEquipement.objects.create(
+                    **HistoriqueEquipement.valeurs_evenement(pk, avant, 'suppression', date.today())
+                )
+        return resultat
+
+
+class HistoriqueEquipement(models.Model):
+    """
+    Historique des affectations d'équipements (append-only)
+    Une ligne par transition : le détenteur après l'événement est `salarie`,
+    sauf pour retrait / suppression (plus de détenteur)
+    """
+    TYPE_CHOICES = [
+        ('affectation', 'Affectation'),
+        ('reaffectation', 'Réaffectation'),
+        ('retrait', 'Retrait'),
+        ('changement_etat', "Changement d'état"),
+        ('suppression', 'Suppression'),
+    ]
+    # Événements après lesquels l'instance n'a plus de détenteur
+    TYPES_SANS_DETENTEUR = ('retrait', 'suppression')
+
+    # Pas de contrainte FK : l'historique survit à la suppression de l'instance
+    # Index : histoequip_instance_date_idx (instance en tête)
+    instance = models.ForeignKey(
+        EquipementInstance, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        related_name='historique',
+    )
+    equipement = models.ForeignKey(Equipement, on_delete=models.SET_NULL, null=True, blank=True, related_name='historique')
+    numero_serie = models.CharField(max_length=255, null=True, blank=True)
+    # Index : histoequip_salarie_date_idx (salarie en tête)
+    salarie = models.ForeignKey(Salarie, on_delete=models.SET_NULL, null=True, blank=True, related_name='historique_equipements', db_index=False)
+    type_evenement = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    etat = models.CharField(max_length=50, choices=EquipementInstance.ETAT_CHOICES)
+    date_effet = models.DateField()
+    date_creation = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date_effet', '-id']
+        verbose_name = "Historique d'équipement"
+        verbose_name_plural = "Historique des équipements"
+        indexes = [
+            models.Index(fields=['numero_serie', 'date_effet'], name='histoequip_serie_date_idx'),
+            models.Index(fields=['salarie', 'date_effet'], name='histoequip_salarie_date_idx'),
+            models.Index(fields=['instance', 'date_effet'], name='histoequip_instance_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.numero_serie or self.instance_id} - {self.type_evenement} ({self.date_effet})"
+
+    def save(self, *args, **kwargs):
+        """Un événement ne se modifie pas"""
+        if self.pk:
+            raise ValueError("Un événement d'historique ne peut pas être modifié")
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def valeurs_evenement(instance_id, valeurs, type_evenement, date_effet, salarie_id=None):
+        """Champs d'un événement à partir des valeurs suivies de l'instance"""
+        return {
+            'instance_id': instance_id,
+            'equipement_id': valeurs['equipement_id'],
+            'numero_serie': valeurs['numero_serie'],
+            'salarie_id': salarie_id if salarie_id is not None else valeurs['salarie_id'],
+            'type_evenement': type_evenement,
+            'etat': valeurs['etat'],
+            'date_effet': date_effet,
+        }
+
+    @classmethod
+    def evenements_transition(cls, instance_id, avant, apres):
+        """Événements (non sauvegardés) correspondant au passage avant -> apres"""
+        aujourd_hui = date.today()
+        evenements = []
+
+        if avant is None:
+            evenements.append(('affectation', apres['date_affectation'], None))
+            if apres['date_retrait']:
+                evenements.append(('retrait', apres['date_retrait'], None))
+        elif avant['date_retrait'] is None and apres['date_retrait'] is not None:
+            # Le retrait est attribué au salarié qui rend l'équipement
+            evenements.append(('retrait', apres['date_retrait'], avant['salarie_id']))
+        elif avant['date_retrait'] is not None and apres['date_retrait'] is None:
+            # Réaffectation après retrait : l'ancienne date_affectation précède le retrait,
+            # l'événement serait classé avant lui (détenteur à date perdu)
+            date_effet = apres['date_affectation']
+            if date_effet == avant['date_affectation'] or date_effet < avant['date_retrait']:
+                date_effet = max(aujourd_hui, avant['date_retrait'])
+            evenements.append(('affectation', date_effet, None))
+        elif apres['date_retrait'] is None and avant['salarie_id'] != apres['salarie_id']:
+            date_effet = (
+                apres['date_affectation']
+                if apres['date_affectation'] != avant['date_affectation'] else aujourd_hui
+            )
+            evenements.append(('reaffectation', date_effet, None))
+        elif avant['etat'] != apres['etat']:
+            evenements.append(('changement_etat', aujourd_hui, None))
+
+        return [
+            cls(**cls.valeurs_evenement(instance_id, apres, type_evenement, date_effet, salarie_id))
+            for type_evenement, date_effet, salarie_id in evenements
+        ]
 
 
 # ============================================================================
@@ -547,7 +953,8 @@ class DemandeConge(models.Model):
         ('sabbatique', 'Congé sabbatique'),
     ]
 
-    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='demandes_conge')
+    # Index : demandeconge_salarie_idx (salarie en tête)
+    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='demandes_conge', db_index=False)
     type_conge = models.CharField(max_length=50, choices=TYPE_CONGE, default='normal')
     date_debut = models.DateField()
     date_fin = models.DateField()
@@ -568,6 +975,16 @@ class DemandeConge(models.Model):
 
     class Meta:
         ordering = ['-date_creation']
+        indexes = [
+            # Recherche d'intervalles : date_debut <= fin AND date_fin >= debut
+            models.Index(fields=['date_fin', 'date_debut'], name='demandeconge_intervalle_idx'),
+            models.Index(fields=['statut', 'date_debut'], name='demandeconge_statut_debut_idx'),
+            # Tri par défaut -date_creation, seul ou après les filtres du viewset
+            models.Index(fields=['-date_creation'], name='demandeconge_creation_idx'),
+            models.Index(fields=['salarie', '-date_creation'], name='demandeconge_salarie_idx'),
+            models.Index(fields=['statut', '-date_creation'], name='demandeconge_statut_idx'),
+            models.Index(fields=['type_conge', '-date_creation'], name='demandeconge_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.salarie.matricule} - {self.type_conge} ({self.date_debut})"
@@ -585,6 +1002,52 @@ class SoldeConge(models.Model):
         return f"Solde - {self.salarie.matricule}"
 
 
+class MouvementConge(models.Model):
+    """
+    Registre des mouvements de congés (append-only)
+    SoldeConge est le solde matérialisé, mis à jour à chaque mouvement
+    """
+    TYPE_CHOICES = [
+        ('acquisition', 'Acquisition mensuelle'),
+        ('consommation', 'Consommation'),
+        ('annulation', 'Annulation de consommation'),
+        ('ajustement', 'Ajustement'),
+    ]
+    # Répartition du solde par type (la demande liée peut avoir été supprimée)
+    TYPES_ACQUIS = ('acquisition', 'ajustement')
+    TYPES_UTILISES = ('consommation', 'annulation')
+
+    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='mouvements_conge')
+    type_mouvement = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    nombre_jours = models.DecimalField(max_digits=6, decimal_places=2)
+    periode = models.DateField(null=True, blank=True)
+    demande = models.ForeignKey(DemandeConge, on_delete=models.SET_NULL, null=True, blank=True, related_name='mouvements_conge')
+    motif = models.CharField(max_length=255, null=True, blank=True)
+    cree_par = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='mouvements_conge')
+    date_creation = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date_creation']
+        verbose_name = "Mouvement de congés"
+        verbose_name_plural = "Mouvements de congés"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['salarie', 'periode'],
+                condition=models.Q(type_mouvement='acquisition'),
+                name='unique_acquisition_par_periode',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.salarie.matricule} - {self.type_mouvement} ({self.nombre_jours})"
+
+    def save(self, *args, **kwargs):
+        """Un mouvement ne se modifie pas : on passe un ajustement"""
+        if self.pk:
+            raise ValueError("Un mouvement de congés ne peut pas être modifié")
+        super().save(*args, **kwargs)
+
+
 class DemandeAcompte(models.Model):
     """Demande d'acompte"""
     STATUT_CHOICES = [
@@ -597,7 +1060,8 @@ class DemandeAcompte(models.Model):
         ('payée', 'Payée'),
     ]
 
-    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='demandes_acompte')
+    # Index : acompte_salarie_date_idx (salarie en tête)
+    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='demandes_acompte', db_index=False)
     montant = models.DecimalField(max_digits=10, decimal_places=2)
     motif = models.TextField(default='Demande d\'acompte')
     date_demande = models.DateField(auto_now_add=True)
@@ -610,6 +1074,11 @@ class DemandeAcompte(models.Model):
 
     class Meta:
         ordering = ['-date_demande']
+        indexes = [
+            models.Index(fields=['-date_demande'], name='acompte_date_idx'),
+            models.Index(fields=['salarie', '-date_demande'], name='acompte_salarie_date_idx'),
+            models.Index(fields=['statut', '-date_demande'], name='acompte_statut_date_idx'),
+        ]
 
     def __str__(self):
         return f"Acompte - {self.salarie.matricule} ({self.montant}€)"
@@ -626,7 +1095,8 @@ class DemandeSortie(models.Model):
         ('rejetée', 'Rejetée'),
     ]
 
-    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='demandes_sortie')
+    # Index : sortie_salarie_date_idx (salarie en tête)
+    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='demandes_sortie', db_index=False)
     date_sortie = models.DateField()
     heure_debut = models.TimeField()
     heure_fin = models.TimeField()
@@ -639,6 +1109,11 @@ class DemandeSortie(models.Model):
 
     class Meta:
         ordering = ['-date_sortie']
+        indexes = [
+            models.Index(fields=['-date_sortie'], name='sortie_date_idx'),
+            models.Index(fields=['salarie', '-date_sortie'], name='sortie_salarie_date_idx'),
+            models.Index(fields=['statut', '-date_sortie'], name='sortie_statut_date_idx'),
+        ]
 
     def __str__(self):
         return f"Sortie - {self.salarie.matricule} ({self.date_sortie})"
@@ -655,7 +1130,8 @@ class TravauxExceptionnels(models.Model):
         ('rejetée', 'Rejetée'),
     ]
 
-    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='travaux_exceptionnels')
+    # Index : travaux_salarie_date_idx (salarie en tête)
+    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='travaux_exceptionnels', db_index=False)
     date_travail = models.DateField()
     heure_debut = models.TimeField()
     heure_fin = models.TimeField()
@@ -670,6 +1146,11 @@ class TravauxExceptionnels(models.Model):
 
     class Meta:
         ordering = ['-date_travail']
+        indexes = [
+            models.Index(fields=['-date_travail'], name='travaux_date_idx'),
+            models.Index(fields=['salarie', '-date_travail'], name='travaux_salarie_date_idx'),
+            models.Index(fields=['statut', '-date_travail'], name='travaux_statut_date_idx'),
+        ]
 
     def __str__(self):
         return f"Travaux - {self.salarie.matricule} ({self.date_travail})"
@@ -690,7 +1171,8 @@ class DocumentSalarie(models.Model):
         ('autre', 'Autre'),
     ]
 
-    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='documents')
+    # Index : document_salarie_date_idx (salarie en tête)
+    salarie = models.ForeignKey(Salarie, on_delete=models.CASCADE, related_name='documents', db_index=False)
     type_document = models.CharField(max_length=50, choices=TYPE_DOCUMENT, default='autre')
     titre = models.CharField(max_length=255, default='Document')
     description = models.TextField(null=True, blank=True)
@@ -705,6 +1187,11 @@ class DocumentSalarie(models.Model):
 
     class Meta:
         ordering = ['-date_upload']
+        indexes = [
+            models.Index(fields=['-date_upload'], name='document_date_idx'),
+            models.Index(fields=['salarie', '-date_upload'], name='document_salarie_date_idx'),
+            models.Index(fields=['type_document', '-date_upload'], name='document_type_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.salarie.matricule} - {self.type_document}"
@@ -770,6 +1257,9 @@ class AmeliorationProposee(models.Model):
 
     class Meta:
         ordering = ['-date_proposition']
+        indexes = [
+            models.Index(fields=['statut', '-priorite', '-date_proposition'], name='amelioration_statut_idx'),
+        ]
 
     def __str__(self):
         return f"{self.titre} ({self.fiche_poste.titre})"
@@ -865,6 +1355,10 @@ class ImportLog(models.Model):
 
     class Meta:
         ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['api_name', '-date_creation'], name='importlog_api_date_idx'),
+            models.Index(fields=['statut', '-date_creation'], name='importlog_statut_date_idx'),
+        ]
         verbose_name = "Log d'import"
         verbose_name_plural = "Logs d'import"
 
@@ -0,0 +1,134 @@
+# ============================================================================
+# NPLUS1_UTILS.PY - DÉTECTION DES REQUÊTES N+1
+# ============================================================================
+# Les SELECT d'une requête HTTP sont regroupés par forme (SQL sans valeurs,
+# listes IN (...) de longueur quelconque). Une forme exécutée au moins
+# NPLUS1_SEUIL fois signale un N+1 : relation suivie ligne par ligne au lieu
+# d'un select_related / prefetch_related / annotate.
+#
+# settings.NPLUS1_MODE :
+# - 'off'   : aucune analyse (production)
+# - 'log'   : avertissement 'api.nplus1' avec l'origine dans le code (recette)
+# - 'raise' : ErreurNPlusUn en fin de requête (tests)
+# ============================================================================
+
+import logging
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger('api.nplus1')
+
+_LISTE_IN = re.compile(r'\bIN \((?:%s, )*%s\)')
+_LITTERAUX = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+# Cadres ignorés dans l'origine (mécanique de mesure)
+_MODULES_INSTRUMENTATION = ('nplus1_utils.py', 'metriques_utils.py', 'etag_utils.py', 'middleware.py')
+
+
+class ErreurNPlusUn(AssertionError):
+    """Requêtes N+1 détectées (NPLUS1_MODE = 'raise')"""
+
+
+def forme_requete(sql):
+    """SQL normalisé : valeurs littérales et listes IN remplacées"""
+    return _LITTERAUX.sub('?', _LISTE_IN.sub('IN (...)', sql))
+
+
+def origine_appel(profondeur=3):
+    """Derniers cadres du code du projet dans la pile courante"""
+    racine = str(Path(settings.BASE_DIR).resolve())
+    cadres = [
+        cadre for cadre in traceback.extract_stack()
+        if cadre.filename.startswith(racine)
+        and 'site-packages' not in cadre.filename
+        and not cadre.filename.endswith(_MODULES_INSTRUMENTATION)
+    ]
+    return [
+        f'{Path(cadre.filename).relative_to(racine)}:{cadre.lineno} {cadre.name}'
+        for cadre in cadres[-profondeur:]
+    ]
+
+
+# ============================================================================
+# DÉTECTEUR
+# ============================================================================
+
+class DetecteurNPlusUn:
+    """Compte les SELECT par forme ; l'origine est relevée quand le seuil est atteint"""
+
+    def __init__(self, seuil=None):
+        self.seuil = seuil or getattr(settings, 'NPLUS1_SEUIL', 5)
+        self.formes = Counter()
+        self.origines = {}
+
+    def observer(self, sql):
+        if not sql.lstrip()[:6].upper() == 'SELECT':
+            return
+        forme = forme_requete(sql)
+        self.formes[forme] += 1
+        if self.formes[forme] == self.seuil:
+            self.origines[forme] = origine_appel()
+
+    def executer(self, execute, sql, params, many, context):
+        """execute_wrapper (hors requête HTTP, voir detecter_nplus1)"""
+        self.observer(sql)
+        return execute(sql, params, many, context)
+
+    def suspects(self):
+        """[(forme, nombre, origine)] des formes répétées au moins `seuil` fois"""
+        return [
+            (forme, nombre, self.origines.get(forme, []))
+            for forme, nombre in self.formes.most_common()
+            if nombre >= self.seuil
+        ]
+
+    def rapport(self, description):
+        lignes = [f'N+1 detecte : {description}']
+        for forme, nombre, origine in self.suspects():
+            lignes.append(f'  {nombre} x {forme[:300]}')
+            lignes.extend(f'      depuis {cadre}' for cadre in origine)
+        return '\n'.join(lignes)
+
+
+def mode_nplus1():
+    return getattr(settings, 'NPLUS1_MODE', 'off')
+
+
+def creer_detecteur():
+    """Détecteur pour une requête HTTP, None si NPLUS1_MODE = 'off'"""
+    return DetecteurNPlusUn() if mode_nplus1() != 'off' else None
+
+
+def verifier_nplus1(detecteur, description):
+    """Journalise ou lève selon NPLUS1_MODE si des formes dépassent le seuil"""
+    if detecteur is None or not detecteur.suspects():
+        return
+    rapport = detecteur.rapport(description)
+    if mode_nplus1() == 'raise':
+        raise ErreurNPlusUn(rapport)
+    logger.warning(rapport)
+
+
+@contextmanager
+def detecter_nplus1(description='bloc'):
+    """
+    Hors requête HTTP (tests, commandes) :
+        with detecter_nplus1('export'):
+            ...
+    """
+    detecteur = creer_detecteur()
+    if detecteur is None:
+        yield None
+        return
+    with ExitStack() as pile:
+        for connection in connections.all():
+            pile.enter_context(connection.execute_wrapper(detecteur.executer))
+        yield detecteur
+    verifier_nplus1(detecteur, description)
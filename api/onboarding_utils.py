@@ -0,0 +1,131 @@
+# ============================================================================
+# ONBOARDING_UTILS.PY - CRÉATION DES COMPTES USER DES SALARIÉS EN MASSE
+# ============================================================================
+# Remplace le traitement ligne à ligne du signal create_user_for_salarie :
+# - mot de passe inutilisable propre à chaque compte, ou un seul hash
+#   calculé pour tout le lot (jamais conservé au-delà de l'appel)
+# - bulk_create des User, des liens User <-> Group (table de liaison)
+#   et des FicheParametresUser ; un bulk_update de Salarie.user
+# - creation_user_suspendue() : désactive le signal pendant un import
+# ============================================================================
+
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+
+from .models import FicheParametresUser, Salarie
+
+
+GROUPE_SALARIE = 'salarie'
+
+_etat = threading.local()
+
+
+# ============================================================================
+# SUSPENSION DU SIGNAL
+# ============================================================================
+
+@contextmanager
+def creation_user_suspendue():
+    """
+    Suspend la création de User par le signal post_save de Salarie
+    (imports : les comptes sont créés ensuite en masse)
+    """
+    precedent = getattr(_etat, 'suspendu', False)
+    _etat.suspendu = True
+    try:
+        yield
+    finally:
+        _etat.suspendu = precedent
+
+
+def creation_user_active():
+    """False dans un bloc creation_user_suspendue()"""
+    return not getattr(_etat, 'suspendu', False)
+
+
+# ============================================================================
+# CRÉATION EN MASSE
+# ============================================================================
+
+def creer_comptes_salaries(salaries, mot_de_passe=None, batch_size=500):
+    """
+    Crée les User des salariés qui n'en ont pas
+
+    - salaries: QuerySet ou liste de Salarie
+    - mot_de_passe: None -> mot de passe inutilisable (réinitialisation requise)
+      sinon haché une seule fois pour le lot (validate_password à la charge de l'appelant)
+    Retourne {'crees': [{'salarie_id', 'user_id', 'username'}], 'ignores': [{'salarie_id', 'raison'}]}
+    """
+    salaries = [s for s in salaries if not s.user_id]
+    if not salaries:
+        return {'crees': [], 'ignores': []}
+
+    mot_de_passe_hash = make_password(mot_de_passe) if mot_de_passe else None
+    usernames_existants = set(
+        User.objects.filter(username__in=[s.matricule for s in salaries])
+        .values_list('username', flat=True)
+    )
+
+    ignores = []
+    a_creer = []
+    for salarie in salaries:
+        if salarie.matricule in usernames_existants:
+            ignores.append({'salarie_id': salarie.id, 'raison': f'Username {salarie.matricule} déjà utilisé'})
+        else:
+            a_creer.append(salarie)
+
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=salarie.matricule,
+                    email=salarie.mail_professionnel or f"{salarie.matricule}@msi.tn",
+                    first_name=salarie.prenom,
+                    last_name=salarie.nom,
+                    # make_password(None) : marqueur inutilisable aléatoire, sans hachage
+                    password=mot_de_passe_hash or make_password(None),
+                )
+                for salarie in a_creer
+            ],
+            batch_size=batch_size,
+        )
+        # Certains backends ne renvoient pas les pk après bulk_create
+        if users and users[0].pk is None:
+            par_username = dict(
+                User.objects.filter(username__in=[u.username for u in users]).values_list('username', 'id')
+            )
+            for user in users:
+                user.pk = par_username[user.username]
+
+        groupe = Group.objects.filter(name=GROUPE_SALARIE).first()
+        if groupe:
+            User.groups.through.objects.bulk_create(
+                [User.groups.through(user_id=user.pk, group_id=groupe.pk) for user in users],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+
+        FicheParametresUser.objects.bulk_create(
+            [
+                FicheParametresUser(user_id=user.pk, theme='light', langue='fr', notifications_actives=True)
+                for user in users
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
+        for salarie, user in zip(a_creer, users):
+            salarie.user = user
+        Salarie.objects.bulk_update(a_creer, ['user'], batch_size=batch_size)
+
+    return {
+        'crees': [
+            {'salarie_id': salarie.id, 'user_id': salarie.user_id, 'username': salarie.user.username}
+            for salarie in a_creer
+        ],
+        'ignores': ignores,
+    }
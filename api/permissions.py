@@ -3,8 +3,12 @@ Django REST Framework Permissions
 Système d'autorisation basé sur les groups et permissions
 """
 
+import hmac
+
+from django.conf import settings
+from rest_framework.authentication import BaseAuthentication
 from rest_framework.permissions import BasePermission
-from django.contrib.auth.models import Permission
+from django.contrib.auth.models import AnonymousUser, Permission
 
 
 class IsAuthenticated(BasePermission):
@@ -27,6 +31,35 @@ class IsAdmin(BasePermission):
         return bool(request.user and request.user.is_staff)
 
 
+class JetonMetriquesAuthentication(BaseAuthentication):
+    """
+    Collecte Prometheus : Authorization: Bearer <METRIQUES_TOKEN>
+    Tout autre jeton est laissé aux authentifications suivantes (JWT)
+    """
+
+    def authenticate(self, request):
+        jeton = getattr(settings, 'METRIQUES_TOKEN', '')
+        entete = request.META.get('HTTP_AUTHORIZATION', '')
+        if jeton and entete.startswith('Bearer ') and hmac.compare_digest(
+            entete[len('Bearer '):].encode(), jeton.encode()
+        ):
+            return AnonymousUser(), 'metriques'
+        return None
+
+    def authenticate_header(self, request):
+        return 'Bearer'
+
+
+class AccesMetriques(BasePermission):
+    """Jeton de collecte (JetonMetriquesAuthentication) ou utilisateur staff"""
+    message = "Accès aux métriques refusé."
+
+    def has_permission(self, request, view):
+        if request.auth == 'metriques':
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
 # ============================================================================
 # PERMISSIONS POUR LES SALAIRES
 # ============================================================================
@@ -0,0 +1,202 @@
+# ============================================================================
+# RECHERCHE_GLOBALE_UTILS.PY - RECHERCHE TRANSVERSE (SALARIÉS, MATÉRIEL, ...)
+# ============================================================================
+# Une saisie, plusieurs sources interrogées en parallèle (pool de threads :
+# une connexion base par thread). Chaque source a un budget de temps : au-delà
+# ses résultats sont ignorés et la requête est interrompue par la base, pour
+# libérer le thread du pool (voir _borner_duree) :
+# - PostgreSQL : statement_timeout
+# - MySQL      : max_execution_time
+# - SQLite     : progress handler
+# Sur un autre moteur, une source hors délai occupe son thread jusqu'à la fin
+# de sa requête : POOL_THREADS borne alors le nombre de recherches simultanées.
+# Les résultats sont fusionnés par pertinence :
+#   3 = égalité exacte, 2 = commence par la saisie, 1 = contient la saisie
+# ============================================================================
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Concat
+
+from .recherche_utils import rechercher_salaries, termes_recherche
+
+
+logger = logging.getLogger(__name__)
+
+LIMITE_PAR_SOURCE = 5
+LIMITE_TOTALE = 20
+BUDGET_DEFAUT_MS = 300
+POOL_THREADS = 8
+
+# Budget (ms) par source : les sources plein texte ont un peu plus de marge
+BUDGETS_MS = {
+    'salaries': 400,
+    'equipements': BUDGET_DEFAUT_MS,
+    'acces': BUDGET_DEFAUT_MS,
+    'fiches_poste': BUDGET_DEFAUT_MS,
+    'documents': BUDGET_DEFAUT_MS,
+}
+
+_pool = ThreadPoolExecutor(max_workers=POOL_THREADS, thread_name_prefix='recherche')
+
+
+# ============================================================================
+# SOURCES
+# ============================================================================
+
+def _pertinence(champ, saisie):
+    return Case(
+        When(**{f'{champ}__iexact': saisie}, then=3),
+        When(**{f'{champ}__istartswith': saisie}, then=2),
+        default=1, output_field=IntegerField(),
+    )
+
+
+def _salaries(queryset, saisie, limite):
+    termes = termes_recherche(saisie)
+    return (
+        rechercher_salaries(queryset, saisie)
+        .annotate(
+            pertinence=Case(
+                When(matricule__iexact=saisie, then=3),
+                When(texte_recherche__startswith=termes[0], then=2),
+                default=1, output_field=IntegerField(),
+            ),
+            label=Concat('prenom', Value(' '), 'nom'),
+            detail=F('matricule'),
+        )
+        .order_by('-pertinence', '-rang', 'nom', 'prenom')
+        .values('id', 'label', 'detail', 'pertinence')[:limite]
+    )
+
+
+def _par_champ(champ, detail):
+    """Source filtrée par icontains sur `champ`, detail = expression affichée"""
+    def rechercher(queryset, saisie, limite):
+        return (
+            queryset
+            .filter(**{f'{champ}__icontains': saisie})
+            .annotate(pertinence=_pertinence(champ, saisie), label=F(champ), detail=detail)
+            .order_by('-pertinence', champ, 'id')
+            .values('id', 'label', 'detail', 'pertinence')[:limite]
+        )
+    return rechercher
+
+
+def _nom_salarie():
+    return Concat('salarie__prenom', Value(' '), 'salarie__nom')
+
+
+# source -> fonction(queryset, saisie, limite) ; ordre = priorité à pertinence égale
+SOURCES_RECHERCHE = {
+    'salaries': _salaries,
+    'equipements': _par_champ('numero_serie', F('equipement__nom')),
+    'acces': _par_champ('identifiant', Concat('application', Value(' - '), _nom_salarie())),
+    'fiches_poste': _par_champ('titre', F('service__nom')),
+    'documents': _par_champ('titre', _nom_salarie()),
+}
+
+
+# ============================================================================
+# EXÉCUTION PARALLÈLE
+# ============================================================================
+
+def _borner_duree(connection, budget_ms):
+    """
+    Fait interrompre par la base une requête qui dépasse budget_ms
+    (dans la transaction de _executer) ; retourne la fonction de nettoyage
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL statement_timeout = %s', [int(budget_ms)])
+    elif connection.vendor == 'mysql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET SESSION max_execution_time = %s', [int(budget_ms)])
+
+        def nettoyer():
+            with connection.cursor() as cursor:
+                cursor.execute('SET SESSION max_execution_time = 0')
+        return nettoyer
+    elif connection.vendor == 'sqlite':
+        # Appelé toutes les 1000 instructions de la VM : une valeur vraie interrompt la requête
+        echeance = time.monotonic() + budget_ms / 1000
+        connection.ensure_connection()
+        connection.connection.set_progress_handler(lambda: time.monotonic() > echeance, 1000)
+        return lambda: connection.connection.set_progress_handler(None, 0)
+    return lambda: None
+
+
+def _executer(rechercher, queryset, saisie, limite, budget_ms):
+    """
+    Exécutée dans un thread du pool (connexion base propre au thread)
+    Retourne (lignes, durée en ms)
+    """
+    debut = time.monotonic()
+    close_old_connections()
+    try:
+        connection = connections[queryset.db]
+        with transaction.atomic(using=queryset.db):
+            nettoyer = _borner_duree(connection, budget_ms)
+            try:
+                lignes = list(rechercher(queryset, saisie, limite))
+            finally:
+                nettoyer()
+        return lignes, round((time.monotonic() - debut) * 1000, 1)
+    finally:
+        close_old_connections()
+
+
+def recherche_globale(saisie, querysets, limite_source=LIMITE_PAR_SOURCE,
+                      limite=LIMITE_TOTALE, budgets=None):
+    """
+    Interroge les sources en parallèle
+    - querysets: {source: queryset des lignes visibles par l'utilisateur}
+    - budgets: {source: ms} (défaut BUDGETS_MS)
+    Retourne {'results': [...], 'sources': {source: {statut, nombre, ms}}}
+    """
+    saisie = ' '.join(saisie.split())
+    if not termes_recherche(saisie):
+        return {'results': [], 'sources': {}}
+    budgets = {**BUDGETS_MS, **(budgets or {})}
+
+    debut = time.monotonic()
+    futures = {
+        source: _pool.submit(
+            _executer, SOURCES_RECHERCHE[source], queryset, saisie, limite_source,
+            budgets.get(source, BUDGET_DEFAUT_MS),
+        )
+        for source, queryset in querysets.items()
+    }
+
+    resultats = []
+    sources = {}
+    for priorite, (source, future) in enumerate(futures.items()):
+        restant = debut + budgets.get(source, BUDGET_DEFAUT_MS) / 1000 - time.monotonic()
+        try:
+            lignes, duree = future.result(timeout=max(restant, 0))
+        except FuturesTimeoutError:
+            future.cancel()
+            sources[source] = {'statut': 'delai_depasse', 'nombre': 0}
+            continue
+        except Exception:
+            # Le détail (SQL, schéma) reste dans les journaux, pas dans la réponse
+            logger.exception('Recherche globale : échec de la source %s', source)
+            sources[source] = {'statut': 'erreur', 'nombre': 0}
+            continue
+        sources[source] = {
+            'statut': 'ok',
+            'nombre': len(lignes),
+            'ms': duree,
+        }
+        for position, ligne in enumerate(lignes):
+            resultats.append(((-ligne['pertinence'], priorite, position), {'type': source, **ligne}))
+
+    resultats.sort(key=lambda r: r[0])
+    return {
+        'results': [ligne for _, ligne in resultats[:limite]],
+        'sources': sources,
+    }
@@ -0,0 +1,224 @@
+# ============================================================================
+# RECHERCHE_UTILS.PY - RECHERCHE PLEIN TEXTE DANS L'ANNUAIRE DES SALARIÉS
+# ============================================================================
+# Salarie.texte_recherche contient un texte normalisé (minuscules, sans
+# accents, ponctuation -> espaces) : nom, prénom, matricule, mail, poste,
+# extension 3CX, service et départements. Il est recalculé par les signaux
+# (voir signals.py) et par la commande `indexerrecherche`.
+#
+# - PostgreSQL : index GIN sur to_tsvector('simple', texte_recherche),
+#   requête préfixe (to_tsquery 'helene:* & dup:*') classée par ts_rank
+# - SQLite     : table FTS5 api_salarie_fts alimentée par triggers,
+#   MATCH '"helene"* "dup"*' classé par bm25
+# - autres     : un icontains par terme sur texte_recherche
+#
+# La suppression des accents est faite en Python (équivalent de unaccent) :
+# l'expression indexée reste IMMUTABLE et la requête est normalisée pareil.
+# ============================================================================
+
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F, FloatField, Value
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Salarie
+
+
+CONFIG_RECHERCHE = 'simple'
+INDEX_RECHERCHE_PG = 'api_salarie_recherche_gin'
+TABLE_FTS = 'api_salarie_fts'
+MAX_TERMES = 8
+
+# Champs de Salarie qui composent texte_recherche (hors service / départements)
+CHAMPS_RECHERCHE_SALARIE = (
+    'nom', 'prenom', 'matricule', 'mail_professionnel', 'poste', 'extension_3cx', 'service',
+)
+
+
+# ============================================================================
+# NORMALISATION
+# ============================================================================
+
+def normaliser_texte(texte):
+    """'Hélène DUPONT-Rémy' -> 'helene dupont remy'"""
+    texte = unicodedata.normalize('NFKD', str(texte or ''))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', texte))
+
+
+def termes_recherche(saisie):
+    """Termes normalisés de la saisie utilisateur (au plus MAX_TERMES)"""
+    return normaliser_texte(saisie).split()[:MAX_TERMES]
+
+
+def composer_texte(valeurs, departements=()):
+    """
+    texte_recherche d'un salarié
+    - valeurs: nom, prenom, matricule, mail_professionnel, poste, extension_3cx, service_nom
+    - departements: [(numero, nom)]
+    """
+    morceaux = [
+        valeurs.get('nom'), valeurs.get('prenom'), valeurs.get('matricule'),
+        valeurs.get('mail_professionnel'), valeurs.get('poste'),
+        valeurs.get('extension_3cx'), valeurs.get('service_nom'),
+    ]
+    for numero, nom in departements:
+        morceaux += [numero, nom]
+    return normaliser_texte(' '.join(str(m) for m in morceaux if m))
+
+
+# ============================================================================
+# INDEXATION
+# ============================================================================
+
+def reindexer_salaries(salarie_ids=None, batch_size=1000):
+    """
+    Recalcule texte_recherche (tous les salariés si salarie_ids est None)
+    Deux requêtes de lecture, un bulk_update des seules lignes modifiées
+    Retourne le nombre de salariés mis à jour
+    """
+    salaries = Salarie.objects.order_by()
+    liens = Salarie.departements.through.objects.order_by()
+    if salarie_ids is not None:
+        salarie_ids = list(salarie_ids)
+        if not salarie_ids:
+            return 0
+        salaries = salaries.filter(id__in=salarie_ids)
+        liens = liens.filter(salarie_id__in=salarie_ids)
+
+    departements = {}
+    for salarie_id, numero, nom in liens.values_list(
+        'salarie_id', 'departement__numero', 'departement__nom'
+    ):
+        departements.setdefault(salarie_id, []).append((numero, nom))
+
+    a_mettre_a_jour = []
+    for valeurs in salaries.values(
+        'id', 'nom', 'prenom', 'matricule', 'mail_professionnel', 'poste',
+        'extension_3cx', 'texte_recherche', service_nom=F('service__nom'),
+    ).iterator(chunk_size=batch_size):
+        texte = composer_texte(valeurs, sorted(departements.get(valeurs['id'], ())))
+        if texte != valeurs['texte_recherche']:
+            a_mettre_a_jour.append(Salarie(id=valeurs['id'], texte_recherche=texte))
+
+    Salarie.objects.bulk_update(a_mettre_a_jour, ['texte_recherche'], batch_size=batch_size)
+    return len(a_mettre_a_jour)
+
+
+def installer_fts_sqlite(connection):
+    """
+    Table FTS5 + triggers de synchronisation (SQLite, idempotent)
+    À rappeler après une migration qui reconstruit api_salarie (les triggers
+    sont supprimés avec l'ancienne table) : fait par le signal post_migrate
+    Retourne True si l'index a été (re)construit
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    table = Salarie._meta.db_table
+    with connection.cursor() as cursor:
+        colonnes = {c.name for c in connection.introspection.get_table_description(cursor, table)}
+        if 'texte_recherche' not in colonnes:
+            # Migration 0006 non appliquée (ou annulée)
+            return False
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+            [f'{TABLE_FTS}_%'],
+        )
+        if cursor.fetchone()[0] == 3:
+            return False
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE_FTS} USING fts5("
+            f"texte_recherche, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {TABLE_FTS}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {TABLE_FTS}(rowid, texte_recherche) VALUES (new.id, new.texte_recherche); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {TABLE_FTS}_au AFTER UPDATE OF texte_recherche ON {table} BEGIN "
+            f"UPDATE {TABLE_FTS} SET texte_recherche = new.texte_recherche WHERE rowid = old.id; END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {TABLE_FTS}_ad AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM {TABLE_FTS} WHERE rowid = old.id; END"
+        )
+        cursor.execute(f"DELETE FROM {TABLE_FTS}")
+        cursor.execute(
+            f"INSERT INTO {TABLE_FTS}(rowid, texte_recherche) SELECT id, texte_recherche FROM {table}"
+        )
+    return True
+
+
+# ============================================================================
+# RECHERCHE
+# ============================================================================
+
+def _recherche_postgresql(queryset, termes):
+    requete = SearchQuery(
+        ' & '.join(f'{terme}:*' for terme in termes),
+        search_type='raw', config=CONFIG_RECHERCHE,
+    )
+    # Même expression que l'index GIN (migration 0006)
+    return (
+        queryset
+        .annotate(vecteur_recherche=SearchVector('texte_recherche', config=CONFIG_RECHERCHE))
+        .filter(vecteur_recherche=requete)
+        .annotate(rang=SearchRank(F('vecteur_recherche'), requete))
+    )
+
+
+def _recherche_sqlite(queryset, termes):
+    table = Salarie._meta.db_table
+    match = ' '.join(f'"{terme}"*' for terme in termes)
+    # Jointure sur la table FTS5 : le MATCH pilote la requête (bm25 < 0, plus petit = meilleur)
+    return queryset.extra(
+        select={'rang': f'-bm25({TABLE_FTS})'},
+        tables=[TABLE_FTS],
+        where=[f'{TABLE_FTS}.rowid = {table}.id', f'{TABLE_FTS} MATCH %s'],
+        params=[match],
+    )
+
+
+def _recherche_generique(queryset, termes):
+    for terme in termes:
+        queryset = queryset.filter(texte_recherche__icontains=terme)
+    return queryset.annotate(rang=Value(1.0, output_field=FloatField()))
+
+
+def rechercher_salaries(queryset, saisie):
+    """
+    Filtre un queryset de Salarie sur la saisie (tous les termes, en préfixe)
+    et l'annote avec `rang` (plus grand = plus pertinent)
+    Saisie vide : queryset inchangé
+    """
+    termes = termes_recherche(saisie)
+    if not termes:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _recherche_postgresql(queryset, termes)
+    if vendor == 'sqlite':
+        return _recherche_sqlite(queryset, termes)
+    return _recherche_generique(queryset, termes)
+
+
+class RechercheSalarieFilter(BaseFilterBackend):
+    """
+    ?search=... plein texte sur l'annuaire (remplace SearchFilter)
+    Sans ?ordering= explicite, les résultats sont triés par pertinence
+    (à placer après OrderingFilter dans filter_backends)
+    """
+    search_param = 'search'
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        saisie = request.query_params.get(self.search_param, '')
+        if not termes_recherche(saisie):
+            return queryset
+        queryset = rechercher_salaries(queryset, saisie)
+        if request.query_params.get(self.ordering_param):
+            return queryset
+        return queryset.order_by('-rang', *(queryset.query.order_by or Salarie._meta.ordering))
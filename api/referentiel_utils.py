@@ -0,0 +1,213 @@
+# ============================================================================
+# REFERENTIEL_UTILS.PY - DONNÉES DE RÉFÉRENCE EN MÉMOIRE DU PROCESSUS
+# ============================================================================
+# Sociétés, services, grades, départements (+ circuits) et créneaux changent
+# rarement mais sont relus à chaque ligne sérialisée (service.nom, grade.nom...)
+# Ils sont chargés une fois par worker (une requête par table) puis servis
+# depuis la mémoire.
+#
+# Invalidation : toute écriture incrémente, au commit, une version dans le
+# cache Django (partagé entre workers avec CACHE_BACKEND=redis / deux_niveaux).
+# Chaque worker relit la version au plus toutes les VERIFICATION_SECONDES et
+# se recharge si elle a changé ; le worker qui écrit se recharge au commit.
+# AGE_MAX_SECONDES borne l'ancienneté avec le cache locmem (non partagé).
+#
+# Entre l'écriture et le commit, la transaction qui écrit lit un instantané
+# qui lui est propre : rien de non validé n'entre dans le registre partagé
+# (une transaction annulée ne laisse aucune trace).
+# ============================================================================
+
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Circuit, CreneauTravail, Departement, Grade, Service, Societe
+
+
+VERSION_CACHE_KEY = 'referentiel:version'
+VERIFICATION_SECONDES = 1.0
+AGE_MAX_SECONDES = 300
+
+# Instantané de la transaction qui écrit (par thread)
+_transaction = threading.local()
+
+# entité -> modèle
+ENTITES_REFERENTIEL = {
+    'societe': Societe,
+    'service': Service,
+    'grade': Grade,
+    'departement': Departement,
+    'creneau_travail': CreneauTravail,
+}
+
+
+# ============================================================================
+# VERSION PARTAGÉE
+# ============================================================================
+
+def _version_partagee():
+    return cache.get(VERSION_CACHE_KEY) or 0
+
+
+def _incrementer_version():
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, timeout=None)
+
+
+def _apres_commit():
+    _incrementer_version()
+    referentiel.invalider()
+
+
+def ecriture_en_cours():
+    """True si la transaction courante a écrit des données de référence non validées"""
+    connection = transaction.get_connection()
+    return connection.in_atomic_block and any(
+        entree[1] is _apres_commit for entree in connection.run_on_commit
+    )
+
+
+def invalider_referentiel():
+    """
+    À appeler après toute écriture d'une table de référence (signals.py,
+    imports, opérations en masse)
+    - hors transaction : tous les workers se rechargent (version partagée)
+    - dans une transaction : idem au commit ; d'ici là, seule la transaction
+      courante voit ses écritures (annulée : le callback n'est jamais appelé)
+    """
+    if not transaction.get_connection().in_atomic_block:
+        _apres_commit()
+        return
+    _transaction.generation = getattr(_transaction, 'generation', 0) + 1
+    # Un seul callback par transaction (les imports écrivent des milliers de lignes)
+    if not ecriture_en_cours():
+        transaction.on_commit(_apres_commit)
+
+
+# ============================================================================
+# REGISTRE
+# ============================================================================
+
+class Referentiel:
+    """Instances des tables de référence indexées par id, rechargées par version"""
+
+    def __init__(self):
+        self._donnees = None
+        self._version = None
+        self._charge_le = 0.0
+        self._verifie_le = 0.0
+        self._verrou = threading.Lock()
+        self.chargements = 0
+
+    def invalider(self):
+        self._donnees = None
+
+    def _lire(self):
+        donnees = {
+            entite: {objet.pk: objet for objet in modele.objects.order_by()}
+            for entite, modele in ENTITES_REFERENTIEL.items()
+        }
+        circuits = defaultdict(list)
+        for circuit in Circuit.objects.order_by('departement_id', 'nom'):
+            # Département servi par le référentiel (circuit.departement sans requête)
+            circuit.departement = donnees['departement'].get(circuit.departement_id)
+            circuits[circuit.departement_id].append(circuit)
+        donnees['circuits'] = dict(circuits)
+        return donnees
+
+    def _charger(self, version):
+        donnees = self._lire()
+        maintenant = time.monotonic()
+        self._donnees = donnees
+        self._version = version
+        self._charge_le = self._verifie_le = maintenant
+        self.chargements += 1
+        return donnees
+
+    def _donnees_transaction(self):
+        """
+        Instantané propre à la transaction qui écrit, relu après chacune de ses
+        écritures et à chaque changement de savepoint (savepoint annulé)
+        """
+        cle = (getattr(_transaction, 'generation', 0), tuple(transaction.get_connection().savepoint_ids))
+        if getattr(_transaction, 'cle', None) != cle:
+            _transaction.donnees = self._lire()
+            _transaction.cle = cle
+        return _transaction.donnees
+
+    def donnees(self):
+        """Instantané courant (rechargé si la version partagée a changé)"""
+        if ecriture_en_cours():
+            return self._donnees_transaction()
+        donnees = self._donnees
+        maintenant = time.monotonic()
+        if donnees is not None and maintenant - self._charge_le < AGE_MAX_SECONDES:
+            if maintenant - self._verifie_le < VERIFICATION_SECONDES:
+                return donnees
+            self._verifie_le = maintenant
+            if _version_partagee() == self._version:
+                return donnees
+
+        with self._verrou:
+            if self._donnees is not donnees and self._donnees is not None:
+                return self._donnees
+            return self._charger(_version_partagee())
+
+    # Lecture ------------------------------------------------------------------
+
+    def get(self, entite, pk):
+        """Instance de l'entité (None si pk est None ou inconnu)"""
+        if pk is None:
+            return None
+        objet = self.donnees()[entite].get(pk)
+        if objet is None and not ecriture_en_cours() \
+                and time.monotonic() - self._charge_le >= VERIFICATION_SECONDES:
+            # Créé par un autre worker depuis le dernier chargement
+            with self._verrou:
+                objet = self._charger(_version_partagee())[entite].get(pk)
+        return objet
+
+    def libelle(self, entite, pk, attribut='nom'):
+        objet = self.get(entite, pk)
+        return getattr(objet, attribut) if objet is not None else None
+
+    def tous(self, entite):
+        return list(self.donnees()[entite].values())
+
+    def circuits(self, departement_id):
+        """Circuits du département, triés par nom"""
+        return self.donnees()['circuits'].get(departement_id, [])
+
+    def resoudre(self, entite, valeur, champ='nom'):
+        """
+        Id de l'entité dont `champ` vaut `valeur`, sinon dont l'id vaut
+        `valeur` - pour les imports
+        None si introuvable, ValueError si plusieurs correspondances
+        """
+        texte = str(valeur).strip()
+        trouves = [o.pk for o in self.tous(entite) if str(getattr(o, champ)) == texte]
+        if len(trouves) > 1:
+            raise ValueError(f"Plusieurs {entite} avec {champ}='{texte}'")
+        if trouves:
+            return trouves[0]
+        try:
+            pk = int(float(texte))
+        except ValueError:
+            return None
+        return pk if self.get(entite, pk) is not None else None
+
+
+referentiel = Referentiel()
+
+
+def entite_referentiel(modele):
+    """Nom d'entité du référentiel pour un modèle (None s'il n'en fait pas partie)"""
+    for entite, modele_referentiel in ENTITES_REFERENTIEL.items():
+        if modele is modele_referentiel:
+            return entite
+    return None
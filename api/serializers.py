@@ -6,10 +6,33 @@ from .models import (
     OutilFichePoste, AmeliorationProposee, EquipementInstance, CreneauTravail,
     HoraireSalarie, DocumentSalarie, DemandeConge, SoldeConge, TravauxExceptionnels,
     TypeApplicationAcces, AccesApplication, FicheParametresUser, Role,
-    DemandeAcompte, DemandeSortie, ImportLog
+    DemandeAcompte, DemandeSortie, ImportLog, MouvementConge, HistoriqueEquipement
 )
 from django.contrib.auth.models import User
 from datetime import date
+from .absences_utils import verifier_demande_conge
+from .jours_ouvres_utils import calculer_nombre_jours
+from .referentiel_utils import referentiel
+from .workflow_utils import ID_MAX
+
+
+# ============================================
+# LIBELLÉ DU RÉFÉRENTIEL (SANS REQUÊTE)
+# ============================================
+class LibelleReferentielField(serializers.ReadOnlyField):
+    """
+    Libellé d'une donnée de référence à partir de la clé étrangère
+    ex: LibelleReferentielField('service', source='service_id')
+    Lu dans le référentiel en mémoire au lieu de suivre la relation
+    """
+
+    def __init__(self, entite, attribut='nom', **kwargs):
+        self.entite = entite
+        self.attribut = attribut
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return referentiel.libelle(self.entite, value, self.attribut)
 
 # ============================================
 # SERIALIZER SOCIÉTÉ
@@ -27,7 +50,7 @@ class SocieteSerializer(serializers.ModelSerializer):
 # SERIALIZER CIRCUIT
 # ============================================
 class CircuitSerializer(serializers.ModelSerializer):
-    departement_nom = serializers.CharField(source='departement.nom', read_only=True)
+    departement_nom = LibelleReferentielField('departement', source='departement_id')
     
     class Meta:
         model = Circuit
@@ -41,7 +64,7 @@ class CircuitSerializer(serializers.ModelSerializer):
 # SERIALIZER DÉPARTEMENT
 # ============================================
 class DepartementSerializer(serializers.ModelSerializer):
-    circuits = CircuitSerializer(many=True, read_only=True)
+    circuits = serializers.SerializerMethodField()
     label_complet = serializers.SerializerMethodField()
     
     class Meta:
@@ -52,6 +75,10 @@ class DepartementSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['date_creation']
     
+    def get_circuits(self, obj):
+        """Circuits du département (référentiel en mémoire)"""
+        return CircuitSerializer(referentiel.circuits(obj.id), many=True).data
+
     def get_label_complet(self, obj):
         """Retourne CODE - NOM - X circuits"""
         return f"{obj.numero} - {obj.nom} - {obj.nombre_circuits} circuits"
@@ -66,7 +93,7 @@ class ServiceSerializer(serializers.ModelSerializer):
         model = Service
         fields = [
             'id', 'nom', 'societe', 'description', 'responsable',
-            'responsable_info', 'parentservice', 'actif', 'date_creation'  # ← parentservice SANS underscore
+            'responsable_info', 'parentservice', 'effectif_minimum', 'actif', 'date_creation'  # ← parentservice SANS underscore
         ]
         read_only_fields = ['date_creation']
     
@@ -108,10 +135,16 @@ class CreneauTravailSerializer(serializers.ModelSerializer):
         model = CreneauTravail
         fields = [
             'id', 'nom', 'societe', 'heure_debut', 'heure_fin',
-            'heure_pause_debut', 'heure_pause_fin', 'description',
+            'heure_pause_debut', 'heure_pause_fin', 'jours_semaine', 'description',
             'actif', 'date_creation'
         ]
         read_only_fields = ['date_creation']
+    
+    def validate_jours_semaine(self, value):
+        """Chiffres ISO 1 (lundi) à 7 (dimanche), sans doublon"""
+        if not value or any(c not in '1234567' for c in value) or len(set(value)) != len(value):
+            raise serializers.ValidationError("Format attendu: chiffres 1 (lundi) à 7 (dimanche), ex: '12345'")
+        return ''.join(sorted(value))
 
 # ============================================
 # SERIALIZER ÉQUIPEMENT
@@ -253,6 +286,66 @@ class EquipementInstanceSerializer(serializers.ModelSerializer):
         return delta
 
 
+
+class ItemAffectationSerializer(serializers.Serializer):
+    """Item de EquipementInstanceViewSet.bulk_assign"""
+    equipement = serializers.IntegerField()
+    salarie = serializers.IntegerField(required=False, allow_null=True)
+    numero_serie = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+    model = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+    etat = serializers.ChoiceField(choices=EquipementInstance.ETAT_CHOICES, required=False)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class AffectationMasseSerializer(serializers.Serializer):
+    """Entrée de EquipementInstanceViewSet.bulk_assign"""
+    date_affectation = serializers.DateField(required=False)
+    items = serializers.ListField(child=ItemAffectationSerializer(), allow_empty=False)
+
+
+class RetourMasseSerializer(serializers.Serializer):
+    """Entrée de EquipementInstanceViewSet.bulk_return"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=ID_MAX), allow_empty=False,
+    )
+    date_retrait = serializers.DateField(required=False)
+    etat = serializers.ChoiceField(choices=EquipementInstance.ETAT_CHOICES, required=False)
+
+
+class DepartSerializer(serializers.Serializer):
+    """Entrée de SalarieViewSet.depart"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=ID_MAX), allow_empty=False,
+    )
+    date_sortie = serializers.DateField(required=False, allow_null=True)
+    dry_run = serializers.BooleanField(default=False)
+
+
+# ============================================
+# SERIALIZER HISTORIQUE ÉQUIPEMENT (APPEND-ONLY)
+# ============================================
+class HistoriqueEquipementSerializer(serializers.ModelSerializer):
+    type_display = serializers.CharField(source='get_type_evenement_display', read_only=True)
+    equipement_nom = serializers.CharField(source='equipement.nom', read_only=True, allow_null=True)
+    salarie_matricule = serializers.CharField(source='salarie.matricule', read_only=True, allow_null=True)
+    salarie_nom = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = HistoriqueEquipement
+        fields = [
+            'id', 'instance', 'equipement', 'equipement_nom', 'numero_serie',
+            'salarie', 'salarie_matricule', 'salarie_nom', 'type_evenement',
+            'type_display', 'etat', 'date_effet', 'date_creation'
+        ]
+        read_only_fields = fields
+
+    def get_salarie_nom(self, obj):
+        """Retourne le nom complet du salarié"""
+        if obj.salarie:
+            return f"{obj.salarie.prenom} {obj.salarie.nom}"
+        return None
+
+
 # ============================================
 # SERIALIZER ACCÈS APPLICATION
 # ============================================
@@ -297,10 +390,10 @@ class HoraireSalarieSerializer(serializers.ModelSerializer):
 # SERIALIZER HISTORIQUE SALARIÉ
 # ============================================
 class HistoriqueSalarieSerializer(serializers.ModelSerializer):
-    service_ancien_nom = serializers.CharField(source='service_ancien.nom', read_only=True)
-    service_nouveau_nom = serializers.CharField(source='service_nouveau.nom', read_only=True)
-    grade_ancien_nom = serializers.CharField(source='grade_ancien.nom', read_only=True)
-    grade_nouveau_nom = serializers.CharField(source='grade_nouveau.nom', read_only=True)
+    service_ancien_nom = LibelleReferentielField('service', source='service_ancien_id')
+    service_nouveau_nom = LibelleReferentielField('service', source='service_nouveau_id')
+    grade_ancien_nom = LibelleReferentielField('grade', source='grade_ancien_id')
+    grade_nouveau_nom = LibelleReferentielField('grade', source='grade_nouveau_id')
     
     class Meta:
         model = HistoriqueSalarie
@@ -319,11 +412,11 @@ class SalarieDetailSerializer(serializers.ModelSerializer):
     Serializer COMPLET pour détail salarié avec toutes infos
     INCLUT les équipements affectés
     """
-    service_nom = serializers.CharField(source='service.nom', read_only=True)
-    grade_nom = serializers.CharField(source='grade.nom', read_only=True)
-    societe_nom = serializers.CharField(source='societe.nom', read_only=True)
+    service_nom = LibelleReferentielField('service', source='service_id')
+    grade_nom = LibelleReferentielField('grade', source='grade_id')
+    societe_nom = LibelleReferentielField('societe', source='societe_id')
     responsable_nom = serializers.SerializerMethodField(read_only=True)
-    creneau_nom = serializers.CharField(source='creneau_travail.nom', read_only=True)
+    creneau_nom = LibelleReferentielField('creneau_travail', source='creneau_travail_id')
     departements_list = serializers.SerializerMethodField(read_only=True)
     anciennete = serializers.SerializerMethodField(read_only=True)
     statut_actuel = serializers.SerializerMethodField(read_only=True)
@@ -383,8 +476,8 @@ class SalarieListSerializer(serializers.ModelSerializer):
     """
     Serializer SIMPLE pour liste salariés (infos limitées)
     """
-    service_nom = serializers.CharField(source='service.nom', read_only=True)
-    grade_nom = serializers.CharField(source='grade.nom', read_only=True)
+    service_nom = LibelleReferentielField('service', source='service_id')
+    grade_nom = LibelleReferentielField('grade', source='grade_id')
     jour_mois_naissance = serializers.CharField(read_only=True)
     statut_actuel = serializers.SerializerMethodField(read_only=True)
     anciennete = serializers.SerializerMethodField(read_only=True)
@@ -427,6 +520,28 @@ class SoldeCongeSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['date_derniere_maj']
 
+# ============================================
+# SERIALIZER MOUVEMENT CONGÉ (REGISTRE)
+# ============================================
+class MouvementCongeSerializer(serializers.ModelSerializer):
+    type_display = serializers.CharField(source='get_type_mouvement_display', read_only=True)
+    cree_par_username = serializers.CharField(source='cree_par.username', read_only=True, allow_null=True)
+    
+    class Meta:
+        model = MouvementConge
+        fields = [
+            'id', 'salarie', 'type_mouvement', 'type_display', 'nombre_jours',
+            'periode', 'demande', 'motif', 'cree_par', 'cree_par_username',
+            'date_creation'
+        ]
+        read_only_fields = fields
+
+
+class AjustementSoldeSerializer(serializers.Serializer):
+    """Entrée de SoldeCongeViewSet.ajuster (bornes de SoldeConge : 5 chiffres, 2 décimales)"""
+    nombre_jours = serializers.DecimalField(max_digits=5, decimal_places=2)
+    motif = serializers.CharField(max_length=255)
+
 # ============================================
 # SERIALIZER DEMANDE CONGÉ
 # ============================================
@@ -443,10 +558,35 @@ class DemandeCongeSerializer(serializers.ModelSerializer):
             'valide_par_service', 'date_validation_service', 'commentaire_service',
             'rejete', 'date_rejet', 'motif_rejet', 'date_creation', 'date_modification'
         ]
-        read_only_fields = ['date_creation', 'date_modification']
+        # nombre_jours est calculé côté serveur (jours ouvrés)
+        read_only_fields = ['nombre_jours', 'date_creation', 'date_modification']
     
     def get_salarie_info(self, obj):
         return f"{obj.salarie.prenom} {obj.salarie.nom} ({obj.salarie.matricule})"
+    
+    def validate(self, attrs):
+        """Contrôle chevauchements + effectif minimum du service"""
+        instance = self.instance
+        salarie = attrs.get('salarie', instance.salarie if instance else None)
+        date_debut = attrs.get('date_debut', instance.date_debut if instance else None)
+        date_fin = attrs.get('date_fin', instance.date_fin if instance else None)
+        
+        dates_modifiees = instance is None or any(
+            champ in attrs for champ in ('salarie', 'date_debut', 'date_fin')
+        )
+        if salarie and date_debut and date_fin and dates_modifiees:
+            erreurs = verifier_demande_conge(
+                salarie, date_debut, date_fin,
+                exclude_demande_id=instance.id if instance else None,
+            )
+            if erreurs:
+                raise serializers.ValidationError({'non_field_errors': erreurs})
+            attrs['nombre_jours'] = calculer_nombre_jours(salarie, date_debut, date_fin)
+            if not attrs['nombre_jours']:
+                raise serializers.ValidationError({
+                    'non_field_errors': ['La période ne contient aucun jour travaillé (repos ou jours fériés)']
+                })
+        return attrs
 
 # ============================================
 # SERIALIZER DEMANDE ACOMPTE
@@ -560,8 +700,8 @@ class AmeliorationProposeeSerializer(serializers.ModelSerializer):
 # SERIALIZER FICHE POSTE DÉTAIL
 # ============================================
 class FichePosteDetailSerializer(serializers.ModelSerializer):
-    service_nom = serializers.CharField(source='service.nom', read_only=True)
-    grade_nom = serializers.CharField(source='grade.nom', read_only=True)
+    service_nom = LibelleReferentielField('service', source='service_id')
+    grade_nom = LibelleReferentielField('grade', source='grade_id')
     responsable_info = serializers.SerializerMethodField(read_only=True)
     
     responsable_service = serializers.PrimaryKeyRelatedField(
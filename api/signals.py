@@ -2,71 +2,226 @@
 # SIGNALS.PY - CRÉER USER AUTOMATIQUEMENT QUAND ON CRÉE UN SALARIE
 # ============================================================================
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, post_migrate, m2m_changed
+from django.db.backends.signals import connection_created
+from django.db import connections
 from django.dispatch import receiver
-from django.contrib.auth.models import User, Group
-from .models import Salarie, FicheParametresUser
+from .models import (
+    Salarie, HistoriqueSalarie, Service, Departement, Grade,
+    Societe, Circuit, CreneauTravail,
+    DemandeConge, DemandeSortie, TravauxExceptionnels,
+    Equipement, EquipementInstance,
+)
+from .calendrier_utils import invalider_calendrier
+from .statistiques_utils import invalider_statistiques_equipements
+from .recherche_utils import (
+    reindexer_salaries, installer_fts_sqlite, CHAMPS_RECHERCHE_SALARIE,
+)
+from .autocomplete_utils import cache_autocomplete
+from .referentiel_utils import invalider_referentiel
+from .etag_utils import installer_detecteur_ecritures
+from .onboarding_utils import creer_comptes_salaries, creation_user_active
+
+# Champs de Salarie recopiés sur le User lié
+CHAMPS_SYNCHRONISES_USER = ('nom', 'prenom', 'mail_professionnel')
+
+# Champs de Salarie affichés / utilisés par le calendrier d'équipe
+CHAMPS_CALENDRIER_SALARIE = ('service', 'statut', 'nom', 'prenom', 'matricule')
+
 
-@receiver(post_save, sender=Salarie)
 def create_user_for_salarie(sender, instance, created, **kwargs):
     """
     Signal: Crée automatiquement un User quand on crée un Salarie
     
     ✅ Username = matricule du salarié
     ✅ Email = email professionnel du salarié
-    ✅ Password = aléatoire (à changer)
+    ✅ Password = inutilisable (réinitialisation requise avant la première connexion)
     ✅ Group = 'salarie' par défaut
     ✅ Assigne les paramètres utilisateur
+    ⏸️  Désactivé dans creation_user_suspendue() (imports : creer_comptes_salaries en masse)
     """
-    if created and not instance.user:  # Si nouveau salarié ET pas de user
+    if created and not instance.user and creation_user_active():
         try:
-            # 1️⃣ CRÉER LE USER
-            user = User.objects.create_user(
-                username=instance.matricule,  # Unique!
-                email=instance.mail_professionnel or f"{instance.matricule}@msi.tn",
-                first_name=instance.prenom,
-                last_name=instance.nom,
-                password='TempPassword2026!'  # À CHANGER!
-            )
-            
-            # 2️⃣ ASSIGNER LE GROUP 'salarie' PAR DÉFAUT
-            try:
-                salarie_group = Group.objects.get(name='salarie')
-                user.groups.add(salarie_group)
-                print(f"✅ {user.username} assigné au group 'salarie'")
-            except Group.DoesNotExist:
-                print(f"⚠️  Group 'salarie' n'existe pas! Crée-le d'abord.")
-            
-            # 3️⃣ LIER LE USER AU SALARIE
-            instance.user = user
-            instance.save(update_fields=['user'])
-            
-            # 4️⃣ CRÉER LES PARAMÈTRES UTILISATEUR
-            FicheParametresUser.objects.get_or_create(
-                user=user,
-                defaults={
-                    'theme': 'light',
-                    'langue': 'fr',
-                    'notifications_actives': True
-                }
-            )
-            
-            print(f"✅ User créé pour {instance.prenom} {instance.nom}")
-            print(f"   📧 Email: {user.email}")
-            print(f"   🔑 Password temporaire: TempPassword2026! (À CHANGER!)")
-            
+            resultat = creer_comptes_salaries([instance])
+            if resultat['ignores']:
+                print(f"⚠️  {resultat['ignores'][0]['raison']}")
+            else:
+                print(f"✅ User créé pour {instance.prenom} {instance.nom}")
+                print(f"   🔑 Mot de passe à initialiser (réinitialisation)")
         except Exception as e:
             print(f"❌ ERREUR lors de la création du user pour {instance.matricule}: {str(e)}")
 
 
-@receiver(post_save, sender=Salarie)
 def update_user_for_salarie(sender, instance, created, **kwargs):
     """
     Signal: Met à jour le User quand on modifie un Salarie
+    Seulement si nom, prénom ou email professionnel ont changé
+    """
+    if created or not instance.user_id:
+        return
+    if not instance.a_change(*CHAMPS_SYNCHRONISES_USER):
+        return
+    user = instance.user
+    user.first_name = instance.prenom
+    user.last_name = instance.nom
+    user.email = instance.mail_professionnel or user.email
+    user.save(update_fields=['first_name', 'last_name', 'email'])
+    print(f"✅ User {instance.matricule} mis à jour")
+
+
+def connecter_comptes_salaries():
     """
-    if not created and instance.user:  # Si modification + user existe
-        instance.user.first_name = instance.prenom
-        instance.user.last_name = instance.nom
-        instance.user.email = instance.mail_professionnel or instance.user.email
-        instance.user.save()
-        print(f"✅ User {instance.matricule} mis à jour")
+    Connecte les signaux de comptes User (appelé par ApiConfig.ready)
+    - création du compte à l'embauche (suspendue pendant les imports)
+    - synchronisation nom / prénom / email quand ils changent
+    """
+    post_save.connect(create_user_for_salarie, sender=Salarie, dispatch_uid='create_user_for_salarie')
+    post_save.connect(update_user_for_salarie, sender=Salarie, dispatch_uid='update_user_for_salarie')
+
+
+# ============================================================================
+# HISTORIQUE SALARIÉ - CHANGEMENT DE SERVICE / GRADE
+# ============================================================================
+
+@receiver(post_save, sender=Salarie)
+def historiser_salarie(sender, instance, created, **kwargs):
+    """Signal: une ligne HistoriqueSalarie quand le service ou le grade change"""
+    if created:
+        return
+    modifies = instance.champs_modifies()
+    if not any(champ in modifies for champ in HistoriqueSalarie.CHAMPS_HISTORISES):
+        return
+    avant = {champ: getattr(instance, champ) for champ in HistoriqueSalarie.CHAMPS_HISTORISES}
+    apres = dict(avant)
+    for champ in HistoriqueSalarie.CHAMPS_HISTORISES:
+        if champ in modifies:
+            avant[champ] = modifies[champ][0]
+    HistoriqueSalarie.enregistrer_changements(
+        [(instance.pk, avant, apres)], motif='Modification de la fiche salarié'
+    )
+
+
+# ============================================================================
+# CALENDRIER D'ÉQUIPE - INVALIDATION DU CACHE
+# ============================================================================
+
+@receiver([post_save, post_delete], sender=DemandeConge)
+@receiver([post_save, post_delete], sender=DemandeSortie)
+@receiver([post_save, post_delete], sender=TravauxExceptionnels)
+def invalider_calendrier_demande(sender, instance, **kwargs):
+    """Signal: une demande modifiée invalide le calendrier de son service"""
+    salarie = Salarie.objects.filter(id=instance.salarie_id).values('service_id').first()
+    if salarie:
+        invalider_calendrier(salarie['service_id'])
+
+
+@receiver(post_save, sender=Salarie)
+def invalider_calendrier_salarie(sender, instance, created, **kwargs):
+    """Signal: un salarié ajouté / déplacé / renommé invalide le calendrier de ses services"""
+    if not created and not instance.a_change(*CHAMPS_CALENDRIER_SALARIE):
+        return
+    ancien_service = instance.champs_modifies().get('service_id', (None,))[0]
+    for service_id in {instance.service_id, ancien_service}:
+        invalider_calendrier(service_id)
+
+
+@receiver(post_delete, sender=Salarie)
+def invalider_calendrier_salarie_supprime(sender, instance, **kwargs):
+    """Signal: un salarié supprimé invalide le calendrier de son service"""
+    invalider_calendrier(instance.service_id)
+
+
+# ============================================================================
+# STATISTIQUES ÉQUIPEMENTS - INVALIDATION DU CACHE
+# ============================================================================
+
+@receiver([post_save, post_delete], sender=Equipement)
+@receiver([post_save, post_delete], sender=EquipementInstance)
+def invalider_statistiques_equipement(sender, **kwargs):
+    """Signal: toute écriture d'équipement / instance invalide les statistiques"""
+    invalider_statistiques_equipements()
+
+
+# ============================================================================
+# RECHERCHE PLEIN TEXTE - TEXTE_RECHERCHE DES SALARIÉS
+# ============================================================================
+
+@receiver(post_save, sender=Salarie)
+def indexer_salarie(sender, instance, created, **kwargs):
+    """
+    Signal: recalcule texte_recherche si un champ indexé a changé
+    L'instance reçoit le texte indexé (l'INSERT a écrit celui d'avant le calcul)
+    """
+    if created or instance.a_change(*CHAMPS_RECHERCHE_SALARIE):
+        reindexer_salaries([instance.pk])
+        instance.texte_recherche = (
+            Salarie.objects.filter(pk=instance.pk).values_list('texte_recherche', flat=True).first() or ''
+        )
+
+
+@receiver(m2m_changed, sender=Salarie.departements.through)
+def indexer_departements_salarie(sender, instance, action, reverse, pk_set, **kwargs):
+    """Signal: départements ajoutés / retirés (salarie.departements ou departement.salaries)"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            reindexer_salaries([instance.pk])
+    elif action == 'pre_clear':
+        instance._salaries_a_reindexer = list(instance.salaries.values_list('id', flat=True))
+    elif action == 'post_clear':
+        reindexer_salaries(getattr(instance, '_salaries_a_reindexer', []))
+    elif action in ('post_add', 'post_remove'):
+        reindexer_salaries(pk_set)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=Departement)
+def indexer_salaries_rattaches(sender, instance, created, **kwargs):
+    """Signal: service / département renommé (seules les lignes changées sont réécrites)"""
+    if not created:
+        reindexer_salaries(instance.salaries.values_list('id', flat=True))
+
+
+@receiver(post_migrate)
+def installer_recherche(sender, using, **kwargs):
+    """Signal: (ré)installe la table FTS5 et ses triggers sous SQLite"""
+    if sender.name == 'api':
+        installer_fts_sqlite(connections[using])
+
+
+# ============================================================================
+# AUTOCOMPLÉTION - INVALIDATION DU LRU DU PROCESSUS
+# ============================================================================
+
+@receiver([post_save, post_delete], sender=Salarie)
+@receiver([post_save, post_delete], sender=Service)
+@receiver([post_save, post_delete], sender=Grade)
+@receiver([post_save, post_delete], sender=Departement)
+@receiver([post_save, post_delete], sender=Equipement)
+def vider_cache_autocomplete(sender, **kwargs):
+    """Signal: toute écriture d'une entité proposée vide les suggestions en cache"""
+    cache_autocomplete.vider()
+
+
+# ============================================================================
+# RÉFÉRENTIEL - INVALIDATION DES DONNÉES DE RÉFÉRENCE EN MÉMOIRE
+# ============================================================================
+
+@receiver([post_save, post_delete], sender=Societe)
+@receiver([post_save, post_delete], sender=Service)
+@receiver([post_save, post_delete], sender=Grade)
+@receiver([post_save, post_delete], sender=Departement)
+@receiver([post_save, post_delete], sender=Circuit)
+@receiver([post_save, post_delete], sender=CreneauTravail)
+def invalider_donnees_reference(sender, **kwargs):
+    """Signal: toute écriture d'une table de référence change la version du référentiel"""
+    invalider_referentiel()
+
+
+# ============================================================================
+# REQUÊTES CONDITIONNELLES - DÉTECTION DES ÉCRITURES
+# ============================================================================
+
+@receiver(connection_created)
+def detecter_ecritures(sender, connection, **kwargs):
+    """Signal: chaque nouvelle connexion signale ses écritures (version des données / ETag)"""
+    installer_detecteur_ecritures(connection)
@@ -0,0 +1,115 @@
+# ============================================================================
+# STATISTIQUES_UTILS.PY - STATISTIQUES DES ÉQUIPEMENTS
+# ============================================================================
+# Une seule requête groupée (équipement × service du détenteur) avec
+# agrégations conditionnelles ; les totaux par type / état / service sont
+# repliés en Python. Résultat en cache, invalidé au commit de chaque écriture
+# d'équipement ou d'instance (signals.py + opérations en masse).
+# ============================================================================
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Equipement, EquipementInstance
+
+
+STATISTIQUES_CACHE_KEY = 'equipements:statistiques'
+STATISTIQUES_CACHE_TIMEOUT = 60 * 10
+
+
+def _supprimer_statistiques():
+    cache.delete(STATISTIQUES_CACHE_KEY)
+
+
+def invalider_statistiques_equipements():
+    """
+    Invalide les statistiques en cache, au commit : avant, un lecteur
+    concurrent remettrait en cache l'état non commité pour tout le TTL
+    Un seul callback par transaction (une écriture par instance dans les lots)
+    """
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and any(
+        entree[1] is _supprimer_statistiques for entree in connection.run_on_commit
+    ):
+        return
+    transaction.on_commit(_supprimer_statistiques)
+
+
+def calculer_statistiques_equipements():
+    """Calcule les statistiques (sans cache) en une requête"""
+    etats = [code for code, _ in EquipementInstance.ETAT_CHOICES]
+    lignes = (
+        Equipement.objects
+        .values(
+            'id', 'type_equipement', 'stock_total', 'stock_disponible',
+            'instances__salarie__service', 'instances__salarie__service__nom',
+        )
+        .annotate(
+            nb_instances=Count('instances'),
+            nb_affectees=Count('instances', filter=Q(instances__date_retrait__isnull=True)),
+            **{
+                f'etat_{code}': Count('instances', filter=Q(instances__etat=code))
+                for code in etats
+            },
+        )
+        .order_by()
+    )
+
+    equipements_vus = set()
+    par_type = {}
+    par_etat = dict.fromkeys(etats, 0)
+    par_service = {}
+    total_instances = total_affectees = 0
+
+    for ligne in lignes:
+        type_ = par_type.setdefault(ligne['type_equipement'], {
+            'type_equipement': ligne['type_equipement'],
+            'count': 0, 'stock_total': 0, 'stock_disponible': 0,
+            'instances': 0, 'affectees': 0,
+        })
+        # Une ligne par (équipement, service) : le stock n'est compté qu'une fois
+        if ligne['id'] not in equipements_vus:
+            equipements_vus.add(ligne['id'])
+            type_['count'] += 1
+            type_['stock_total'] += ligne['stock_total']
+            type_['stock_disponible'] += ligne['stock_disponible']
+
+        if not ligne['nb_instances']:
+            continue
+
+        type_['instances'] += ligne['nb_instances']
+        type_['affectees'] += ligne['nb_affectees']
+        total_instances += ligne['nb_instances']
+        total_affectees += ligne['nb_affectees']
+
+        service = par_service.setdefault(ligne['instances__salarie__service'], {
+            'service_id': ligne['instances__salarie__service'],
+            'service_nom': ligne['instances__salarie__service__nom'] or 'Sans service',
+            'instances': 0, 'affectees': 0,
+            'par_etat': dict.fromkeys(etats, 0),
+        })
+        service['instances'] += ligne['nb_instances']
+        service['affectees'] += ligne['nb_affectees']
+        for code in etats:
+            par_etat[code] += ligne[f'etat_{code}']
+            service['par_etat'][code] += ligne[f'etat_{code}']
+
+    return {
+        'total_equipements': len(equipements_vus),
+        'total_instances': total_instances,
+        'instances_actives': total_affectees,
+        'instances_retournees': total_instances - total_affectees,
+        'par_type': sorted(par_type.values(), key=lambda t: -t['count']),
+        'par_etat': [{'etat': code, 'count': n} for code, n in par_etat.items() if n],
+        'par_service': sorted(par_service.values(), key=lambda s: -s['instances']),
+    }
+
+
+def statistiques_equipements():
+    """Statistiques des équipements (depuis le cache si disponibles)"""
+    return cache.get_or_set(
+        STATISTIQUES_CACHE_KEY,
+        calculer_statistiques_equipements,
+        STATISTIQUES_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,198 @@
+# ============================================================================
+# STOCK_UTILS.PY - RÉCONCILIATION DES STOCKS D'ÉQUIPEMENTS
+# ============================================================================
+# stock_affecte (instances affectées) est maintenu par incréments F()
+# (Equipement.ajuster_stocks) lors des affectations / retraits, et
+# stock_disponible en est déduit. Les écritures en masse (queryset.update,
+# queryset.delete) ne passent pas par save() : verifier_stocks() compare tous
+# les équipements au décompte réel en une requête groupée.
+# ============================================================================
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Equipement, EquipementInstance, HistoriqueEquipement, Salarie
+from .statistiques_utils import invalider_statistiques_equipements
+
+
+def verifier_stocks():
+    """
+    Équipements dont stock_affecte / stock_disponible diffère du décompte des instances affectées
+    Une seule requête (COUNT conditionnel groupé par équipement)
+    Retourne une liste de dicts: id, nom, stock_total, stock_disponible, stock_affecte, affectes, attendu
+    """
+    lignes = (
+        Equipement.objects
+        .annotate(affectes=Count('instances', filter=Q(instances__date_retrait__isnull=True)))
+        .order_by('id')
+        .values('id', 'nom', 'stock_total', 'stock_disponible', 'stock_affecte', 'affectes')
+    )
+    ecarts = []
+    for ligne in lignes:
+        attendu = max(0, ligne['stock_total'] - ligne['affectes'])
+        if ligne['stock_disponible'] != attendu or ligne['stock_affecte'] != ligne['affectes']:
+            ecarts.append({**ligne, 'attendu': attendu})
+    return ecarts
+
+
+def recalculate_all_stock(dry_run=False, batch_size=500):
+    """
+    Réconcilie le stock de tous les équipements
+    - une requête groupée, un bulk_update des seuls équipements en écart
+    Retourne la liste des écarts corrigés (ou à corriger si dry_run)
+    """
+    with transaction.atomic():
+        ecarts = verifier_stocks()
+        if ecarts and not dry_run:
+            Equipement.objects.bulk_update(
+                [
+                    Equipement(id=e['id'], stock_disponible=e['attendu'], stock_affecte=e['affectes'])
+                    for e in ecarts
+                ],
+                ['stock_disponible', 'stock_affecte'],
+                batch_size=batch_size,
+            )
+            invalider_statistiques_equipements()
+    return ecarts
+
+
+# ============================================================================
+# AFFECTATIONS / RETOURS EN MASSE
+# ============================================================================
+
+def affecter_en_masse(items, date_affectation):
+    """
+    Crée les instances d'une liste de (equipement, salarie, numero_serie)
+    items: dicts validés par AffectationMasseSerializer
+    - validation des équipements (verrouillés), salariés et numéros de série : 3 requêtes
+    - un bulk_create, un UPDATE de stock par équipement, un INSERT d'historique
+    Tout ou rien : retourne (instances, erreurs) avec erreurs = [{'index', 'erreur'}]
+    """
+    erreurs = []
+    equipement_ids = {item['equipement'] for item in items}
+    salarie_ids = {item['salarie'] for item in items if item.get('salarie')}
+    numeros = [item['numero_serie'] for item in items if item.get('numero_serie')]
+
+    with transaction.atomic():
+        # Verrou des équipements : deux lots concurrents ne consomment pas le même stock
+        stocks = dict(
+            Equipement.objects.select_for_update()
+            .filter(id__in=equipement_ids, actif=True)
+            .order_by('id').values_list('id', 'stock_disponible')
+        )
+        salaries_valides = set(
+            Salarie.objects.filter(id__in=salarie_ids).values_list('id', flat=True)
+        )
+        numeros_existants = set(
+            EquipementInstance.objects.filter(numero_serie__in=numeros)
+            .values_list('numero_serie', flat=True)
+        )
+
+        vus = set()
+        demandes = {}
+        for index, item in enumerate(items):
+            numero = item.get('numero_serie') or None
+            if item['equipement'] not in stocks:
+                erreurs.append({'index': index, 'erreur': 'Équipement introuvable ou inactif'})
+            elif item.get('salarie') and item['salarie'] not in salaries_valides:
+                erreurs.append({'index': index, 'erreur': 'Salarié introuvable'})
+            elif numero in numeros_existants:
+                erreurs.append({'index': index, 'erreur': f'Numéro de série {numero} déjà enregistré'})
+            elif numero and numero in vus:
+                erreurs.append({'index': index, 'erreur': f'Numéro de série {numero} en double'})
+            else:
+                demandes[item['equipement']] = demandes.get(item['equipement'], 0) + 1
+                if demandes[item['equipement']] > stocks[item['equipement']]:
+                    erreurs.append({
+                        'index': index,
+                        'erreur': f"Stock insuffisant ({stocks[item['equipement']]} disponible(s))",
+                    })
+            if numero:
+                vus.add(numero)
+
+        if erreurs:
+            return [], erreurs
+
+        instances = EquipementInstance.objects.bulk_create([
+            EquipementInstance(
+                equipement_id=item['equipement'],
+                salarie_id=item.get('salarie'),
+                numero_serie=item.get('numero_serie') or None,
+                model=item.get('model') or None,
+                etat=item.get('etat') or 'bon',
+                notes=item.get('notes') or None,
+                date_affectation=date_affectation,
+            )
+            for item in items
+        ])
+        Equipement.ajuster_stocks(Counter(i.equipement_id for i in instances))
+        HistoriqueEquipement.objects.bulk_create([
+            evenement
+            for instance in instances
+            for evenement in HistoriqueEquipement.evenements_transition(
+                instance.pk, None,
+                {champ: getattr(instance, champ) for champ in EquipementInstance.CHAMPS_SUIVIS},
+            )
+        ])
+    # bulk_create / update() ne déclenchent pas post_save
+    invalider_statistiques_equipements()
+    return instances, []
+
+
+def retourner_en_masse(queryset, ids, date_retrait, etat=None):
+    """
+    Clôture (date_retrait) les instances affectées parmi `ids`
+    Une instance affectée après date_retrait est laissée ouverte ('date_anterieure')
+    - un SELECT, un UPDATE, un UPDATE de stock par équipement, un INSERT d'historique
+    Retourne {'total', 'succes', 'echecs', 'resultats': [{'id', 'resultat'}]}
+    """
+    with transaction.atomic():
+        lignes = {
+            ligne['id']: ligne
+            for ligne in queryset.filter(id__in=ids).select_for_update()
+            .order_by().values('id', *EquipementInstance.CHAMPS_SUIVIS)
+        }
+        a_retourner = [
+            i for i in ids
+            if i in lignes and lignes[i]['date_retrait'] is None
+            and lignes[i]['date_affectation'] <= date_retrait
+        ]
+
+        valeurs = {'date_retrait': date_retrait}
+        if etat:
+            valeurs['etat'] = etat
+        EquipementInstance.objects.filter(id__in=a_retourner).update(**valeurs)
+        Equipement.ajuster_stocks({
+            equipement_id: -n
+            for equipement_id, n in Counter(lignes[i]['equipement_id'] for i in a_retourner).items()
+        })
+        HistoriqueEquipement.objects.bulk_create([
+            evenement
+            for i in a_retourner
+            for evenement in HistoriqueEquipement.evenements_transition(
+                i, lignes[i], {**lignes[i], **valeurs},
+            )
+        ])
+    if a_retourner:
+        invalider_statistiques_equipements()
+
+    resultats = []
+    for id_instance in ids:
+        if id_instance not in lignes:
+            resultat = 'introuvable'
+        elif id_instance in a_retourner:
+            resultat = 'ok'
+        elif lignes[id_instance]['date_retrait'] is not None:
+            resultat = 'deja_retire'
+        else:
+            resultat = 'date_anterieure'
+        resultats.append({'id': id_instance, 'resultat': resultat})
+
+    return {
+        'total': len(ids),
+        'succes': len(a_retourner),
+        'echecs': len(ids) - len(a_retourner),
+        'resultats': resultats,
+    }
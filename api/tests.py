@@ -1,3 +1,1342 @@
-from django.test import TestCase
+import io
+import re
+import time as time_module
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache, caches
+from django.db import DatabaseError, OperationalError, connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .absences_utils import verifier_demande_conge
+from .affectations_utils import detenteur_a_date, equipements_detenus_a_date
+from .autocomplete_utils import cache_autocomplete, suggestions
+from .cache_backends import CacheDeuxNiveaux, ErreurRedis, RespCache, cache_partage
+from .conges_utils import (
+    ajuster_solde, annuler_consommations, crediter_acquisition_mensuelle, enregistrer_consommations,
+    recalculer_solde,
+)
+from .calendrier_utils import calendrier_service, version_calendrier
+from .depart_utils import salaries_a_traiter, traiter_departs
+from .etag_utils import VERSION_CACHE_KEY as ETAG_VERSION_CACHE_KEY, _marquer_ecriture, version_donnees
+from .faux_redis import FauxRedis
+from .inventaire_utils import rapprocher_inventaire
+from .jours_ouvres_utils import calculer_nombre_jours, compter_jours_ouvres, date_paques, jours_feries
+from .metriques_utils import Metriques, MesureRequete, exporter_prometheus, instantanes_workers
+from .nplus1_utils import DetecteurNPlusUn, ErreurNPlusUn, detecter_nplus1
+from .onboarding_utils import creation_user_suspendue
+from .recherche_globale_utils import SOURCES_RECHERCHE, _executer, recherche_globale
+from .recherche_utils import rechercher_salaries
+from .referentiel_utils import invalider_referentiel, referentiel
+from .serializers import SalarieListSerializer
+from .statistiques_utils import _supprimer_statistiques, statistiques_equipements
+from .stock_utils import recalculate_all_stock, verifier_stocks
+from .timeline_utils import lire_curseur, timeline_salarie
+from .urls import router
+from .workflow_utils import appliquer_transition_en_masse
+from .models import (
+    Societe, Service, Grade, Salarie, DemandeConge, DemandeSortie, DemandeAcompte, TravauxExceptionnels,
+    EquipementInstance, DocumentSalarie, HistoriqueSalarie, ImportLog, Departement, Circuit, TypeAcces,
+    OutilTravail, CreneauTravail, Equipement, TypeApplicationAcces, AccesApplication, AccesSalarie,
+    HoraireSalarie, SoldeConge, MouvementConge, FichePoste, AmeliorationProposee, OutilFichePoste,
+    FicheParametresUser, HistoriqueEquipement, Role,
+)
+
+
+# ============================================================================
+# PLANS DE REQUÊTES - INDEX DES FILTRES / TRIS DES VIEWSETS
+# ============================================================================
+
+class PlansRequetesTests(TestCase):
+    """
+    Les requêtes chaudes des viewsets (filterset_fields + tri par défaut,
+    première page) doivent passer par l'index prévu, qui fournit aussi l'ordre
+    - SQLite : EXPLAIN QUERY PLAN, échec si l'index attendu n'apparaît pas ou
+      sur « USE TEMP B-TREE FOR ORDER BY » (tri hors index)
+    - PostgreSQL : EXPLAIN avec enable_seqscan = off, mêmes vérifications
+      (nom de l'index, pas de nœud Sort)
+    """
+
+    def _plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}', params)
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return '\n'.join(str(ligne[-1]) for ligne in cursor.fetchall())
+
+    def assertUtiliseIndex(self, queryset, index):
+        plan = self._plan(queryset)
+        contexte = f'{queryset.query}\n{plan}'
+        self.assertRegex(plan, rf'\b{index}\b', f'Index {index} non utilisé :\n{contexte}')
+        if connection.vendor == 'postgresql':
+            tri = re.search(r'^\s*(->\s*)?(Incremental )?Sort\b', plan, re.MULTILINE)
+        else:
+            tri = re.search(r'USE TEMP B-TREE FOR .*ORDER BY', plan)
+        self.assertIsNone(tri, f'Tri hors index :\n{contexte}')
+
+    def setUp(self):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            self.skipTest('Plans vérifiés pour PostgreSQL et SQLite uniquement')
+
+    def test_salaries(self):
+        salaries = Salarie.objects
+        self.assertUtiliseIndex(salaries.order_by('nom', 'prenom')[:20], 'salarie_nom_prenom_idx')
+        self.assertUtiliseIndex(
+            salaries.filter(statut='actif').order_by('nom', 'prenom')[:20], 'salarie_statut_nom_idx',
+        )
+        self.assertUtiliseIndex(
+            salaries.filter(service_id=1).order_by('nom', 'prenom')[:20], 'salarie_service_nom_idx',
+        )
+        self.assertUtiliseIndex(
+            salaries.filter(date_sortie__lte=date(2026, 1, 1)).order_by(), 'salarie_sortie_idx',
+        )
+
+    def test_demandes_conge(self):
+        demandes = DemandeConge.objects
+        self.assertUtiliseIndex(demandes.order_by('-date_creation')[:20], 'demandeconge_creation_idx')
+        self.assertUtiliseIndex(
+            demandes.filter(salarie_id=1).order_by('-date_creation')[:20], 'demandeconge_salarie_idx',
+        )
+        self.assertUtiliseIndex(
+            demandes.filter(statut='soumise').order_by('-date_creation')[:20], 'demandeconge_statut_idx',
+        )
+        self.assertUtiliseIndex(
+            demandes.filter(type_conge='cp').order_by('-date_creation')[:20], 'demandeconge_type_idx',
+        )
+        self.assertUtiliseIndex(demandes.filter(
+            statut='approuvée', date_debut__lte=date(2026, 7, 31), date_fin__gte=date(2026, 7, 1),
+        ).order_by(), 'demandeconge_statut_debut_idx')
+
+    def test_autres_demandes(self):
+        for model, champ_date, prefixe in (
+            (DemandeSortie, 'date_sortie', 'sortie'),
+            (TravauxExceptionnels, 'date_travail', 'travaux'),
+            (DemandeAcompte, 'date_demande', 'acompte'),
+        ):
+            with self.subTest(model=model.__name__):
+                tri = f'-{champ_date}'
+                self.assertUtiliseIndex(model.objects.order_by(tri)[:20], f'{prefixe}_date_idx')
+                self.assertUtiliseIndex(
+                    model.objects.filter(salarie_id=1).order_by(tri)[:20], f'{prefixe}_salarie_date_idx',
+                )
+                self.assertUtiliseIndex(
+                    model.objects.filter(statut='soumise').order_by(tri)[:20], f'{prefixe}_statut_date_idx',
+                )
+
+    def test_equipements_affectes(self):
+        instances = EquipementInstance.objects
+        self.assertUtiliseIndex(instances.order_by('-date_affectation')[:20], 'equipinst_affectation_idx')
+        self.assertUtiliseIndex(
+            instances.filter(etat='bon').order_by('-date_affectation')[:20], 'equipinst_etat_date_idx',
+        )
+        self.assertUtiliseIndex(
+            instances.filter(salarie_id=1, date_retrait__isnull=True).order_by(), 'equipinst_ouvert_salarie_idx',
+        )
+        self.assertUtiliseIndex(
+            instances.filter(equipement_id=1, date_retrait__isnull=True).order_by(), 'equipinst_ouvert_equip_idx',
+        )
+
+    def test_documents_historique_imports(self):
+        documents = DocumentSalarie.objects
+        self.assertUtiliseIndex(documents.order_by('-date_upload')[:20], 'document_date_idx')
+        self.assertUtiliseIndex(
+            documents.filter(salarie_id=1).order_by('-date_upload')[:20], 'document_salarie_date_idx',
+        )
+        self.assertUtiliseIndex(
+            documents.filter(type_document='contrat').order_by('-date_upload')[:20], 'document_type_date_idx',
+        )
+        self.assertUtiliseIndex(
+            HistoriqueSalarie.objects.filter(salarie_id=1).order_by('-date_changement'), 'histosal_salarie_date_idx',
+        )
+        self.assertUtiliseIndex(
+            ImportLog.objects.filter(api_name='salaries').order_by('-date_creation')[:20], 'importlog_api_date_idx',
+        )
+        self.assertUtiliseIndex(
+            HistoriqueEquipement.objects.filter(instance_id=1).order_by('-date_effet', '-id'),
+            'histoequip_instance_date_idx',
+        )
+
+
+# ============================================================================
+# CACHE PARTAGÉ (SERVEUR DE SUBSTITUTION)
+# ============================================================================
+
+class CachePartageTests(SimpleTestCase):
+    """RespCache et CacheDeuxNiveaux contre le faux serveur Redis"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.serveur = FauxRedis(('127.0.0.1', 0)).demarrer()
+        cls.addClassCleanup(cls.serveur.arreter)
+
+    def _caches(self):
+        partage = {'BACKEND': 'api.cache_backends.RespCache', 'LOCATION': self.serveur.url}
+        deux_niveaux = {
+            'BACKEND': 'api.cache_backends.CacheDeuxNiveaux',
+            'OPTIONS': {'PARTAGE': 'partage', 'VERIFICATION': 0},
+        }
+        return override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'partage': partage, 'worker1': deux_niveaux, 'worker2': deux_niveaux,
+        })
+
+    def setUp(self):
+        reglages = self._caches()
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        caches['partage'].clear()
+
+    def test_operations_partagees(self):
+        cache = caches['partage']
+        self.assertIsInstance(cache, RespCache)
+        cache.set('a', {'x': 1}, 60)
+        cache.set('n', 5)
+        self.assertEqual(cache.get('a'), {'x': 1})
+        self.assertEqual(cache.incr('n', 3), 8)
+        self.assertRaises(ValueError, cache.incr, 'absent')
+        self.assertFalse(cache.has_key('absent'))
+        self.assertFalse(cache.add('a', 'autre'))
+        self.assertEqual(cache.get_many(['a', 'n', 'absent']), {'a': {'x': 1}, 'n': 8})
+        cache.set('court', 1, 0)
+        self.assertIsNone(cache.get('court'))
+        self.assertTrue(cache.delete('a'))
+        self.assertEqual(cache.get('a', 'defaut'), 'defaut')
+
+    def test_invalidation_entre_workers(self):
+        worker1, worker2 = caches['worker1'], caches['worker2']
+        self.assertIsInstance(worker1, CacheDeuxNiveaux)
+        worker1.set('cle', 'v1')
+        self.assertEqual(worker2.get('cle'), 'v1')
+        self.assertEqual(worker2.get('cle'), 'v1')
+        self.assertEqual(worker2.statistiques()['hits_local'], 1)
+        worker1.delete('cle')
+        self.assertIsNone(worker2.get('cle'))
+
+    def test_cle_sans_expiration_invalide_workers(self):
+        worker1, worker2 = caches['worker1'], caches['worker2']
+        worker1.set('version', 1.0, None)
+        self.assertEqual(worker2.get('version'), 1.0)
+        worker1.set('version', 2.0, None)
+        self.assertEqual(worker2.get('version'), 2.0)
+        self.assertIs(cache_partage('worker1'), caches['partage'])
+
+    def test_version_etag_lue_dans_le_partage(self):
+        deux_niveaux = {
+            'BACKEND': 'api.cache_backends.CacheDeuxNiveaux',
+            'OPTIONS': {'PARTAGE': 'partage', 'VERIFICATION': 60},
+        }
+        with override_settings(CACHES={**settings.CACHES, 'default': deux_niveaux}):
+            caches['default'].set(ETAG_VERSION_CACHE_KEY, 1.0, 60)
+            # Écriture validée par un autre worker, directement dans le partagé
+            caches['partage'].set(ETAG_VERSION_CACHE_KEY, 2.0, None)
+            self.assertEqual(caches['default'].get(ETAG_VERSION_CACHE_KEY), 1.0)
+            self.assertEqual(version_donnees(), 2.0)
+            _marquer_ecriture()
+            self.assertGreater(caches['partage'].get(ETAG_VERSION_CACHE_KEY), 2.0)
+
+    def test_erreur_serveur_dans_un_pipeline(self):
+        client = caches['partage'].client
+        with self.assertRaises(ErreurRedis):
+            client.pipeline([('SET', 's', 'x'), ('INCRBY', 's', 1), ('SET', 't', 'y')])
+        self.assertEqual(client.pipeline([('GET', 's'), ('GET', 't')]), [b'x', b'y'])
+
+    def test_serveur_indisponible(self):
+        cache = RespCache('redis://127.0.0.1:1/0', {'OPTIONS': {'SOCKET_TIMEOUT': 0.1}})
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+        statistiques = cache.statistiques()
+        self.assertEqual(statistiques['erreurs'], 2)
+        self.assertIsNone(statistiques['cles'])
+
+
+# ============================================================================
+# RÉFÉRENTIEL EN MÉMOIRE
+# ============================================================================
+
+class ReferentielTests(TestCase):
+    """Libellés service / grade servis sans requête, rechargés après écriture"""
+
+    def setUp(self):
+        societe = Societe.objects.create(nom='MSI')
+        self.service = Service.objects.create(nom='IT', societe=societe)
+        grade = Grade.objects.create(nom='G1', societe=societe)
+        for i in range(5):
+            Salarie.objects.create(
+                nom=f'N{i}', prenom=f'P{i}', matricule=f'M{i}', genre='m',
+                societe=societe, service=self.service, grade=grade,
+            )
+
+    def test_libelles_sans_requete(self):
+        salaries = list(Salarie.objects.prefetch_related('departements').order_by('id'))
+        referentiel.donnees()
+        with self.assertNumQueries(0):
+            donnees = SalarieListSerializer(salaries, many=True).data
+        self.assertEqual({d['service_nom'] for d in donnees}, {'IT'})
+        self.assertEqual({d['grade_nom'] for d in donnees}, {'G1'})
+
+    def test_invalidation_apres_ecriture(self):
+        self.assertEqual(referentiel.libelle('service', self.service.id), 'IT')
+        self.service.nom = 'Informatique'
+        self.service.save()
+        self.assertEqual(referentiel.libelle('service', self.service.id), 'Informatique')
+
+    def test_ecriture_annulee_invisible(self):
+        referentiel.donnees()
+        try:
+            with transaction.atomic():
+                Service.objects.filter(pk=self.service.pk).update(nom='FANTOME')
+                invalider_referentiel()
+                self.assertEqual(referentiel.libelle('service', self.service.id), 'FANTOME')
+                raise DatabaseError('annulation')
+        except DatabaseError:
+            pass
+        self.assertEqual(referentiel.libelle('service', self.service.id), 'IT')
+
+
+# ============================================================================
+# REQUÊTES CONDITIONNELLES
+# ============================================================================
+
+@override_settings(REQUETES_CONDITIONNELLES=True)
+class RequetesConditionnellesTests(TransactionTestCase):
+    """
+    304 tant que ni la collection ni les données liées n'ont changé
+    (TransactionTestCase : la version des données avance au commit)
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'a@a.fr', 'x'))
+        self.societe = Societe.objects.create(nom='MSI')
+        self.service = Service.objects.create(nom='IT', societe=self.societe)
+
+    def test_liste(self):
+        etag = self.client.get('/api/services/')['ETag']
+        self.assertEqual(self.client.get('/api/services/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get('/api/services/?actif=true', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        Service.objects.filter(pk=self.service.pk).update(description='Informatique')
+        self.assertEqual(self.client.get('/api/services/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail(self):
+        url = f'/api/societes/{self.societe.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+# ============================================================================
+# REGISTRE DE CONGÉS
+# ============================================================================
+
+class RegistreCongesTests(TestCase):
+    """Solde matérialisé = somme du registre, quelles que soient les opérations"""
+
+    def setUp(self):
+        societe = Societe.objects.create(nom='MSI')
+        self.salarie = Salarie.objects.create(nom='N', prenom='P', matricule='M1', genre='f', societe=societe)
+        self.demande = DemandeConge.objects.create(
+            salarie=self.salarie, date_debut=date(2026, 7, 6), date_fin=date(2026, 7, 8), statut='approuvée',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'a@a.fr', 'x'))
+
+    def _solde(self):
+        solde = SoldeConge.objects.get(salarie=self.salarie)
+        return solde.conges_acquis, solde.conges_utilises, solde.conges_restants
+
+    def test_operations_coherentes_avec_recalcul(self):
+        self.assertEqual(crediter_acquisition_mensuelle(date(2026, 6, 1))['credites'], 1)
+        self.assertEqual(crediter_acquisition_mensuelle(date(2026, 6, 1))['credites'], 0)
+        self.assertEqual(enregistrer_consommations([self.demande.id]), 1)
+        self.assertEqual(enregistrer_consommations([self.demande.id]), 0)
+        ajuster_solde(self.salarie, Decimal('1.5'), 'Report')
+        self.assertEqual(self._solde(), (Decimal('3.58'), self.demande.nombre_jours, Decimal('3.58') - self.demande.nombre_jours))
+        avant = self._solde()
+        recalculer_solde(self.salarie)
+        self.assertEqual(self._solde(), avant)
+
+        self.assertEqual(annuler_consommations([self.demande.id]), 1)
+        self.assertEqual(self._solde()[1], 0)
+        recalculer_solde(self.salarie)
+        self.assertEqual(self._solde(), (Decimal('3.58'), 0, Decimal('3.58')))
+
+    def test_suppression_demande_decomptee(self):
+        enregistrer_consommations([self.demande.id])
+        ajuster_solde(self.salarie, Decimal('2'), 'Report')
+        avant = self._solde()
+        self.assertEqual(self.client.delete(f'/api/demandes-conge/{self.demande.id}/').status_code, 204)
+        self.assertFalse(MouvementConge.objects.filter(demande__isnull=False).exists())
+        recalculer_solde(self.salarie)
+        self.assertEqual(self._solde(), avant)
+
+    def test_ajustement_valide(self):
+        solde, _ = SoldeConge.objects.get_or_create(salarie=self.salarie)
+        url = f'/api/solde-conge/{solde.id}/ajuster/'
+        for nombre_jours in ('NaN', 'Infinity', '123456', '1.555', None):
+            with self.subTest(nombre_jours=nombre_jours):
+                reponse = self.client.post(url, {'nombre_jours': nombre_jours, 'motif': 'x'}, format='json')
+                self.assertEqual(reponse.status_code, 400)
+        self.assertEqual(self.client.post(url, {'nombre_jours': '2'}, format='json').status_code, 400)
+        reponse = self.client.post(url, {'nombre_jours': '-1.5', 'motif': 'Correction'}, format='json')
+        self.assertEqual(reponse.status_code, 201)
+        self.assertEqual(self._solde()[2], Decimal('-1.5'))
+
+
+# ============================================================================
+# ABSENCES ET COUVERTURE DES SERVICES
+# ============================================================================
+
+class AbsencesTests(TestCase):
+
+    def setUp(self):
+        societe = Societe.objects.create(nom='MSI')
+        self.service = Service.objects.create(nom='IT', societe=societe, effectif_minimum=2)
+        self.autre_service = Service.objects.create(nom='RH', societe=societe)
+        self.user = User.objects.create_user('agent', 'agent@msi.fr', 'x')
+        self.salaries = [
+            Salarie.objects.create(
+                nom=f'N{i}', prenom=f'P{i}', matricule=f'M{i}', genre='f', societe=societe,
+                service=self.service, user=self.user if i == 0 else None,
+            )
+            for i in range(3)
+        ]
+        DemandeConge.objects.create(
+            salarie=self.salaries[1], date_debut=date(2026, 7, 6), date_fin=date(2026, 7, 10), statut='approuvée',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_chevauchement_et_effectif_minimum(self):
+        erreurs = verifier_demande_conge(self.salaries[1], date(2026, 7, 9), date(2026, 7, 13))
+        self.assertTrue(any('Chevauchement' in e for e in erreurs))
+        # Deux absents sur trois : effectif minimum (2) non respecté les jours communs
+        erreurs = verifier_demande_conge(self.salaries[0], date(2026, 7, 10), date(2026, 7, 13))
+        self.assertEqual(len(erreurs), 1)
+        self.assertIn('10/07/2026', erreurs[0])
+        self.assertNotIn('13/07/2026', erreurs[0])
+        self.assertEqual(verifier_demande_conge(self.salaries[0], date(2026, 7, 13), date(2026, 7, 17)), [])
+
+    def test_parametre_service(self):
+        for url in ('/api/demandes-conge/absences/', '/api/calendrier/'):
+            with self.subTest(url=url):
+                parametres = {'date_debut': '2026-07-06', 'from': '2026-07-06', 'to': '2026-07-10'}
+                self.assertEqual(self.client.get(url, {**parametres, 'service': 'abc'}).status_code, 400)
+                self.assertEqual(
+                    self.client.get(url, {**parametres, 'service': self.autre_service.id}).status_code, 403
+                )
+                self.assertEqual(self.client.get(url, parametres).status_code, 200)
+
+
+# ============================================================================
+# JOURS OUVRÉS
+# ============================================================================
+
+class JoursOuvresTests(TestCase):
+
+    def setUp(self):
+        societe = Societe.objects.create(nom='MSI')
+        creneau = CreneauTravail.objects.create(
+            nom='Mardi-samedi', societe=societe, heure_debut=time(8), heure_fin=time(17), jours_semaine='23456',
+        )
+        self.salarie = Salarie.objects.create(
+            nom='N', prenom='P', matricule='M1', genre='f', societe=societe, creneau_travail=creneau,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'a@a.fr', 'x'))
+
+    def test_feries_et_semaine(self):
+        self.assertEqual(date_paques(2026), date(2026, 4, 5))
+        self.assertIn(date(2026, 5, 14), jours_feries(2026))  # Ascension
+        # Semaine du 13/07/2026 : 14 juillet férié
+        self.assertEqual(compter_jours_ouvres(date(2026, 7, 13), date(2026, 7, 19)), 4)
+        self.assertEqual(compter_jours_ouvres(date(2026, 7, 13), date(2026, 7, 19), '23456'), 4)
+        self.assertEqual(compter_jours_ouvres(date(2026, 7, 20), date(2026, 7, 26), '23456'), 5)
+        self.assertEqual(compter_jours_ouvres(date(2026, 7, 26), date(2026, 7, 20)), 0)
+        self.assertEqual(calculer_nombre_jours(self.salarie, date(2026, 7, 20), date(2026, 7, 20)), 0)
+
+    def test_demande_sans_jour_travaille(self):
+        donnees = {'salarie': self.salarie.id, 'type_conge': 'normal'}
+        # Dimanche 19 et lundi 20 : repos pour ce créneau
+        reponse = self.client.post('/api/demandes-conge/', {
+            **donnees, 'date_debut': '2026-07-19', 'date_fin': '2026-07-20',
+        }, format='json')
+        self.assertEqual(reponse.status_code, 400)
+        reponse = self.client.post('/api/demandes-conge/', {
+            **donnees, 'date_debut': '2026-07-20', 'date_fin': '2026-07-25', 'nombre_jours': 1,
+        }, format='json')
+        self.assertEqual(reponse.status_code, 201)
+        self.assertEqual(Decimal(reponse.data['nombre_jours']), 5)
+
+    def test_salarie_du_calcul_visible(self):
+        url = '/api/demandes-conge/jours_ouvres/?date_debut=2026-07-20&date_fin=2026-07-26&salarie={}'
+        reponse = self.client.get(url.format(self.salarie.id))
+        self.assertEqual((reponse.status_code, reponse.data['jours_semaine']), (200, '23456'))
+        self.assertEqual(self.client.get(url.format('abc')).status_code, 400)
+
+        self.client.force_authenticate(User.objects.create_user('invite', 'i@a.fr', 'x'))
+        self.assertEqual(self.client.get(url.format(self.salarie.id)).status_code, 404)
+
+
+# ============================================================================
+# CALENDRIER D'ÉQUIPE
+# ============================================================================
+
+class CalendrierTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        societe = Societe.objects.create(nom='MSI')
+        self.service = Service.objects.create(nom='IT', societe=societe)
+        self.salarie = Salarie.objects.create(
+            nom='N', prenom='P', matricule='M1', genre='f', societe=societe, service=self.service,
+        )
+        DemandeConge.objects.create(
+            salarie=self.salarie, date_debut=date(2026, 6, 29), date_fin=date(2026, 7, 2), statut='approuvée',
+        )
+        DemandeSortie.objects.create(
+            salarie=self.salarie, date_sortie=date(2026, 7, 3), heure_debut=time(10), heure_fin=time(11),
+            statut='approuvée',
+        )
+
+    def _periode(self):
+        return calendrier_service(self.service.id, date(2026, 6, 29), date(2026, 7, 5))
+
+    def test_bitmaps_sur_deux_mois(self):
+        calendrier = self._periode()
+        ligne, = calendrier['salaries']
+        self.assertEqual((ligne['conge'], ligne['sortie'], ligne['travaux']), ('f', '10', '0'))
+        self.assertEqual(calendrier['occupation'], [1, 1, 1, 1, 1, 0, 0])
+
+    def test_invalidation_au_commit(self):
+        self._periode()
+        version = version_calendrier(self.service.id)
+        with self.captureOnCommitCallbacks() as rappels:
+            TravauxExceptionnels.objects.create(
+                salarie=self.salarie, date_travail=date(2026, 7, 4), heure_debut=time(9), heure_fin=time(12),
+                statut='approuvée',
+            )
+            self.assertEqual(version_calendrier(self.service.id), version)
+            self.assertEqual(self._periode()['salaries'][0]['travaux'], '0')
+        for rappel in rappels:
+            rappel()
+        self.assertNotEqual(version_calendrier(self.service.id), version)
+        self.assertEqual(self._periode()['salaries'][0]['travaux'], '20')
+
+
+# ============================================================================
+# STOCKS D'ÉQUIPEMENTS
+# ============================================================================
+
+class StocksTests(TestCase):
+
+    def setUp(self):
+        self.equipement = Equipement.objects.create(nom='PC', type_equipement='laptop', stock_total=1)
+
+    def _stock(self):
+        self.equipement.refresh_from_db()
+        return self.equipement.stock_disponible
+
+    def test_stock_suit_le_decompte_au_dela_du_total(self):
+        premiere, _ = [
+            EquipementInstance.objects.create(equipement=self.equipement, date_affectation=date(2026, 1, 5))
+            for _ in range(2)
+        ]
+        self.assertEqual(self._stock(), 0)
+        premiere.date_retrait = date(2026, 2, 1)
+        premiere.save()
+        self.assertEqual(self._stock(), 0)
+        self.assertEqual(verifier_stocks(), [])
+
+    def test_changement_et_suppression(self):
+        autre = Equipement.objects.create(nom='Ecran', type_equipement='laptop', stock_total=3)
+        instance = EquipementInstance.objects.create(equipement=self.equipement, date_affectation=date(2026, 1, 5))
+        instance.equipement = autre
+        instance.save()
+        autre.refresh_from_db()
+        self.assertEqual((self._stock(), autre.stock_disponible), (1, 2))
+        instance.delete()
+        autre.refresh_from_db()
+        self.assertEqual(autre.stock_disponible, 3)
+        self.assertEqual(verifier_stocks(), [])
+
+    def test_increments_sans_recomptage_puis_reconciliation(self):
+        instance = EquipementInstance.objects.create(equipement=self.equipement, date_affectation=date(2026, 1, 5))
+        instance.date_retrait = date(2026, 2, 1)
+        with CaptureQueriesContext(connection) as requetes:
+            instance.save()
+        self.assertFalse(any('COUNT(' in requete['sql'].upper() for requete in requetes.captured_queries))
+        self.assertEqual((self._stock(), self.equipement.stock_affecte), (1, 0))
+
+        # update() contourne save() : écart détecté puis corrigé
+        EquipementInstance.objects.filter(id=instance.id).update(date_retrait=None)
+        ecart, = recalculate_all_stock()
+        self.assertEqual((ecart['affectes'], ecart['attendu']), (1, 0))
+        self.assertEqual((self._stock(), self.equipement.stock_affecte), (0, 1))
+        self.assertEqual(verifier_stocks(), [])
+
+    def test_affectation_en_masse(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser('admin', 'a@a.fr', 'x'))
+        url = '/api/equipement-instances/bulk_assign/'
+        item = {'equipement': self.equipement.id}
+
+        reponse = client.post(url, {'items': [item, {**item, 'numero_serie': 'SN2'}]}, format='json')
+        self.assertEqual(reponse.status_code, 400)
+        self.assertEqual([e['index'] for e in reponse.data['erreurs']], [1])
+        for items in ([item, 'PC'], [{'equipement': 'x'}], []):
+            self.assertEqual(client.post(url, {'items': items}, format='json').status_code, 400)
+        self.assertFalse(EquipementInstance.objects.exists())
+
+        reponse = client.post(url, {'items': [item], 'date_affectation': '2026-09-01'}, format='json')
+        self.assertEqual(reponse.status_code, 201)
+        self.assertEqual(self._stock(), 0)
+
+    def test_retour_en_masse(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser('admin', 'a@a.fr', 'x'))
+        url = '/api/equipement-instances/bulk_return/'
+        instance = EquipementInstance.objects.create(equipement=self.equipement, date_affectation=date(2026, 1, 10))
+
+        for donnees in ({'ids': [instance.id], 'date_retrait': 20260110}, {'ids': [10 ** 30]}, {'ids': []}):
+            self.assertEqual(client.post(url, donnees, format='json').status_code, 400)
+        reponse = client.post(url, {'ids': [instance.id], 'date_retrait': '2020-01-01'}, format='json')
+        self.assertEqual(reponse.data['resultats'], [{'id': instance.id, 'resultat': 'date_anterieure'}])
+        self.assertEqual(self._stock(), 0)
+
+        reponse = client.post(url, {'ids': [instance.id, 9999], 'date_retrait': '2026-01-10'}, format='json')
+        self.assertEqual([r['resultat'] for r in reponse.data['resultats']], ['ok', 'introuvable'])
+        self.assertEqual(self._stock(), 1)
+
+
+# ============================================================================
+# STATISTIQUES ET INVENTAIRE DES ÉQUIPEMENTS
+# ============================================================================
+
+class StatistiquesEquipementsTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        societe = Societe.objects.create(nom='MSI')
+        self.it, self.rh = (Service.objects.create(nom=nom, societe=societe) for nom in ('IT', 'RH'))
+        self.alice, self.bruno = (
+            Salarie.objects.create(nom=nom, prenom='P', matricule=nom, genre='f', societe=societe, service=service)
+            for nom, service in (('ALICE', self.it), ('BRUNO', self.rh))
+        )
+        self.pc = Equipement.objects.create(nom='PC', type_equipement='laptop', stock_total=3)
+        self.portable = Equipement.objects.create(nom='Portable', type_equipement='laptop', stock_total=2)
+        Equipement.objects.create(nom='Ecran', type_equipement='ecran', stock_total=4)
+        for equipement, salarie, serie, etat, retrait in (
+            (self.pc, self.alice, 'SN1', 'bon', None),
+            (self.pc, self.bruno, 'SN2', 'usure', date(2026, 2, 1)),
+            (self.portable, self.alice, 'SN3', 'neuf', None),
+        ):
+            EquipementInstance.objects.create(
+                equipement=equipement, salarie=salarie, numero_serie=serie, etat=etat,
+                date_affectation=date(2026, 1, 5), date_retrait=retrait,
+            )
+
+    def test_statistiques(self):
+        statistiques = statistiques_equipements()
+        self.assertEqual(
+            (statistiques['total_equipements'], statistiques['total_instances'],
+             statistiques['instances_actives'], statistiques['instances_retournees']),
+            (3, 3, 2, 1),
+        )
+        laptop = next(t for t in statistiques['par_type'] if t['type_equipement'] == 'laptop')
+        self.assertEqual(
+            (laptop['count'], laptop['stock_total'], laptop['stock_disponible'], laptop['instances']), (2, 5, 3, 3),
+        )
+        self.assertEqual(
+            [(s['service_nom'], s['instances'], s['affectees']) for s in statistiques['par_service']],
+            [('IT', 2, 2), ('RH', 1, 0)],
+        )
+        self.assertEqual(
+            {e['etat']: e['count'] for e in statistiques['par_etat']}, {'bon': 1, 'usure': 1, 'neuf': 1},
+        )
+
+
+    def test_invalidation_au_commit(self):
+        statistiques_equipements()
+        with transaction.atomic():
+            for serie in ('SN4', 'SN5'):
+                EquipementInstance.objects.create(
+                    equipement=self.portable, salarie=self.bruno, numero_serie=serie, date_affectation=date(2026, 3, 1),
+                )
+            self.assertEqual(
+                [entree[1] for entree in connection.run_on_commit].count(_supprimer_statistiques), 1,
+            )
+            self.assertEqual(statistiques_equipements()['total_instances'], 3)
+        self.assertEqual(statistiques_equipements()['total_instances'], 5)
+
+    def test_rapprochement_inventaire(self):
+        scan = io.BytesIO('numero_serie;matricule\nsn1 ;ALICE\nSN3;BRUNO\nSN2;\nSN9;\nSN1;ALICE\n'.encode())
+        rapport = rapprocher_inventaire(scan)
+        self.assertEqual((rapport['total_scannes'], rapport['total_attendus'], rapport['trouves']), (5, 2, 2))
+        self.assertEqual(rapport['manquants'], [])
+        self.assertEqual(
+            [(ligne['numero_serie'], ligne['motif']) for ligne in rapport['inattendus']],
+            [('SN2', 'retire'), ('SN9', 'inconnu')],
+        )
+        self.assertEqual(
+            [(ligne['ligne'], ligne['matricule_attendu']) for ligne in rapport['detenteur_different']], [(3, 'ALICE')],
+        )
+        self.assertEqual([ligne['ligne'] for ligne in rapport['doublons']], [6])
+
+        rapport = rapprocher_inventaire(io.BytesIO(b'SN1,ALICE\n'), service_id=self.it.id)
+        self.assertEqual([ligne['numero_serie'] for ligne in rapport['manquants']], ['SN3'])
+
+
+# ============================================================================
+# HISTORIQUE DES AFFECTATIONS
+# ============================================================================
+
+class HistoriqueEquipementTests(TestCase):
+
+    def setUp(self):
+        societe = Societe.objects.create(nom='MSI')
+        self.alice, self.bruno = [
+            Salarie.objects.create(nom=nom, prenom='P', matricule=nom, genre='f', societe=societe)
+            for nom in ('ALICE', 'BRUNO')
+        ]
+        equipement = Equipement.objects.create(nom='PC', type_equipement='laptop', stock_total=2)
+        self.instance = EquipementInstance.objects.create(
+            equipement=equipement, salarie=self.alice, numero_serie='SN1', date_affectation=date(2026, 1, 5),
+        )
+
+    def test_detenteur_a_date(self):
+        self.instance.salarie = self.bruno
+        self.instance.date_affectation = date(2026, 3, 1)
+        self.instance.save()
+        self.instance.date_retrait = date(2026, 6, 1)
+        self.instance.save()
+
+        detenteurs = [
+            (evenement.salarie_id, evenement.type_evenement)
+            for evenement in (detenteur_a_date('SN1', jour) for jour in (
+                date(2026, 2, 1), date(2026, 4, 1), date(2026, 7, 1),
+            ))
+        ]
+        self.assertEqual(detenteurs, [
+            (self.alice.id, 'affectation'), (self.bruno.id, 'reaffectation'), (self.bruno.id, 'retrait'),
+        ])
+        self.assertEqual(list(equipements_detenus_a_date(self.alice.id, date(2026, 4, 1))), [])
+        self.assertEqual(equipements_detenus_a_date(self.bruno.id, date(2026, 4, 1)).count(), 1)
+        self.assertIsNone(detenteur_a_date('SN1', date(2025, 12, 31)))
+
+    def test_reaffectation_apres_retrait(self):
+        self.instance.date_retrait = date(2026, 2, 1)
+        self.instance.save()
+        self.instance.date_retrait = None
+        self.instance.save()
+
+        evenement = detenteur_a_date('SN1', date.today())
+        self.assertEqual((evenement.type_evenement, evenement.date_effet), ('affectation', date.today()))
+        self.assertEqual(evenement.salarie_id, self.alice.id)
+
+
+# ============================================================================
+# DÉPARTS DE SALARIÉS
+# ============================================================================
+
+class DepartsTests(TestCase):
+
+    def setUp(self):
+        societe = Societe.objects.create(nom='MSI')
+        self.salarie = Salarie.objects.create(
+            nom='N', prenom='P', matricule='M1', genre='f', societe=societe, date_sortie=date(2026, 5, 31),
+            user=User.objects.create_user('M1'),
+        )
+        self.equipement = Equipement.objects.create(nom='PC', type_equipement='laptop', stock_total=2)
+        self.instance, self.tardive = (
+            EquipementInstance.objects.create(
+                equipement=self.equipement, salarie=self.salarie, numero_serie=serie, date_affectation=jour,
+            )
+            for serie, jour in (('SN1', date(2026, 1, 5)), ('SN2', date(2026, 6, 15)))
+        )
+        AccesApplication.objects.create(salarie=self.salarie, type_application=TypeApplicationAcces.objects.create(nom='ERP'))
+        AccesSalarie.objects.create(salarie=self.salarie, type_acces=TypeAcces.objects.create(nom='Badge'))
+
+    def test_simulation_puis_cloture(self):
+        self.assertEqual(list(salaries_a_traiter(date(2026, 6, 1))), [self.salarie])
+        simulation = traiter_departs([self.salarie.id], dry_run=True)
+        checklist = simulation['salaries'][0]
+        self.assertEqual(
+            (len(checklist['equipements_retournes']), len(checklist['acces_applicatifs_clos']),
+             len(checklist['acces_locaux_clos']), checklist['compte_desactive']),
+            (2, 1, 1, True),
+        )
+        self.assertIsNone(EquipementInstance.objects.get(id=self.instance.id).date_retrait)
+
+        traiter_departs([self.salarie.id])
+        self.equipement.refresh_from_db()
+        self.salarie.refresh_from_db()
+        self.assertEqual(self.equipement.stock_disponible, 2)
+        self.assertEqual(self.salarie.statut, 'inactif')
+        self.assertFalse(self.salarie.user.is_active)
+        self.assertFalse(AccesApplication.objects.filter(date_fin__isnull=True).exists())
+        self.assertEqual(list(salaries_a_traiter(date(2026, 6, 1))), [])
+
+    def test_cloture_jamais_avant_le_debut(self):
+        checklist = traiter_departs([self.salarie.id])['salaries'][0]
+        self.assertEqual(
+            dict(EquipementInstance.objects.values_list('numero_serie', 'date_retrait')),
+            {'SN1': date(2026, 5, 31), 'SN2': date(2026, 6, 15)},
+        )
+        # Accès ouverts aujourd'hui (date_debut auto) : clos à leur date de début
+        acces = AccesSalarie.objects.get()
+        self.assertEqual(acces.date_fin, acces.date_debut)
+        self.assertEqual(checklist['acces_locaux_clos'][0]['date_fin'], acces.date_debut)
+
+    def test_date_sortie_validee(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser('admin', 'a@a.fr', 'x'))
+        url = '/api/salaries/depart/'
+        for donnees in ({'ids': [self.salarie.id], 'date_sortie': 20260531}, {'ids': ['x']}, {'ids': []}):
+            self.assertEqual(client.post(url, donnees, format='json').status_code, 400)
+        reponse = client.post(url, {'ids': [self.salarie.id], 'dry_run': True}, format='json')
+        self.assertEqual((reponse.status_code, reponse.data['dry_run']), (200, True))
+
+
+# ============================================================================
+# CRÉATION DES COMPTES EN MASSE
+# ============================================================================
+
+class CreationComptesTests(TestCase):
+
+    def setUp(self):
+        societe = Societe.objects.create(nom='MSI')
+        with creation_user_suspendue():
+            self.salaries = [
+                Salarie.objects.create(nom=f'N{i}', prenom='P', matricule=f'M{i}', genre='f', societe=societe)
+                for i in range(3)
+            ]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'a@a.fr', 'x'))
+
+    def _creer(self, **donnees):
+        return self.client.post(
+            '/api/salaries/creer_comptes/', {'ids': [s.id for s in self.salaries], **donnees}, format='json',
+        )
+
+    def test_compte_cree_a_l_embauche_sauf_import(self):
+        societe = self.salaries[0].societe
+        Salarie.objects.create(nom='E', prenom='P', matricule='E1', genre='f', societe=societe)
+        with creation_user_suspendue():
+            Salarie.objects.create(nom='I', prenom='P', matricule='I1', genre='f', societe=societe)
+        user = Salarie.objects.get(matricule='E1').user
+        self.assertEqual((user.username, user.last_name), ('E1', 'E'))
+        self.assertFalse(user.has_usable_password())
+        self.assertIsNone(Salarie.objects.get(matricule='I1').user)
+
+    def test_mot_de_passe_inutilisable_propre_a_chaque_compte(self):
+        self.assertEqual(self._creer().status_code, 201)
+        users = User.objects.filter(username__in=['M0', 'M1', 'M2'])
+        self.assertFalse(any(user.has_usable_password() for user in users))
+        self.assertEqual(len({user.password for user in users}), 3)
+        self.assertEqual(self._creer().status_code, 200)
+
+    def test_mot_de_passe_valide(self):
+        reponse = self._creer(mot_de_passe='1234')
+        self.assertEqual(reponse.status_code, 400)
+        self.assertIn('mot_de_passe', reponse.data['error'])
+        self.assertFalse(User.objects.filter(username='M0').exists())
+
+        self.assertEqual(self._creer(mot_de_passe='Bienvenue-MSI-2026').status_code, 201)
+        self.assertTrue(all(
+            user.check_password('Bienvenue-MSI-2026') for user in User.objects.filter(username__in=['M0', 'M2'])
+        ))
+
+
+# ============================================================================
+# SUIVI DES MODIFICATIONS ET HISTORIQUE DU SALARIÉ
+# ============================================================================
+
+class SuiviSalarieTests(TestCase):
+
+    def setUp(self):
+        societe = Societe.objects.create(nom='MSI')
+        self.it, self.rh = (Service.objects.create(nom=nom, societe=societe) for nom in ('IT', 'RH'))
+        self.salarie = Salarie.objects.create(
+            nom='N', prenom='P', matricule='M1', genre='f', societe=societe, service=self.it,
+        )
+
+    def test_synchronisation_user_seulement_si_identite_changee(self):
+        self.salarie.statut = 'conge'
+        with CaptureQueriesContext(connection) as requetes:
+            self.salarie.save()
+        self.assertFalse(any('auth_user' in requete['sql'] for requete in requetes.captured_queries))
+        self.assertEqual(self.salarie.champs_modifies(), {})
+
+        self.salarie.nom = 'Martin'
+        self.assertTrue(self.salarie.a_change('nom'))
+        self.salarie.save()
+        self.assertEqual(User.objects.get(username='M1').last_name, 'Martin')
+
+    def _historique(self):
+        return list(HistoriqueSalarie.objects.order_by('id').values_list('service_ancien', 'service_nouveau', 'motif'))
+
+    def test_changement_de_service_historise(self):
+        self.salarie.poste = 'Technicien'
+        self.salarie.save()
+        self.assertEqual(self._historique(), [])
+
+        self.salarie.service = self.rh
+        self.salarie.save()
+        Salarie.objects.filter(id=self.salarie.id).update(service=self.it)
+        Salarie.objects.filter(id=self.salarie.id).update(service=self.it)
+        self.assertEqual(self._historique(), [
+            (self.it.id, self.rh.id, 'Modification de la fiche salarié'),
+            (self.rh.id, self.it.id, 'Mise à jour en masse'),
+        ])
+
+    def test_collecte_regroupe_les_insertions(self):
+        with HistoriqueSalarie.collecte():
+            self.salarie.service = self.rh
+            self.salarie.save()
+            self.assertEqual(self._historique(), [])
+        self.assertEqual(len(self._historique()), 1)
+
+
+# ============================================================================
+# CHRONOLOGIE DU SALARIÉ
+# ============================================================================
+
+class TimelineTests(TestCase):
+
+    def setUp(self):
+        societe = Societe.objects.create(nom='MSI')
+        self.service = Service.objects.create(nom='IT', societe=societe)
+        self.salarie = Salarie.objects.create(
+            nom='N', prenom='P', matricule='M1', genre='f', societe=societe, date_embauche=date(2025, 1, 6),
+            service=self.service,
+        )
+        for jour in (date(2026, 3, 2), date(2026, 3, 2), date(2026, 4, 6), date(2026, 5, 4)):
+            DemandeConge.objects.create(salarie=self.salarie, date_debut=jour, date_fin=jour, statut='soumise')
+        equipement = Equipement.objects.create(nom='PC', type_equipement='laptop', stock_total=2)
+        EquipementInstance.objects.create(
+            equipement=equipement, salarie=self.salarie, date_affectation=date(2026, 3, 2),
+            date_retrait=date(2026, 5, 4),
+        )
+        TravauxExceptionnels.objects.create(
+            salarie=self.salarie, date_travail=date(2026, 3, 2), heure_debut=time(18), heure_fin=time(20),
+        )
+
+    def _cles(self, lignes):
+        return [(ligne['date'], ligne['type'], ligne['id']) for ligne in lignes]
+
+    def test_pagination_par_curseur(self):
+        complete = timeline_salarie(self.salarie.id, limite=100)
+        self.assertIsNone(complete['next'])
+        cles = self._cles(complete['results'])
+        self.assertEqual(len(cles), 8)
+        self.assertEqual(cles, sorted(cles, reverse=True))
+
+        pages, curseur = [], None
+        while True:
+            page = timeline_salarie(self.salarie.id, curseur=curseur, limite=2)
+            pages.extend(page['results'])
+            if page['next'] is None:
+                break
+            curseur = lire_curseur(page['next'])
+        self.assertEqual(self._cles(pages), cles)
+
+    def test_filtre_par_type(self):
+        page = timeline_salarie(self.salarie.id, types=['conge', 'embauche'], limite=100)
+        self.assertEqual({ligne['type'] for ligne in page['results']}, {'conge', 'embauche'})
+        self.assertEqual(len(page['results']), 5)
+        with self.assertRaises(ValueError):
+            lire_curseur('2026-03-02|conge')
+
+    def test_sources_filtrees_par_visibilite(self):
+        DocumentSalarie.objects.create(
+            salarie=self.salarie, type_document='demande_demission', titre='Démission', fichier='d.pdf',
+            date_document=date(2026, 6, 1),
+        )
+        chef = User.objects.create_user('chef')
+        chef.user_permissions.add(Permission.objects.create(
+            codename='view_team_salaries', name='Can view team members',
+            content_type=ContentType.objects.get_for_model(Salarie),
+        ))
+        Salarie.objects.create(
+            nom='C', prenom='P', matricule='C1', genre='m', societe=self.salarie.societe, service=self.service,
+            user=chef,
+        )
+        url = f'/api/salaries/{self.salarie.id}/timeline/?limit=100'
+        client = APIClient()
+
+        client.force_authenticate(chef)
+        reponse = client.get(url)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual({ligne['type'] for ligne in reponse.data['results']}, {'embauche', 'travaux'})
+
+        client.force_authenticate(User.objects.create_superuser('admin', 'a@a.fr', 'x'))
+        self.assertIn('document', {ligne['type'] for ligne in client.get(url).data['results']})
+
+
+# ============================================================================
+# RECHERCHE PLEIN TEXTE
+# ============================================================================
+
+class RechercheSalariesTests(TestCase):
+
+    def setUp(self):
+        self.societe = Societe.objects.create(nom='MSI')
+        self.salarie = Salarie.objects.create(
+            nom='Dupont', prenom='Hélène', matricule='M1', genre='f', societe=self.societe,
+        )
+
+    def _trouves(self, saisie):
+        return list(rechercher_salaries(Salarie.objects.all(), saisie).values_list('matricule', flat=True))
+
+    def test_index_apres_creation_et_sauvegarde(self):
+        self.assertEqual(self.salarie.texte_recherche, 'dupont helene m1')
+        self.salarie.statut = 'conge'
+        self.salarie.save()
+        self.assertEqual(self._trouves('HELENE dup'), ['M1'])
+        self.assertEqual(self._trouves('helene martin'), [])
+
+    def test_instance_perimee_ne_reecrit_pas_l_index(self):
+        departement = Departement.objects.create(numero='D7', nom='Logistique', societe=self.societe)
+        Salarie.objects.get(pk=self.salarie.pk).departements.add(departement)
+        self.assertEqual(self._trouves('logist'), ['M1'])
+        self.salarie.statut = 'conge'
+        self.salarie.save()
+        self.assertEqual(self._trouves('logist'), ['M1'])
+
+
+# ============================================================================
+# AUTOCOMPLÉTION
+# ============================================================================
+
+class AutocompleteTests(TestCase):
+
+    def setUp(self):
+        cache_autocomplete.vider()
+        societe = Societe.objects.create(nom='MSI')
+        for nom, prenom, matricule in (('Martin', 'Hélène', 'M1'), ('Dupont', 'Marc', 'M2'), ('Durand', 'Léa', 'M3')):
+            Salarie.objects.create(nom=nom, prenom=prenom, matricule=matricule, genre='f', societe=societe)
+        for nom in ('Maintenance', 'Informatique', 'RH'):
+            Service.objects.create(nom=nom, societe=societe)
+
+    def _labels(self, entite, saisie, **kwargs):
+        return [ligne['label'] for ligne in suggestions(entite, saisie, **kwargs)]
+
+    def test_suggestions(self):
+        self.assertEqual(self._labels('salaries', 'du'), ['Marc Dupont', 'Léa Durand'])
+        self.assertEqual(self._labels('salaries', 'helene'), ['Hélène Martin'])
+        self.assertEqual(self._labels('services', 'ma'), ['Maintenance', 'Informatique'])
+        self.assertEqual(self._labels('services', 'ma', limite=1), ['Maintenance'])
+        self.assertEqual(self._labels('services', '   '), [])
+        with self.assertRaises(KeyError):
+            suggestions('inconnue', 'x')
+
+    def test_portee_distincte_dans_le_cache(self):
+        self.assertEqual(len(self._labels('salaries', 'du')), 2)
+        restreint = Salarie.objects.filter(matricule='M3')
+        self.assertEqual(self._labels('salaries', 'du', queryset=restreint, portee='M3'), ['Léa Durand'])
+
+
+# ============================================================================
+# RECHERCHE GLOBALE
+# ============================================================================
+
+class RechercheGlobaleTests(TransactionTestCase):
+
+    def test_erreur_de_source_non_exposee(self):
+        def source_en_echec(queryset, saisie, limite):
+            raise DatabaseError('relation "api_secrete" does not exist')
+
+        with patch.dict(SOURCES_RECHERCHE, {'salaries': source_en_echec}), \
+                self.assertLogs('api.recherche_globale_utils', 'ERROR'):
+            resultat = recherche_globale('dupont', {'salaries': Salarie.objects.all()})
+        self.assertEqual(resultat['sources'], {'salaries': {'statut': 'erreur', 'nombre': 0}})
+
+    @skipUnless(connection.vendor == 'sqlite', 'progress handler SQLite')
+    def test_requete_interrompue_au_budget(self):
+        def source_lente(queryset, saisie, limite):
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute(
+                    'WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) '
+                    'SELECT count(*) FROM (SELECT i FROM n LIMIT 100000000)'
+                )
+                return cursor.fetchall()
+
+        debut = time_module.monotonic()
+        with self.assertRaises(OperationalError):
+            _executer(source_lente, Salarie.objects.all(), 'x', 5, budget_ms=50)
+        self.assertLess(time_module.monotonic() - debut, 5)
+
+
+# ============================================================================
+# MÉTRIQUES PROMETHEUS
+# ============================================================================
+
+class MetriquesTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def _publier(self, cle, vue):
+        mesure = MesureRequete()
+        mesure.vue = vue
+        with patch('api.metriques_utils.cle_worker', return_value=cle):
+            worker = Metriques()
+            worker.enregistrer(mesure, 'GET', 200, 0.01)
+            worker.publier(force=True)
+        return worker
+
+    def test_une_serie_par_worker(self):
+        premier = self._publier('metriques:hote:1', 'a')
+        self._publier('metriques:hote:2', 'b')
+        # Le premier republie après l'arrivée du second : il ne l'efface pas de l'index
+        with patch('api.metriques_utils.cle_worker', return_value='metriques:hote:1'):
+            premier.publier(force=True)
+
+        with patch('api.metriques_utils.cle_worker', return_value='metriques:hote:3'):
+            self.assertEqual(set(instantanes_workers()), {'hote:1', 'hote:2', 'hote:3'})
+            texte = exporter_prometheus()
+        self.assertIn(
+            'msi_http_requests_total{vue="a",action="",methode="GET",statut="200",worker="hote:1"} 1', texte,
+        )
+        self.assertIn(
+            'msi_http_requests_total{vue="b",action="",methode="GET",statut="200",worker="hote:2"} 1', texte,
+        )
+
+
+# ============================================================================
+# TRANSITIONS EN MASSE
+# ============================================================================
+
+class TransitionsEnMasseTests(TestCase):
+
+    def setUp(self):
+        societe = Societe.objects.create(nom='MSI')
+        salarie = Salarie.objects.create(nom='N', prenom='P', matricule='M1', genre='f', societe=societe)
+        self.soumises = [
+            DemandeConge.objects.create(
+                salarie=salarie, date_debut=date(2026, 7, jour), date_fin=date(2026, 7, jour), statut='soumise',
+            )
+            for jour in (6, 7)
+        ]
+        self.brouillon = DemandeConge.objects.create(
+            salarie=salarie, date_debut=date(2026, 7, 8), date_fin=date(2026, 7, 8),
+        )
+
+    def _appliquer(self, transition, ids, queryset=None):
+        rapport = appliquer_transition_en_masse(
+            queryset or DemandeConge.objects.all(), transition, ids, commentaire='OK',
+        )
+        return rapport, {ligne['id']: ligne['resultat'] for ligne in rapport['resultats']}
+
+    def test_resultat_par_demande(self):
+        a, b = (demande.id for demande in self.soumises)
+        rapport, resultats = self._appliquer('valider_direct', [a, b, self.brouillon.id, 9999, a])
+        self.assertEqual((rapport['total'], rapport['succes'], rapport['echecs']), (4, 2, 2))
+        self.assertEqual(resultats, {a: 'ok', b: 'ok', self.brouillon.id: 'statut_invalide', 9999: 'introuvable'})
+        demande = DemandeConge.objects.get(id=a)
+        self.assertEqual(
+            (demande.statut, demande.valide_par_direct, demande.commentaire_direct), ('validée_direct', True, 'OK'),
+        )
+
+        _, resultats = self._appliquer('valider_service', [a, b, self.brouillon.id])
+        self.assertEqual(resultats, {a: 'ok', b: 'ok', self.brouillon.id: 'statut_invalide'})
+        self.assertEqual(
+            set(DemandeConge.objects.filter(id__in=[a, b]).values_list('statut', flat=True)), {'approuvée'},
+        )
+
+    def test_perimetre_et_ids_invalides(self):
+        a, b = (demande.id for demande in self.soumises)
+        _, resultats = self._appliquer('rejeter', [a, b], DemandeConge.objects.exclude(id=b))
+        self.assertEqual(resultats, {a: 'ok', b: 'introuvable'})
+        self.assertEqual(DemandeConge.objects.get(id=a).motif_rejet, 'OK')
+        self.assertEqual(DemandeConge.objects.get(id=b).statut, 'soumise')
+        with self.assertRaises(ValueError):
+            self._appliquer('rejeter', [a, 'x'])
+        with self.assertRaises(ValueError):
+            self._appliquer('archiver', [a])
+        for ids in ([0], [2 ** 63]):
+            with self.assertRaises(ValueError):
+                self._appliquer('rejeter', ids)
+
+    def test_rejet_en_masse_recredite_le_solde(self):
+        demande = self.soumises[0]
+        DemandeConge.objects.filter(id=demande.id).update(statut='approuvée')
+        enregistrer_consommations([demande.id])
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser('admin', 'a@a.fr', 'x'))
+
+        url = '/api/demandes-conge/bulk_rejeter/'
+        reponse = client.post(url, {'ids': [demande.id], 'motif_rejet': 'Annulée'}, format='json')
+        self.assertEqual(reponse.data['succes'], 1)
+        self.assertEqual(SoldeConge.objects.get(salarie=demande.salarie).conges_utilises, 0)
+        self.assertTrue(MouvementConge.objects.filter(demande=demande, type_mouvement='annulation').exists())
+        self.assertEqual(client.post(url, {'ids': [10 ** 30]}, format='json').status_code, 400)
+
+
+# ============================================================================
+# REQUÊTES N+1 - TOUS LES ENDPOINTS DU ROUTEUR
+# ============================================================================
+
+class DetecteurNPlusUnTests(SimpleTestCase):
+
+    def test_formes(self):
+        detecteur = DetecteurNPlusUn(seuil=3)
+        for i in range(3):
+            detecteur.observer(f'SELECT * FROM "api_service" WHERE "api_service"."id" = {i} LIMIT 21')
+        detecteur.observer('SELECT * FROM "api_grade" WHERE "id" IN (%s, %s, %s)')
+        detecteur.observer('SELECT * FROM "api_grade" WHERE "id" IN (%s)')
+        detecteur.observer('UPDATE "api_service" SET "nom" = 1 WHERE "id" = 1')
+        (forme, nombre, origine), = detecteur.suspects()
+        self.assertEqual(nombre, 3)
+        self.assertIn('"id" = ? LIMIT ?', forme)
+        self.assertTrue(origine and origine[-1].startswith('api/tests.py:'))
+        self.assertEqual(detecteur.formes['SELECT * FROM "api_grade" WHERE "id" IN (...)'], 2)
+
+
+@override_settings(NPLUS1_MODE='raise', NPLUS1_SEUIL=5, REQUETES_CONDITIONNELLES=False)
+class RequetesBorneesTests(TestCase):
+    """
+    GET de chaque endpoint du routeur (liste, détail, actions GET) sur un jeu
+    où chaque relation compte plus de NPLUS1_SEUIL lignes :
+    - aucun N+1 (le middleware lève ErreurNPlusUn)
+    - au plus REQUETES_MAX requêtes SQL, quel que soit le volume
+    """
+    NOMBRE = 8
+    REQUETES_MAX = 30
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@msi.fr', 'x')
+        FicheParametresUser.objects.create(user=cls.admin)
+        Role.objects.create(nom='admin').utilisateurs.add(cls.admin)
+        Role.objects.create(nom='rh').utilisateurs.add(cls.admin)
+        aujourdhui = date.today()
+
+        societe = Societe.objects.create(nom='MSI')
+        departements = [Departement.objects.create(numero=f'{i + 1:02d}', nom=f'D{i}', societe=societe) for i in range(cls.NOMBRE)]
+        circuits = [Circuit.objects.create(nom=f'C{i}', departement=d) for i, d in enumerate(departements)]
+        creneau = CreneauTravail.objects.create(
+            nom='Journee', societe=societe, heure_debut=time(8), heure_fin=time(17),
+        )
+        grades = [Grade.objects.create(nom=f'G{i}', societe=societe) for i in range(cls.NOMBRE)]
+        types_acces = [TypeAcces.objects.create(nom=f'Badge {i}') for i in range(cls.NOMBRE)]
+        outils = [OutilTravail.objects.create(nom=f'Outil {i}') for i in range(cls.NOMBRE)]
+        types_application = [TypeApplicationAcces.objects.create(nom=f'App {i}') for i in range(cls.NOMBRE)]
+        equipements = [
+            Equipement.objects.create(nom=f'PC {i}', type_equipement='laptop', stock_total=20)
+            for i in range(cls.NOMBRE)
+        ]
+
+        responsable = Salarie.objects.create(
+            nom='Chef', prenom='Sam', matricule='R0', genre='m', societe=societe, user=cls.admin,
+        )
+        services = []
+        for i in range(cls.NOMBRE):
+            services.append(Service.objects.create(
+                nom=f'S{i}', societe=societe, responsable=responsable,
+                parentservice=services[0] if services else None,
+            ))
+
+        for i in range(cls.NOMBRE):
+            salarie = Salarie.objects.create(
+                nom=f'N{i}', prenom=f'P{i}', matricule=f'M{i}', genre='f', societe=societe,
+                service=services[i], grade=grades[i], circuit=circuits[i], creneau_travail=creneau,
+                responsable_direct=responsable, date_embauche=aujourdhui - timedelta(days=400),
+            )
+            salarie.departements.set(departements[:2])
+            EquipementInstance.objects.create(
+                equipement=equipements[i], salarie=salarie, numero_serie=f'SN{i}', date_affectation=aujourdhui,
+            )
+            AccesApplication.objects.create(salarie=salarie, type_application=types_application[i])
+            AccesSalarie.objects.create(salarie=salarie, type_acces=types_acces[i])
+            HoraireSalarie.objects.create(
+                salarie=salarie, date_debut=aujourdhui, heure_debut=time(9), heure_fin=time(18),
+            )
+            HistoriqueSalarie.objects.create(
+                salarie=salarie, service_ancien=services[0], service_nouveau=services[i],
+                grade_ancien=grades[0], grade_nouveau=grades[i], motif='Mutation',
+            )
+            SoldeConge.objects.get_or_create(salarie=salarie)
+            demande = DemandeConge.objects.create(
+                salarie=salarie, date_debut=aujourdhui, date_fin=aujourdhui + timedelta(days=2),
+                statut='approuvée',
+            )
+            MouvementConge.objects.create(
+                salarie=salarie, type_mouvement='acquisition', nombre_jours=2, demande=demande, cree_par=cls.admin,
+            )
+            DemandeAcompte.objects.create(salarie=salarie, montant=100)
+            DemandeSortie.objects.create(
+                salarie=salarie, date_sortie=aujourdhui, heure_debut=time(10), heure_fin=time(11),
+            )
+            TravauxExceptionnels.objects.create(
+                salarie=salarie, date_travail=aujourdhui, heure_debut=time(18), heure_fin=time(20),
+            )
+            DocumentSalarie.objects.create(
+                salarie=salarie, fichier=f'documents/document{i}.txt',
+            )
+            fiche = FichePoste.objects.create(
+                titre=f'Poste {i}', service=services[i], grade=grades[i], responsable_service=responsable,
+            )
+            OutilFichePoste.objects.create(fiche_poste=fiche, outil_travail=outils[i])
+            AmeliorationProposee.objects.create(fiche_poste=fiche, salarie_proposant=salarie, examinee_par=cls.admin)
+            journal = ImportLog.objects.create(api_name='salaries', cree_par=cls.admin)
+
+        jour = aujourdhui.isoformat()
+        # Paramètres obligatoires des actions GET
+        cls.parametres = {
+            'equipement-instances/a_date': {'salarie': salarie.id},
+            'demandes-conge/absences': {'service': salarie.service_id, 'date_debut': jour, 'date_fin': jour},
+            'demandes-conge/jours_ouvres': {'salarie': salarie.id, 'date_debut': jour, 'date_fin': jour},
+            'import/history_detail': {'log_id': journal.id},
+            'import/structure': {'model': 'salarie'},
+            'import/template': {'model': 'salarie'},
+        }
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _urls(self):
+        """(url, paramètres) : liste, détail et actions GET de chaque viewset enregistré"""
+        for prefixe, viewset, _ in router.registry:
+            base = f'/api/{prefixe}/'
+            yield base, {}
+            queryset = getattr(viewset, 'queryset', None)
+            pk = queryset.model.objects.values_list('pk', flat=True).first() if queryset is not None else None
+            if pk is not None:
+                yield f'{base}{pk}/', {}
+            for action in viewset.get_extra_actions():
+                if 'get' not in action.mapping:
+                    continue
+                parametres = self.parametres.get(f'{prefixe}/{action.url_path}', {})
+                if not action.detail:
+                    yield f'{base}{action.url_path}/', parametres
+                elif pk is not None:
+                    yield f'{base}{pk}/{action.url_path}/', parametres
+
+    def test_endpoints_routeur(self):
+        for url, parametres in self._urls():
+            with self.subTest(url=url), CaptureQueriesContext(connection) as requetes:
+                reponse = self.client.get(url, parametres)
+                self.assertLess(reponse.status_code, 500, url)
+                self.assertLessEqual(
+                    len(requetes), self.REQUETES_MAX,
+                    '\n'.join(requete['sql'] for requete in requetes.captured_queries),
+                )
+
+    def test_detection_hors_requete(self):
+        with self.assertRaises(ErreurNPlusUn):
+            with detecter_nplus1('services'):
+                for service in Service.objects.all():
+                    service.societe.nom
@@ -0,0 +1,172 @@
+# ============================================================================
+# TIMELINE_UTILS.PY - CHRONOLOGIE D'UN SALARIÉ
+# ============================================================================
+# Une requête UNION ALL sur les sources d'événements, colonnes alignées :
+#   (evenement, objet_id, jour, libelle, detail, etat_evenement)
+# triée par (jour, evenement, objet_id) décroissants. Les noms de colonnes
+# évitent ceux des champs des modèles (contrainte de values(**expressions)). Pagination par curseur
+# (keyset) : le filtre "après le curseur" est appliqué dans chaque branche,
+# ce qui évite tout OFFSET.
+#
+# Visibilité : l'appelant passe le queryset visible de chaque source (mêmes
+# règles que l'endpoint de l'entité) ; une source vide n'est pas interrogée.
+# ============================================================================
+
+from datetime import datetime
+
+from django.db.models import CharField, DateField, F, Q, TextField, Value
+from django.db.models.functions import Cast, Coalesce
+
+from .models import (
+    DemandeConge, DocumentSalarie, EquipementInstance, HistoriqueSalarie,
+    Salarie, TravauxExceptionnels,
+)
+
+
+LIMITE_DEFAUT = 50
+LIMITE_MAX = 200
+
+
+def _texte(valeur):
+    return Value(valeur, output_field=CharField())
+
+
+def _branches(salarie_id, querysets=None):
+    """
+    {type: (queryset, colonnes, champ_date)} des sources, toutes avec les mêmes colonnes
+    querysets: {type: queryset visible} (défaut: toutes les lignes du modèle)
+    """
+    querysets = querysets or {}
+
+    def source(type_, model):
+        return querysets.get(type_, model.objects.all())
+
+    def colonnes(type_, date, titre, detail, statut, objet_id=F('id')):
+        return {
+            'evenement': _texte(type_),
+            'objet_id': objet_id,
+            'jour': date,
+            'libelle': Cast(titre, TextField()),
+            'detail': Cast(detail, TextField()),
+            'etat_evenement': Cast(statut, TextField()),
+        }
+
+    return {
+        'embauche': (
+            Salarie.objects.filter(id=salarie_id, date_embauche__isnull=False),
+            colonnes('embauche', F('date_embauche'), _texte('Embauche'), F('poste'), F('statut')),
+            'date_embauche',
+        ),
+        'sortie': (
+            Salarie.objects.filter(id=salarie_id, date_sortie__isnull=False),
+            colonnes('sortie', F('date_sortie'), _texte('Sortie'), F('poste'), F('statut')),
+            'date_sortie',
+        ),
+        'evolution': (
+            source('evolution', HistoriqueSalarie).filter(salarie_id=salarie_id),
+            colonnes(
+                'evolution', F('date_changement'),
+                _texte('Changement de service / grade'),
+                Coalesce(F('motif'), _texte('')),
+                Coalesce(F('service_nouveau__nom'), _texte('')),
+            ),
+            'date_changement',
+        ),
+        'equipement': (
+            source('equipement', EquipementInstance).filter(salarie_id=salarie_id),
+            colonnes(
+                'equipement', F('date_affectation'), F('equipement__nom'),
+                Coalesce(F('numero_serie'), _texte('')), F('etat'),
+            ),
+            'date_affectation',
+        ),
+        'equipement_retour': (
+            source('equipement_retour', EquipementInstance).filter(salarie_id=salarie_id, date_retrait__isnull=False),
+            colonnes(
+                'equipement_retour', F('date_retrait'), F('equipement__nom'),
+                Coalesce(F('numero_serie'), _texte('')), F('etat'),
+            ),
+            'date_retrait',
+        ),
+        'conge': (
+            source('conge', DemandeConge).filter(salarie_id=salarie_id),
+            colonnes(
+                'conge', F('date_debut'), F('type_conge'),
+                Coalesce(F('motif'), _texte('')), F('statut'),
+            ),
+            'date_debut',
+        ),
+        'document': (
+            source('document', DocumentSalarie).filter(salarie_id=salarie_id).annotate(
+                date_ref=Coalesce(F('date_document'), Cast(F('date_upload'), DateField()))
+            ),
+            colonnes('document', F('date_ref'), F('titre'), F('type_document'), _texte('')),
+            'date_ref',
+        ),
+        'travaux': (
+            source('travaux', TravauxExceptionnels).filter(salarie_id=salarie_id),
+            colonnes(
+                'travaux', F('date_travail'), _texte('Travaux exceptionnels'),
+                F('description_travail'), F('statut'),
+            ),
+            'date_travail',
+        ),
+    }
+
+
+def lire_curseur(curseur):
+    """'2026-03-01|conge|42' -> (date, type, id) ; ValueError si invalide"""
+    date_str, type_, objet_id = curseur.split('|')
+    return datetime.strptime(date_str, '%Y-%m-%d').date(), type_, int(objet_id)
+
+
+def _apres_curseur(type_branche, champ_date, curseur):
+    """Filtre keyset d'une branche : lignes strictement après le curseur (ordre décroissant)"""
+    date_c, type_c, id_c = curseur
+    if type_branche < type_c:
+        return Q(**{f'{champ_date}__lte': date_c})
+    if type_branche > type_c:
+        return Q(**{f'{champ_date}__lt': date_c})
+    return Q(**{f'{champ_date}__lt': date_c}) | Q(**{champ_date: date_c, 'id__lt': id_c})
+
+
+def timeline_salarie(salarie_id, curseur=None, limite=LIMITE_DEFAUT, types=None, querysets=None):
+    """
+    Page de la chronologie d'un salarié (plus récent d'abord)
+    - curseur: (date, type, id) du dernier événement de la page précédente
+    - types: restreint aux types d'événements demandés
+    - querysets: {type: queryset visible par l'appelant}, voir _branches
+    Retourne {'results': [...], 'next': 'date|type|id' ou None}
+    """
+    limite = max(1, min(limite, LIMITE_MAX))
+    requetes = []
+    for type_, (qs, colonnes, champ_date) in _branches(salarie_id, querysets).items():
+        if (types and type_ not in types) or qs.query.is_empty():
+            continue
+        if curseur:
+            qs = qs.filter(_apres_curseur(type_, champ_date, curseur))
+        requetes.append(qs.order_by().values(**colonnes))
+
+    if not requetes:
+        return {'results': [], 'next': None}
+
+    union = requetes[0].union(*requetes[1:], all=True).order_by('-jour', '-evenement', '-objet_id')
+    lignes = [
+        {
+            'type': ligne['evenement'],
+            'id': ligne['objet_id'],
+            'date': ligne['jour'],
+            'titre': ligne['libelle'],
+            'detail': ligne['detail'],
+            'statut': ligne['etat_evenement'],
+        }
+        for ligne in union[:limite + 1]
+    ]
+
+    suivant = None
+    if len(lignes) > limite:
+        lignes = lignes[:limite]
+        dernier = lignes[-1]
+        suivant = f"{dernier['date']:%Y-%m-%d}|{dernier['type']}|{dernier['id']}"
+
+    return {'results': lignes, 'next': suivant}
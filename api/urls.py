@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import user_me
+from .views import user_me, calendrier, autocomplete, recherche, cache_stats, requetes_lentes
 
 # ============================================================================
 # IMPORTATION DE TOUS LES VIEWSETS
@@ -103,4 +103,19 @@ urlpatterns = [
     # ✅ ROUTE POUR L'UTILISATEUR CONNECTÉ - SANS PRÉFIXE 'api/'
     # Car msi_backend/urls.py inclut déjà path('api/', include('api.urls'))
     path('me/', user_me, name='user-me'),
+
+    # ✅ CALENDRIER D'ÉQUIPE
+    path('calendrier/', calendrier, name='calendrier'),
+
+    # ✅ AUTOCOMPLÉTION (typeahead)
+    path('autocomplete/<str:entite>/', autocomplete, name='autocomplete'),
+
+    # ✅ RECHERCHE GLOBALE
+    path('search/', recherche, name='search'),
+
+    # ✅ STATISTIQUES DU CACHE (admin)
+    path('cache/stats/', cache_stats, name='cache-stats'),
+
+    # ✅ REQUÊTES LENTES (admin) - métriques Prometheus sur /metrics
+    path('metrics/lentes/', requetes_lentes, name='requetes-lentes'),
 ]
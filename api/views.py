@@ -10,20 +10,28 @@
 
 
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action, api_view, authentication_classes, permission_classes, renderer_classes, throttle_classes,
+)
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.db.models import Prefetch
 from datetime import datetime, date
-import io, json, pandas as pd
+import csv, io, json, pandas as pd
 from django.http import HttpResponse
 from django.utils.encoding import smart_str
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from .serializers import UserMeSerializer
 from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -38,7 +46,7 @@ from .models import (
     OutilFichePoste, AmeliorationProposee, EquipementInstance, CreneauTravail,
     HoraireSalarie, DocumentSalarie, DemandeConge, SoldeConge, TravauxExceptionnels,
     TypeApplicationAcces, AccesApplication, FicheParametresUser, Role,
-    DemandeAcompte, DemandeSortie, ImportLog
+    DemandeAcompte, DemandeSortie, ImportLog, MouvementConge, HistoriqueEquipement
 )
 
 
@@ -70,7 +78,9 @@ from .serializers import (
     AccesSalarieSerializer, TypeApplicationAccesSerializer, AccesApplicationSerializer,
     FicheParametresUserSerializer, CircuitSerializer, RoleSerializer,
     DemandeAcompteSerializer, DemandeSortieSerializer, TravauxExceptionnelsSerializer,
-    FichePosteDetailSerializer, AmeliorationProposeeSerializer, ImportLogSerializer
+    FichePosteDetailSerializer, AmeliorationProposeeSerializer, ImportLogSerializer,
+    MouvementCongeSerializer, HistoriqueEquipementSerializer, AjustementSoldeSerializer,
+    AffectationMasseSerializer, RetourMasseSerializer, DepartSerializer
 )
 
 
@@ -78,6 +88,8 @@ from .serializers import (
 from .permissions import (
     IsAuthenticated as IsAuthenticatedPerm,
     IsAdmin,
+    AccesMetriques,
+    JetonMetriquesAuthentication,
     # SALARIES
     CanViewAllSalaries,
     CanViewOwnSalary,
@@ -115,7 +127,277 @@ from .utils import (
     IMPORT_CONFIG, parse_value, get_current_data,
     generate_template_dataframe
 )
+from .workflow_utils import appliquer_transition_en_masse, normaliser_ids, RESULTAT_OK
+from .conges_utils import enregistrer_consommations, annuler_consommations, ajuster_solde
+from .absences_utils import couverture_service, MAX_JOURS_PERIODE
+from .jours_ouvres_utils import detail_periode, jours_semaine_salarie
+from .stock_utils import affecter_en_masse, retourner_en_masse
+from .statistiques_utils import statistiques_equipements
+from .affectations_utils import detenteur_a_date, equipements_detenus_a_date
+from .inventaire_utils import rapprocher_inventaire
+from .depart_utils import traiter_departs
+from .onboarding_utils import creer_comptes_salaries
+from .timeline_utils import timeline_salarie, lire_curseur
+from .recherche_utils import RechercheSalarieFilter
+from .autocomplete_utils import suggestions, ENTITES_AUTOCOMPLETE, LIMITE_DEFAUT
+from .recherche_globale_utils import recherche_globale, SOURCES_RECHERCHE
+from .cache_backends import statistiques_caches
+from .metriques_utils import exporter_prometheus, metriques
+from .renderers import PrometheusRenderer
+from .etag_utils import (
+    agregats_queryset, ajouter_entetes, calculer_etag, champ_date_modele,
+    derniere_modification, non_modifie, version_donnees,
+)
+from .calendrier_utils import (
+    calendrier_service, invalider_calendrier_demandes, fin_de_mois, MAX_JOURS_CALENDRIER
+)
+
+
+
+# ============================================================================
+# CALENDRIER D'ÉQUIPE
+# ============================================================================
+
+def service_absences(request):
+    """
+    Service consulté par calendrier / absences : paramètre 'service', défaut
+    service du salarié connecté. Retourne (service, None) ou (None, Response)
+    Un autre service que le sien exige view_all_leave_requests (même règle
+    que la liste des demandes de congé)
+    """
+    user = request.user
+    service_propre = user.profil_salarie.service_id if hasattr(user, 'profil_salarie') else None
+    valeur = request.query_params.get('service') or service_propre
+    if not valeur:
+        return None, Response({'error': 'Paramètre "service" requis'},
+                              status=status.HTTP_400_BAD_REQUEST)
+    try:
+        service_id = int(valeur)
+    except (TypeError, ValueError):
+        return None, Response({'error': 'Paramètre "service" invalide'},
+                              status=status.HTTP_400_BAD_REQUEST)
+    if service_id != service_propre and not (user.is_staff or user.has_perm('api.view_all_leave_requests')):
+        return None, Response({'error': 'Permission refusée'},
+                              status=status.HTTP_403_FORBIDDEN)
+    return get_object_or_404(Service, pk=service_id), None
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def calendrier(request):
+    """
+    GET /api/calendrier/?service=1&from=2026-07-01&to=2026-07-31
+
+    Matrice salariés × jours du service (congés, sorties, travaux approuvés)
+    Chaque type est un bitmap hexadécimal par salarié (bit 0 = from)
+    Défaut: mois en cours, service du salarié connecté
+    """
+    service, erreur = service_absences(request)
+    if erreur:
+        return erreur
+
+    aujourd_hui = date.today()
+    try:
+        date_debut = (
+            datetime.strptime(request.query_params['from'], '%Y-%m-%d').date()
+            if request.query_params.get('from') else aujourd_hui.replace(day=1)
+        )
+        date_fin = (
+            datetime.strptime(request.query_params['to'], '%Y-%m-%d').date()
+            if request.query_params.get('to')
+            else fin_de_mois(date_debut)
+        )
+    except ValueError:
+        return Response({'error': 'Paramètres from/to invalides (AAAA-MM-JJ)'},
+                      status=status.HTTP_400_BAD_REQUEST)
+    if date_fin < date_debut or (date_fin - date_debut).days >= MAX_JOURS_CALENDRIER:
+        return Response({'error': f'Période invalide (max {MAX_JOURS_CALENDRIER} jours)'},
+                      status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'service': {'id': service.id, 'nom': service.nom},
+        **calendrier_service(service.id, date_debut, date_fin),
+    })
+
+
+
+# ============================================================================
+# AUTOCOMPLÉTION
+# ============================================================================
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def autocomplete(request, entite):
+    """
+    GET /api/autocomplete/<entite>/?q=dup&limit=10
+    entite: salaries, services, grades, departements, equipements
+
+    Suggestions compactes [{id, label, detail}] (prefixes d'abord)
+    Les salariés sont restreints à ceux visibles par l'utilisateur
+    """
+    if entite not in ENTITES_AUTOCOMPLETE:
+        return Response({'error': f'Entité inconnue: {entite}'},
+                      status=status.HTTP_404_NOT_FOUND)
+    try:
+        limite = int(request.query_params.get('limit', LIMITE_DEFAUT))
+    except ValueError:
+        return Response({'error': 'Paramètre limit invalide'},
+                      status=status.HTTP_400_BAD_REQUEST)
+
+    queryset, portee = None, ''
+    if entite == 'salaries':
+        queryset = Salarie.objects.visibles_par(request.user)
+        user = request.user
+        if not (user.is_staff or user.has_perm('api.view_all_salaries')):
+            # Portée propre à l'utilisateur dans la clé de cache
+            portee = f'user:{user.id}'
+
+    return Response(suggestions(
+        entite, request.query_params.get('q', ''),
+        queryset=queryset, limite=limite, portee=portee,
+    ))
+
+
+# ============================================================================
+# RECHERCHE GLOBALE
+# ============================================================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def recherche(request):
+    """
+    GET /api/search/?q=SN123&sources=salaries,equipements
+
+    Recherche transverse : salariés, numéros de série, identifiants d'accès,
+    fiches de poste, titres de documents (sources interrogées en parallèle)
+    Chaque source ne renvoie que ce que l'utilisateur voit via son endpoint
+    """
+    demandees = [s for s in request.query_params.get('sources', '').split(',') if s]
+    inconnues = [s for s in demandees if s not in SOURCES_RECHERCHE]
+    if inconnues:
+        return Response({'error': f'Sources inconnues: {", ".join(inconnues)}'},
+                      status=status.HTTP_400_BAD_REQUEST)
+
+    # Mêmes règles de visibilité que les endpoints de chaque entité
+    visibles = {
+        'salaries': lambda: Salarie.objects.visibles_par(request.user),
+        'equipements': lambda: EquipementInstanceViewSet(request=request).get_queryset(),
+        'acces': lambda: AccesApplication.objects.all(),
+        'fiches_poste': lambda: FichePoste.objects.all(),
+        'documents': lambda: DocumentSalarieViewSet(request=request).get_queryset(),
+    }
+    querysets = {
+        source: visibles[source]()
+        for source in SOURCES_RECHERCHE
+        if not demandees or source in demandees
+    }
+
+    saisie = request.query_params.get('q', '')
+    return Response({'query': saisie, **recherche_globale(saisie, querysets)})
+
+
+# ============================================================================
+# STATISTIQUES DU CACHE
+# ============================================================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+def cache_stats(request):
+    """
+    GET /api/cache/stats/
+
+    Compteurs par cache configuré (hits, misses, taux, taille locale...)
+    Compteurs propres au worker qui répond (sauf nombre de clés partagées)
+    """
+    return Response({
+        'backend': settings.CACHE_BACKEND,
+        'caches': statistiques_caches(),
+    })
+
+
+# ============================================================================
+# MÉTRIQUES (PROMETHEUS) ET REQUÊTES LENTES
+# ============================================================================
+
+@api_view(['GET'])
+@authentication_classes([JetonMetriquesAuthentication, JWTAuthentication, SessionAuthentication])
+@permission_classes([AccesMetriques])
+@renderer_classes([PrometheusRenderer])
+@throttle_classes([])
+def metrics(request):
+    """
+    GET /metrics
+
+    Compteurs et histogrammes par vue / action au format Prometheus
+    (requêtes, latence, requêtes SQL par requête, temps base et sérialisation)
+    """
+    return Response(exporter_prometheus())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+def requetes_lentes(request):
+    """
+    GET /api/metrics/lentes/
+
+    Dernières requêtes au-delà de METRIQUES_SEUIL_LENT_MS (worker courant),
+    plus récentes d'abord
+    """
+    return Response({
+        'seuil_ms': settings.METRIQUES_SEUIL_LENT_MS,
+        'results': metriques.requetes_lentes(),
+    })
+
+
+# ============================================================================
+# REQUÊTES CONDITIONNELLES (ETAG / LAST-MODIFIED)
+# ============================================================================
+
+
+class RequetesConditionnellesMixin:
+    """
+    ETag / Last-Modified sur list et retrieve, 304 sans sérialisation si la
+    copie du client est à jour (If-None-Match / If-Modified-Since)
+    Empreinte : version des données + agrégats de la collection filtrée + portée
+    """
+
+    def _conditionnel_actif(self, request):
+        return settings.REQUETES_CONDITIONNELLES and request.method in ('GET', 'HEAD')
+
+    def _portee(self, request):
+        return (request.user.pk, request.get_full_path(), request.accepted_renderer.format)
+
+    def _reponse_conditionnelle(self, request, etag, horodatage, construire):
+        if non_modifie(request, etag, horodatage):
+            return ajouter_entetes(Response(status=status.HTTP_304_NOT_MODIFIED), etag, horodatage)
+        response = construire()
+        if response.status_code == status.HTTP_200_OK:
+            ajouter_entetes(response, etag, horodatage)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if not self._conditionnel_actif(request):
+            return super().list(request, *args, **kwargs)
+        version = version_donnees()
+        nombre, max_id, derniere = agregats_queryset(self.filter_queryset(self.get_queryset()))
+        etag = calculer_etag(version, nombre, max_id, derniere, self._portee(request))
+        return self._reponse_conditionnelle(
+            request, etag, derniere_modification(version, derniere),
+            lambda: super(RequetesConditionnellesMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self._conditionnel_actif(request):
+            return super().retrieve(request, *args, **kwargs)
+        version = version_donnees()
+        instance = self.get_object()
+        champ = champ_date_modele(type(instance))
+        derniere = getattr(instance, champ) if champ else None
+        etag = calculer_etag(version, instance.pk, derniere, self._portee(request))
+        return self._reponse_conditionnelle(
+            request, etag, derniere_modification(version, derniere),
+            lambda: Response(self.get_serializer(instance).data),
+        )
 
 
 # ============================================================================
@@ -123,7 +405,7 @@ from .utils import (
 # ============================================================================
 
 
-class SocieteViewSet(viewsets.ModelViewSet):
+class SocieteViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour Societes - Lecture pour tous, Modif pour Admin"""
     queryset = Societe.objects.all()
     serializer_class = SocieteSerializer
@@ -141,7 +423,7 @@ class SocieteViewSet(viewsets.ModelViewSet):
 
 
 
-class DepartementViewSet(viewsets.ModelViewSet):
+class DepartementViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour Departements"""
     queryset = Departement.objects.all()
     serializer_class = DepartementSerializer
@@ -157,7 +439,7 @@ class DepartementViewSet(viewsets.ModelViewSet):
 
 
 
-class CircuitViewSet(viewsets.ModelViewSet):
+class CircuitViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour Circuits - Nouveau"""
     queryset = Circuit.objects.all()
     serializer_class = CircuitSerializer
@@ -172,9 +454,9 @@ class CircuitViewSet(viewsets.ModelViewSet):
 
 
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour Services"""
-    queryset = Service.objects.all()
+    queryset = Service.objects.select_related('responsable')
     serializer_class = ServiceSerializer
     filterset_fields = ['societe', 'actif']
     search_fields = ['nom', 'description']
@@ -276,7 +558,7 @@ class ServiceViewSet(viewsets.ModelViewSet):
         })
 
 
-class GradeViewSet(viewsets.ModelViewSet):
+class GradeViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour Grades"""
     queryset = Grade.objects.all()
     serializer_class = GradeSerializer
@@ -291,7 +573,7 @@ class GradeViewSet(viewsets.ModelViewSet):
 
 
 
-class TypeAccesViewSet(viewsets.ModelViewSet):
+class TypeAccesViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour Types d'accès"""
     queryset = TypeAcces.objects.all()
     serializer_class = TypeAccesSerializer
@@ -305,7 +587,7 @@ class TypeAccesViewSet(viewsets.ModelViewSet):
 
 
 
-class OutilTravailViewSet(viewsets.ModelViewSet):
+class OutilTravailViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour Outils de travail"""
     queryset = OutilTravail.objects.all()
     serializer_class = OutilTravailSerializer
@@ -319,7 +601,7 @@ class OutilTravailViewSet(viewsets.ModelViewSet):
 
 
 
-class CreneauTravailViewSet(viewsets.ModelViewSet):
+class CreneauTravailViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour Créneaux de travail"""
     queryset = CreneauTravail.objects.all()
     serializer_class = CreneauTravailSerializer
@@ -338,7 +620,7 @@ class CreneauTravailViewSet(viewsets.ModelViewSet):
 # ============================================================================
 
 
-class EquipementViewSet(viewsets.ModelViewSet):
+class EquipementViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour Équipements"""
     queryset = Equipement.objects.all()
     serializer_class = EquipementSerializer
@@ -364,34 +646,15 @@ class EquipementViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        """Retourne les statistiques des équipements"""
-        from django.db.models import Count
-        equipements = self.get_queryset()
-        instances = EquipementInstance.objects.all()
-        
-        par_type = list(equipements.values('type_equipement').annotate(
-            count=Count('id')
-        ).order_by('-count'))
-        
-        par_etat = list(instances.values('etat').annotate(
-            count=Count('id')
-        ).order_by('etat'))
-        
-        total_equipements = equipements.count()
-        total_instances = instances.count()
-        instances_actives = instances.filter(etat='actif').count() if instances.exists() else 0
-        
-        return Response({
-            'total_equipements': total_equipements,
-            'total_instances': total_instances,
-            'instances_actives': instances_actives,
-            'par_type': par_type,
-            'par_etat': par_etat,
-        })
+        """
+        Retourne les statistiques des équipements
+        Par type, par état, affectées / retournées et par service du détenteur
+        """
+        return Response(statistiques_equipements())
 
 
 
-class TypeApplicationAccesViewSet(viewsets.ModelViewSet):
+class TypeApplicationAccesViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour Types d'applications"""
     queryset = TypeApplicationAcces.objects.all()
     serializer_class = TypeApplicationAccesSerializer
@@ -410,11 +673,10 @@ class TypeApplicationAccesViewSet(viewsets.ModelViewSet):
 # ============================================================================
 
 
-class SalarieViewSet(viewsets.ModelViewSet):
+class SalarieViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour Salariés - Avec permissions granulaires"""
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, RechercheSalarieFilter]
     filterset_fields = ['societe', 'service', 'grade', 'statut']
-    search_fields = ['nom', 'prenom', 'matricule', 'mail_professionnel']
     ordering_fields = ['nom', 'prenom', 'date_embauche', 'date_creation']
     ordering = ['nom', 'prenom']
 
@@ -423,7 +685,7 @@ class SalarieViewSet(viewsets.ModelViewSet):
         """Permissions selon action"""
         if self.action in ['list', 'retrieve']:
             return [IsAuthenticated(), CanViewAllSalaries()]
-        elif self.action in ['update', 'partial_update']:
+        elif self.action in ['update', 'partial_update', 'depart', 'creer_comptes']:
             return [IsAuthenticated(), CanEditAllSalaries()]
         elif self.action == 'ma_fiche':
             return [IsAuthenticated(), CanViewOwnSalary()]
@@ -432,28 +694,17 @@ class SalarieViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filtre les salariés selon le rôle de l'utilisateur"""
-        user = self.request.user
-        
-        # Admin voit tout
-        if user.is_staff:
-            return Salarie.objects.all()
-        
-        # RH et comptable voient tout
-        if user.has_perm('api.view_all_salaries'):
-            return Salarie.objects.all()
-        
-        # Team leaders voient leur équipe
-        if user.has_perm('api.view_team_salaries'):
-            if hasattr(user, 'profil_salarie'):
-                service = user.profil_salarie.service
-                return Salarie.objects.filter(service=service)
-        
-        # User normal voit sa fiche
-        if user.has_perm('api.view_own_salary'):
-            if hasattr(user, 'profil_salarie'):
-                return Salarie.objects.filter(id=user.profil_salarie.id)
-        
-        return Salarie.objects.none()
+        queryset = Salarie.objects.visibles_par(self.request.user)
+        if self.action in ['list', 'retrieve']:
+            # Relations de SalarieDetailSerializer : une requête par relation, pas par salarié
+            return queryset.select_related('responsable_direct', 'creneau_travail').prefetch_related(
+                'departements', 'acces_applicatif', 'historique', 'horaires_supplementaires',
+                Prefetch('equipements', queryset=EquipementInstance.objects.select_related('equipement')),
+                Prefetch('acces_locaux', queryset=AccesSalarie.objects.select_related('type_acces')),
+            )
+        if self.action == 'annuaire':
+            return queryset.select_related('creneau_travail').prefetch_related('departements')
+        return queryset
 
 
     def get_serializer_class(self):
@@ -477,7 +728,7 @@ class SalarieViewSet(viewsets.ModelViewSet):
     def equipements(self, request, pk=None):
         """Liste équipements du salarié"""
         salarie = self.get_object()
-        equipements = EquipementInstance.objects.filter(salarie=salarie)
+        equipements = EquipementInstance.objects.filter(salarie=salarie).select_related('equipement', 'salarie')
         serializer = EquipementInstanceSerializer(equipements, many=True)
         return Response(serializer.data)
 
@@ -502,6 +753,37 @@ class SalarieViewSet(viewsets.ModelViewSet):
         })
 
 
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """
+        GET /api/salaries/{id}/timeline/?limit=50&cursor=2026-03-01|conge|42&types=conge,equipement
+        Chronologie du salarié (embauche, évolutions, équipements, congés, documents, travaux)
+        Chaque source ne contient que ce que l'utilisateur voit via son endpoint
+        """
+        salarie = self.get_object()
+        try:
+            curseur = lire_curseur(request.query_params['cursor']) if request.query_params.get('cursor') else None
+            limite = int(request.query_params.get('limit', 50))
+        except ValueError:
+            return Response({'error': 'Paramètres cursor/limit invalides'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        types = [t for t in request.query_params.get('types', '').split(',') if t] or None
+
+        # Mêmes règles de visibilité que les endpoints de chaque source
+        equipements = EquipementInstanceViewSet(request=request).get_queryset()
+        querysets = {
+            'evolution': HistoriqueSalarieViewSet(request=request).get_queryset(),
+            'equipement': equipements,
+            'equipement_retour': equipements,
+            'conge': DemandeCongeViewSet(request=request).get_queryset(),
+            'document': DocumentSalarieViewSet(request=request).get_queryset(),
+            'travaux': TravauxExceptionnelsViewSet(request=request).get_queryset(),
+        }
+        return Response(timeline_salarie(
+            salarie.id, curseur=curseur, limite=limite, types=types, querysets=querysets,
+        ))
+
+
     @action(detail=False, methods=['get'])
     def annuaire(self, request):
         """Liste complète pour annuaire (infos publiques)"""
@@ -510,10 +792,62 @@ class SalarieViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+    @action(detail=False, methods=['post'])
+    def depart(self, request):
+        """
+        POST /api/salaries/depart/  {"ids": [1, 2], "date_sortie": "2026-09-30", "dry_run": false}
+        Retour des équipements, clôture des accès, désactivation des comptes
+        (jamais avant le début d'une affectation ou d'un accès)
+        Retourne une checklist par salarié
+        """
+        entree = DepartSerializer(data=request.data)
+        if not entree.is_valid():
+            return Response({'error': entree.errors},
+                          status=status.HTTP_400_BAD_REQUEST)
+        ids = list(
+            self.get_queryset().filter(id__in=entree.validated_data['ids']).values_list('id', flat=True)
+        )
+        date_sortie = entree.validated_data.get('date_sortie')
+        dry_run = entree.validated_data['dry_run']
+        return Response(traiter_departs(ids, date_sortie=date_sortie, dry_run=dry_run))
 
-class EquipementInstanceViewSet(viewsets.ModelViewSet):
+
+    @action(detail=False, methods=['post'])
+    def creer_comptes(self, request):
+        """
+        POST /api/salaries/creer_comptes/  {"ids": [1, 2], "mot_de_passe": "..."}
+        Crée en masse les comptes User des salariés qui n'en ont pas
+        Sans mot_de_passe : mot de passe inutilisable (réinitialisation requise)
+        """
+        try:
+            ids = normaliser_ids(request.data.get('ids') or [])
+        except ValueError as e:
+            return Response({'error': str(e)},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({'error': 'Paramètre "ids" requis'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        mot_de_passe = request.data.get('mot_de_passe') or None
+        if mot_de_passe is not None:
+            mot_de_passe = str(mot_de_passe)
+            try:
+                validate_password(mot_de_passe)
+            except DjangoValidationError as e:
+                return Response({'error': {'mot_de_passe': list(e.messages)}},
+                              status=status.HTTP_400_BAD_REQUEST)
+
+        resultat = creer_comptes_salaries(
+            self.get_queryset().filter(id__in=ids, user__isnull=True),
+            mot_de_passe=mot_de_passe,
+        )
+        return Response(resultat, status=status.HTTP_201_CREATED if resultat['crees'] else status.HTTP_200_OK)
+
+
+
+class EquipementInstanceViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour instances équipements affectés"""
-    queryset = EquipementInstance.objects.all()
+    queryset = EquipementInstance.objects.select_related('equipement', 'salarie')
     serializer_class = EquipementInstanceSerializer
     filterset_fields = ['equipement', 'salarie', 'etat']
     search_fields = ['numero_serie', 'model']
@@ -524,7 +858,7 @@ class EquipementInstanceViewSet(viewsets.ModelViewSet):
         """Permissions selon action"""
         if self.action in ['list', 'retrieve']:
             return [IsAuthenticated(), CanViewAllEquipment()]
-        elif self.action in ['create', 'update', 'partial_update']:
+        elif self.action in ['create', 'update', 'partial_update', 'bulk_assign', 'bulk_return']:
             return [IsAuthenticated(), CanCreateEquipmentRequests()]
         elif self.action in ['destroy']:
             return [IsAuthenticated(), CanValidateEquipmentRequests()]
@@ -536,17 +870,153 @@ class EquipementInstanceViewSet(viewsets.ModelViewSet):
         user = self.request.user
         
         if user.is_staff or user.has_perm('api.view_all_equipment'):
-            return EquipementInstance.objects.all()
+            return self.queryset.all()
         
         if user.has_perm('api.view_own_equipment'):
             if hasattr(user, 'profil_salarie'):
-                return EquipementInstance.objects.filter(salarie=user.profil_salarie)
+                return self.queryset.filter(salarie=user.profil_salarie)
         
-        return EquipementInstance.objects.none()
+        return self.queryset.none()
 
 
+    @action(detail=False, methods=['post'])
+    def bulk_assign(self, request):
+        """
+        POST /api/equipement-instances/bulk_assign/
+        {"date_affectation": "2026-09-01",
+         "items": [{"equipement": 1, "salarie": 5, "numero_serie": "SN123"}, ...]}
+        Tout ou rien : 400 avec les erreurs par index si un item est invalide
+        ou dépasse le stock disponible de son équipement
+        """
+        entree = AffectationMasseSerializer(data=request.data)
+        if not entree.is_valid():
+            return Response({'error': entree.errors},
+                          status=status.HTTP_400_BAD_REQUEST)
+        items = entree.validated_data['items']
+        date_affectation = entree.validated_data.get('date_affectation') or date.today()
+
+        instances, erreurs = affecter_en_masse(items, date_affectation)
+        if erreurs:
+            return Response({'error': 'Items invalides', 'erreurs': erreurs},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'total': len(instances),
+            'ids': [instance.id for instance in instances],
+        }, status=status.HTTP_201_CREATED)
+
+
+    @action(detail=False, methods=['post'])
+    def bulk_return(self, request):
+        """
+        POST /api/equipement-instances/bulk_return/
+        {"ids": [1, 2, 3], "date_retrait": "2026-09-30", "etat": "usure"}
+        Une instance affectée après date_retrait n'est pas retournée (résultat 'date_anterieure')
+        """
+        entree = RetourMasseSerializer(data=request.data)
+        if not entree.is_valid():
+            return Response({'error': entree.errors},
+                          status=status.HTTP_400_BAD_REQUEST)
+        ids = normaliser_ids(entree.validated_data['ids'])
+        date_retrait = entree.validated_data.get('date_retrait') or date.today()
+        etat = entree.validated_data.get('etat')
+
+        return Response(retourner_en_masse(self.get_queryset(), ids, date_retrait, etat))
+
+
+    @action(detail=True, methods=['get'])
+    def historique(self, request, pk=None):
+        """GET /api/equipement-instances/{id}/historique/ - Transitions de l'instance"""
+        instance = self.get_object()
+        evenements = HistoriqueEquipement.objects.filter(instance_id=instance.id).select_related(
+            'salarie', 'equipement'
+        )
+        return Response(HistoriqueEquipementSerializer(evenements, many=True).data)
 
-class AccesApplicationViewSet(viewsets.ModelViewSet):
+
+    @action(detail=False, methods=['get'])
+    def a_date(self, request):
+        """
+        Détenteurs à une date donnée (historique des affectations)
+        GET /api/equipement-instances/a_date/?date=2026-03-15&numero_serie=SN123
+        GET /api/equipement-instances/a_date/?date=2026-03-15&salarie=5
+        """
+        if not (request.user.is_staff or request.user.has_perm('api.view_all_equipment')):
+            return Response({'error': 'Permission refusée'},
+                          status=status.HTTP_403_FORBIDDEN)
+        try:
+            jour = (
+                datetime.strptime(request.query_params['date'], '%Y-%m-%d').date()
+                if request.query_params.get('date') else date.today()
+            )
+        except ValueError:
+            return Response({'error': 'Paramètre date invalide (AAAA-MM-JJ)'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        numero_serie = request.query_params.get('numero_serie')
+        salarie_id = request.query_params.get('salarie')
+        if salarie_id and not salarie_id.isdigit():
+            return Response({'error': 'Paramètre salarie invalide'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        if numero_serie:
+            evenement = detenteur_a_date(numero_serie, jour)
+            detient = evenement is not None and evenement.type_evenement not in (
+                HistoriqueEquipement.TYPES_SANS_DETENTEUR
+            )
+            return Response({
+                'date': jour,
+                'numero_serie': numero_serie,
+                'salarie': evenement.salarie_id if detient else None,
+                'dernier_evenement': HistoriqueEquipementSerializer(evenement).data if evenement else None,
+            })
+
+        if salarie_id:
+            evenements = equipements_detenus_a_date(salarie_id, jour)
+            return Response({
+                'date': jour,
+                'salarie': int(salarie_id),
+                'equipements': HistoriqueEquipementSerializer(evenements, many=True).data,
+            })
+
+        return Response({'error': 'Paramètre "numero_serie" ou "salarie" requis'},
+                      status=status.HTTP_400_BAD_REQUEST)
+
+
+    @action(detail=False, methods=['post'])
+    def inventaire(self, request):
+        """
+        POST /api/equipement-instances/inventaire/  (multipart: file=<scan.csv>, service=<id>)
+        Rapproche un inventaire physique scanné avec les instances en base
+        CSV : numero_serie[;matricule] avec ou sans en-tête
+        """
+        if not (request.user.is_staff or request.user.has_perm('api.view_all_equipment')):
+            return Response({'error': 'Permission refusée'},
+                          status=status.HTTP_403_FORBIDDEN)
+
+        fichier = request.FILES.get('file')
+        if not fichier:
+            return Response({'error': 'Fichier "file" requis'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        service_id = request.data.get('service') or None
+        if service_id is not None:
+            try:
+                service_id = int(service_id)
+            except (TypeError, ValueError):
+                return Response({'error': 'Paramètre "service" invalide'},
+                              status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rapport = rapprocher_inventaire(fichier.file, service_id=service_id)
+        except (UnicodeDecodeError, csv.Error) as e:
+            return Response({'error': f'Fichier illisible: {str(e)}'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'fichier': fichier.name, 'service': service_id, **rapport})
+
+
+
+class AccesApplicationViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour accès applicatifs"""
     queryset = AccesApplication.objects.all()
     serializer_class = AccesApplicationSerializer
@@ -560,9 +1030,9 @@ class AccesApplicationViewSet(viewsets.ModelViewSet):
 
 
 
-class AccesSalarieViewSet(viewsets.ModelViewSet):
+class AccesSalarieViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour accès physiques"""
-    queryset = AccesSalarie.objects.all()
+    queryset = AccesSalarie.objects.select_related('type_acces')
     serializer_class = AccesSalarieSerializer
     filterset_fields = ['salarie', 'type_acces']
 
@@ -573,7 +1043,7 @@ class AccesSalarieViewSet(viewsets.ModelViewSet):
 
 
 
-class HoraireSalarieViewSet(viewsets.ModelViewSet):
+class HoraireSalarieViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour horaires supplémentaires"""
     queryset = HoraireSalarie.objects.all()
     serializer_class = HoraireSalarieSerializer
@@ -586,7 +1056,7 @@ class HoraireSalarieViewSet(viewsets.ModelViewSet):
 
 
 
-class HistoriqueSalarieViewSet(viewsets.ModelViewSet):
+class HistoriqueSalarieViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour historique salariés"""
     queryset = HistoriqueSalarie.objects.all()
     serializer_class = HistoriqueSalarieSerializer
@@ -614,9 +1084,74 @@ class HistoriqueSalarieViewSet(viewsets.ModelViewSet):
 # ============================================================================
 
 
-class DemandeCongeViewSet(viewsets.ModelViewSet):
+class BulkTransitionMixin:
+    """
+    Actions de validation/rejet en masse pour les viewsets de demandes
+
+    POST /api/<demandes>/bulk_valider_direct/   {"ids": [1, 2], "commentaire": "..."}
+    POST /api/<demandes>/bulk_valider_service/  {"ids": [1, 2], "commentaire": "..."}
+    POST /api/<demandes>/bulk_rejeter/          {"ids": [1, 2], "motif_rejet": "..."}
+    """
+    bulk_transition_perms = {
+        'valider_direct': 'api.validate_leave_requests_direct',
+        'valider_service': 'api.validate_leave_requests_service',
+        'rejeter': 'api.validate_leave_requests_service',
+    }
+
+    def _bulk_transition(self, request, nom_transition, champ_commentaire='commentaire'):
+        """Applique la transition aux ids du body et retourne le résultat par id"""
+        if not request.user.has_perm(self.bulk_transition_perms[nom_transition]):
+            return Response({'error': 'Permission refusée'},
+                          status=status.HTTP_403_FORBIDDEN)
+
+        ids = request.data.get('ids')
+        if not ids:
+            return Response({'error': 'Paramètre "ids" requis'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            resultat = appliquer_transition_en_masse(
+                self.get_queryset(),
+                nom_transition,
+                ids,
+                commentaire=request.data.get(champ_commentaire, ''),
+                on_success=self.get_bulk_transition_callback(nom_transition),
+            )
+        except ValueError as e:
+            return Response({'error': str(e)},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        # .update() ne déclenche pas post_save : invalidation explicite
+        invalider_calendrier_demandes(
+            self.get_queryset().model,
+            [r['id'] for r in resultat['resultats'] if r['resultat'] == RESULTAT_OK],
+        )
+        return Response(resultat, status=status.HTTP_200_OK)
+
+    def get_bulk_transition_callback(self, nom_transition):
+        """Callback exécuté dans la transaction avec les ids validés (aucun par défaut)"""
+        return None
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def bulk_valider_direct(self, request):
+        """Valider plusieurs demandes par responsable direct"""
+        return self._bulk_transition(request, 'valider_direct')
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def bulk_valider_service(self, request):
+        """Valider plusieurs demandes par responsable service"""
+        return self._bulk_transition(request, 'valider_service')
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def bulk_rejeter(self, request):
+        """Rejeter plusieurs demandes"""
+        return self._bulk_transition(request, 'rejeter', champ_commentaire='motif_rejet')
+
+
+
+class DemandeCongeViewSet(BulkTransitionMixin, RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour demandes de congé - Avec validations multi-niveaux"""
-    queryset = DemandeConge.objects.all()
+    queryset = DemandeConge.objects.select_related('salarie')
     serializer_class = DemandeCongeSerializer
     filterset_fields = ['salarie', 'statut', 'type_conge']
     ordering_fields = ['date_debut', 'date_creation']
@@ -642,18 +1177,18 @@ class DemandeCongeViewSet(viewsets.ModelViewSet):
         
         # Admin voit tout
         if user.is_staff:
-            return DemandeConge.objects.all()
+            return self.queryset.all()
         
         # RH et comptable voient tout
         if user.has_perm('api.view_all_leave_requests'):
-            return DemandeConge.objects.all()
+            return self.queryset.all()
         
         # User normal voit ses demandes
         if user.has_perm('api.view_own_leave_requests'):
             if hasattr(user, 'profil_salarie'):
-                return DemandeConge.objects.filter(salarie=user.profil_salarie)
+                return self.queryset.filter(salarie=user.profil_salarie)
         
-        return DemandeConge.objects.none()
+        return self.queryset.none()
 
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
@@ -693,6 +1228,7 @@ class DemandeCongeViewSet(viewsets.ModelViewSet):
         demande.commentaire_service = request.data.get('commentaire', '')
         demande.statut = 'approuvée'
         demande.save()
+        enregistrer_consommations([demande.id], user=request.user)
         return Response({'status': 'Approuvée par responsable service'},
                        status=status.HTTP_200_OK)
 
@@ -712,20 +1248,106 @@ class DemandeCongeViewSet(viewsets.ModelViewSet):
         demande.motif_rejet = request.data.get('motif_rejet', '')
         demande.statut = 'rejetée'
         demande.save()
+        annuler_consommations([demande.id], user=request.user)
         return Response({'status': 'Demande rejetée'},
                        status=status.HTTP_200_OK)
 
 
+    @action(detail=False, methods=['get'])
+    def absences(self, request):
+        """
+        GET /api/demandes-conge/absences/?service=1&date_debut=2026-07-01&date_fin=2026-07-31
+        Qui est absent dans le service + couverture jour par jour
+        """
+        service, erreur = service_absences(request)
+        if erreur:
+            return erreur
+
+        try:
+            date_debut = datetime.strptime(request.query_params['date_debut'], '%Y-%m-%d').date()
+            date_fin = datetime.strptime(
+                request.query_params.get('date_fin', request.query_params['date_debut']), '%Y-%m-%d'
+            ).date()
+        except (KeyError, ValueError):
+            return Response({'error': 'Paramètres date_debut/date_fin requis (AAAA-MM-JJ)'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if date_fin < date_debut or (date_fin - date_debut).days >= MAX_JOURS_PERIODE:
+            return Response({'error': f'Période invalide (max {MAX_JOURS_PERIODE} jours)'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        couverture = couverture_service(service.id, date_debut, date_fin)
+        return Response({
+            'service': {
+                'id': service.id,
+                'nom': service.nom,
+                'effectif_minimum': service.effectif_minimum,
+            },
+            'date_debut': date_debut,
+            'date_fin': date_fin,
+            **couverture,
+        })
+
 
-class SoldeCongeViewSet(viewsets.ReadOnlyModelViewSet):
+    @action(detail=False, methods=['get'])
+    def jours_ouvres(self, request):
+        """
+        GET /api/demandes-conge/jours_ouvres/?date_debut=2026-05-04&date_fin=2026-05-15&salarie=1
+        Calcul serveur du nombre de jours (créneau du salarié, week-ends, fériés)
+        """
+        try:
+            date_debut = datetime.strptime(request.query_params['date_debut'], '%Y-%m-%d').date()
+            date_fin = datetime.strptime(request.query_params['date_fin'], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            return Response({'error': 'Paramètres date_debut/date_fin requis (AAAA-MM-JJ)'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if date_fin < date_debut or (date_fin - date_debut).days >= MAX_JOURS_PERIODE:
+            return Response({'error': f'Période invalide (max {MAX_JOURS_PERIODE} jours)'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        salarie = None
+        salarie_id = request.query_params.get('salarie')
+        if salarie_id:
+            try:
+                salarie_id = int(salarie_id)
+            except ValueError:
+                return Response({'error': 'Paramètre "salarie" invalide'},
+                              status=status.HTTP_400_BAD_REQUEST)
+            salarie = get_object_or_404(
+                Salarie.objects.visibles_par(request.user).select_related('creneau_travail'), pk=salarie_id
+            )
+        elif hasattr(request.user, 'profil_salarie'):
+            salarie = request.user.profil_salarie
+
+        jours_semaine = jours_semaine_salarie(salarie)
+        return Response({
+            'date_debut': date_debut,
+            'date_fin': date_fin,
+            'jours_semaine': jours_semaine,
+            **detail_periode(date_debut, date_fin, jours_semaine),
+        })
+
+
+    def get_bulk_transition_callback(self, nom_transition):
+        """Met à jour le registre de congés dans la transaction du bulk"""
+        if nom_transition == 'valider_service':
+            return lambda ids: enregistrer_consommations(ids, user=self.request.user)
+        if nom_transition == 'rejeter':
+            return lambda ids: annuler_consommations(ids, user=self.request.user)
+        return None
+
+
+
+class SoldeCongeViewSet(RequetesConditionnellesMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet lecture-seule pour solde congés"""
-    queryset = SoldeConge.objects.all()
+    queryset = SoldeConge.objects.select_related('salarie')
     serializer_class = SoldeCongeSerializer
     filterset_fields = ['salarie']
 
 
     def get_permissions(self):
         """Permissions selon action"""
+        if self.action == 'ajuster':
+            return [IsAuthenticated(), IsAdmin()]
         return [IsAuthenticated(), CanViewOwnLeaveRequests()]
 
 
@@ -734,18 +1356,52 @@ class SoldeCongeViewSet(viewsets.ReadOnlyModelViewSet):
         user = self.request.user
         
         if user.is_staff or user.has_perm('api.view_all_leave_requests'):
-            return SoldeConge.objects.all()
+            return self.queryset.all()
         
         if hasattr(user, 'profil_salarie'):
-            return SoldeConge.objects.filter(salarie=user.profil_salarie)
+            return self.queryset.filter(salarie=user.profil_salarie)
         
-        return SoldeConge.objects.none()
+        return self.queryset.none()
+
+
+    @action(detail=True, methods=['get'])
+    def mouvements(self, request, pk=None):
+        """Registre des mouvements de congés du salarié"""
+        solde = self.get_object()
+        mouvements = MouvementConge.objects.filter(
+            salarie_id=solde.salarie_id
+        ).select_related('demande', 'cree_par')
+        serializer = MouvementCongeSerializer(mouvements, many=True)
+        return Response(serializer.data)
+
+
+    @action(detail=True, methods=['post'])
+    def ajuster(self, request, pk=None):
+        """
+        POST /api/solde-conge/{id}/ajuster/  {"nombre_jours": -1.5, "motif": "..."}
+        Ajustement manuel (positif ou négatif) du solde
+        """
+        solde = self.get_object()
+        entree = AjustementSoldeSerializer(data=request.data)
+        if not entree.is_valid():
+            return Response({'error': entree.errors},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        mouvement = ajuster_solde(
+            solde.salarie, entree.validated_data['nombre_jours'], entree.validated_data['motif'],
+            user=request.user,
+        )
+        solde.refresh_from_db()
+        return Response({
+            'mouvement': MouvementCongeSerializer(mouvement).data,
+            'solde': SoldeCongeSerializer(solde).data,
+        }, status=status.HTTP_201_CREATED)
 
 
 
-class DemandeAcompteViewSet(viewsets.ModelViewSet):
+class DemandeAcompteViewSet(BulkTransitionMixin, RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour demandes d'acompte"""
-    queryset = DemandeAcompte.objects.all()
+    queryset = DemandeAcompte.objects.select_related('salarie')
     serializer_class = DemandeAcompteSerializer
     filterset_fields = ['salarie', 'statut']
     ordering_fields = ['date_demande']
@@ -786,9 +1442,9 @@ class DemandeAcompteViewSet(viewsets.ModelViewSet):
 
 
 
-class DemandeSortieViewSet(viewsets.ModelViewSet):
+class DemandeSortieViewSet(BulkTransitionMixin, RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour demandes de sortie"""
-    queryset = DemandeSortie.objects.all()
+    queryset = DemandeSortie.objects.select_related('salarie')
     serializer_class = DemandeSortieSerializer
     filterset_fields = ['salarie', 'statut']
     ordering_fields = ['date_sortie']
@@ -801,9 +1457,9 @@ class DemandeSortieViewSet(viewsets.ModelViewSet):
 
 
 
-class TravauxExceptionnelsViewSet(viewsets.ModelViewSet):
+class TravauxExceptionnelsViewSet(BulkTransitionMixin, RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour travaux exceptionnels"""
-    queryset = TravauxExceptionnels.objects.all()
+    queryset = TravauxExceptionnels.objects.select_related('salarie')
     serializer_class = TravauxExceptionnelsSerializer
     filterset_fields = ['salarie', 'statut']
     ordering_fields = ['date_travail']
@@ -821,9 +1477,9 @@ class TravauxExceptionnelsViewSet(viewsets.ModelViewSet):
 # ============================================================================
 
 
-class DocumentSalarieViewSet(viewsets.ModelViewSet):
+class DocumentSalarieViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour documents - Avec permissions de visibilité"""
-    queryset = DocumentSalarie.objects.all()
+    queryset = DocumentSalarie.objects.select_related('salarie')
     serializer_class = DocumentSalarieSerializer
     filterset_fields = ['salarie', 'type_document']
     ordering_fields = ['date_upload']
@@ -847,18 +1503,18 @@ class DocumentSalarieViewSet(viewsets.ModelViewSet):
         
         # Admin voit tout
         if user.is_staff:
-            return DocumentSalarie.objects.all()
+            return self.queryset.all()
         
         # RH et comptable voient tout
         if user.has_perm('api.view_all_documents'):
-            return DocumentSalarie.objects.all()
+            return self.queryset.all()
         
         # User normal voit ses documents
         if user.has_perm('api.view_own_documents'):
             if hasattr(user, 'profil_salarie'):
-                return DocumentSalarie.objects.filter(salarie=user.profil_salarie)
+                return self.queryset.filter(salarie=user.profil_salarie)
         
-        return DocumentSalarie.objects.none()
+        return self.queryset.none()
 
 
 
@@ -867,9 +1523,14 @@ class DocumentSalarieViewSet(viewsets.ModelViewSet):
 # ============================================================================
 
 
-class FichePosteViewSet(viewsets.ModelViewSet):
+class FichePosteViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour fiches de poste"""
-    queryset = FichePoste.objects.all()
+    queryset = FichePoste.objects.select_related('responsable_service').prefetch_related(
+        Prefetch('outils', queryset=OutilFichePoste.objects.select_related('outil_travail')),
+        Prefetch('ameliorations', queryset=AmeliorationProposee.objects.select_related(
+            'salarie_proposant', 'examinee_par',
+        )),
+    )
     serializer_class = FichePosteDetailSerializer
     filterset_fields = ['service', 'grade', 'statut']
     search_fields = ['titre', 'description']
@@ -888,13 +1549,13 @@ class FichePosteViewSet(viewsets.ModelViewSet):
         user = self.request.user
         
         # Tous les utilisateurs authentifiés peuvent voir
-        return FichePoste.objects.all()
+        return self.queryset.all()
 
 
 
-class AmeliorationProposeeViewSet(viewsets.ModelViewSet):
+class AmeliorationProposeeViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour améliorations proposées"""
-    queryset = AmeliorationProposee.objects.all()
+    queryset = AmeliorationProposee.objects.select_related('salarie_proposant', 'examinee_par')
     serializer_class = AmeliorationProposeeSerializer
     filterset_fields = ['fiche_poste', 'salarie_proposant', 'statut']
     ordering_fields = ['date_proposition', 'priorite']
@@ -918,17 +1579,17 @@ class AmeliorationProposeeViewSet(viewsets.ModelViewSet):
         
         # Admin voit tout
         if user.is_staff:
-            return AmeliorationProposee.objects.all()
+            return self.queryset.all()
         
         # RH voit tout
         if user.has_perm('api.view_team_job_evolution'):
-            return AmeliorationProposee.objects.all()
+            return self.queryset.all()
         
         # User normal voit ses propositions
         if hasattr(user, 'profil_salarie'):
-            return AmeliorationProposee.objects.filter(salarie_proposant=user.profil_salarie)
+            return self.queryset.filter(salarie_proposant=user.profil_salarie)
         
-        return AmeliorationProposee.objects.none()
+        return self.queryset.none()
 
 
 
@@ -937,9 +1598,9 @@ class AmeliorationProposeeViewSet(viewsets.ModelViewSet):
 # ============================================================================
 
 
-class FicheParametresUserViewSet(viewsets.ModelViewSet):
+class FicheParametresUserViewSet(RequetesConditionnellesMixin, viewsets.ModelViewSet):
     """ViewSet pour paramètres utilisateur"""
-    queryset = FicheParametresUser.objects.all()
+    queryset = FicheParametresUser.objects.select_related('user')
     serializer_class = FicheParametresUserSerializer
 
 
@@ -949,7 +1610,7 @@ class FicheParametresUserViewSet(viewsets.ModelViewSet):
 
 
 
-class RoleViewSet(viewsets.ReadOnlyModelViewSet):
+class RoleViewSet(RequetesConditionnellesMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet lecture-seule pour rôles"""
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
@@ -966,9 +1627,9 @@ class RoleViewSet(viewsets.ReadOnlyModelViewSet):
 # ============================================================================
 
 
-class ImportLogViewSet(viewsets.ReadOnlyModelViewSet):
+class ImportLogViewSet(RequetesConditionnellesMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet pour logs d'import - Lecture seule"""
-    queryset = ImportLog.objects.all()
+    queryset = ImportLog.objects.select_related('cree_par')
     serializer_class = ImportLogSerializer
     filterset_fields = ['api_name', 'statut']
     ordering_fields = ['date_creation']
@@ -983,5 +1644,5 @@ class ImportLogViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         """Admin seulement"""
         if self.request.user.is_staff:
-            return ImportLog.objects.all()
-        return ImportLog.objects.none()
+            return self.queryset.all()
+        return self.queryset.none()
@@ -0,0 +1,222 @@
+# ============================================================================
+# WORKFLOW_UTILS.PY - TRANSITIONS EN MASSE DES DEMANDES
+# ============================================================================
+# Applique une transition (validation direct/service, rejet) à une liste
+# d'ids de demandes avec un UPDATE ... WHERE id IN (...) AND statut=... par
+# état source, au lieu d'un get_object() + save() par demande.
+# Utilisé pour DemandeConge, DemandeAcompte, DemandeSortie, TravauxExceptionnels.
+# ============================================================================
+
+from django.db import transaction
+from django.utils import timezone
+
+
+# ============================================================================
+# CONFIGURATION DES TRANSITIONS
+# ============================================================================
+
+TRANSITIONS = {
+    'valider_direct': {
+        'sources': ('soumise',),
+        'conditions': {},
+        'cible': 'validée_direct',
+        'champs': {
+            'valide_par_direct': True,
+            'date_validation_direct': '__now__',
+            'commentaire_direct': '__commentaire__',
+        },
+    },
+    'valider_service': {
+        'sources': ('soumise', 'validée_direct'),
+        'conditions': {'valide_par_direct': True},
+        'cible': 'approuvée',
+        'champs': {
+            'valide_par_service': True,
+            'date_validation_service': '__now__',
+            'commentaire_service': '__commentaire__',
+        },
+    },
+    'rejeter': {
+        'sources': ('soumise', 'validée_direct', 'validée_service', 'approuvée'),
+        'conditions': {},
+        'cible': 'rejetée',
+        'champs': {
+            'rejete': True,
+            'date_rejet': '__now__',
+            'motif_rejet': '__commentaire__',
+        },
+    },
+}
+
+# Résultats possibles par id
+RESULTAT_OK = 'ok'
+RESULTAT_INTROUVABLE = 'introuvable'
+RESULTAT_STATUT_INVALIDE = 'statut_invalide'
+RESULTAT_CONFLIT = 'conflit'
+
+# Plus grand id accepté (colonnes bigint)
+ID_MAX = 2 ** 63 - 1
+
+
+# ============================================================================
+# UTILITAIRES
+# ============================================================================
+
+def normaliser_ids(ids):
+    """
+    Convertit la liste d'ids reçue en entiers (sans doublons, ordre conservé)
+    Lève ValueError si un id n'est pas un entier entre 1 et ID_MAX
+    """
+    if not isinstance(ids, (list, tuple)):
+        raise ValueError('Le paramètre "ids" doit être une liste')
+    resultat = []
+    vus = set()
+    for valeur in ids:
+        try:
+            id_int = int(valeur)
+        except (TypeError, ValueError):
+            raise ValueError(f'Id invalide: {valeur!r}')
+        if not 1 <= id_int <= ID_MAX:
+            raise ValueError(f'Id invalide: {valeur!r}')
+        if id_int not in vus:
+            vus.add(id_int)
+            resultat.append(id_int)
+    return resultat
+
+
+def _champs_modele(model):
+    """Retourne les noms de champs concrets du modèle"""
+    return {f.name for f in model._meta.concrete_fields}
+
+
+def construire_mise_a_jour(model, nom_transition, commentaire='', now=None):
+    """
+    Construit le dict passé à queryset.update() pour une transition
+    Ne garde que les champs présents sur le modèle (ex: motif_rejet
+    n'existe que sur DemandeConge)
+    """
+    transition = TRANSITIONS[nom_transition]
+    now = now or timezone.now()
+    champs = _champs_modele(model)
+
+    valeurs = {'statut': transition['cible']}
+    for champ, valeur in transition['champs'].items():
+        if champ not in champs:
+            continue
+        if valeur == '__now__':
+            valeur = now
+        elif valeur == '__commentaire__':
+            valeur = commentaire or ''
+        valeurs[champ] = valeur
+
+    # update() ne déclenche pas auto_now
+    if 'date_modification' in champs:
+        valeurs['date_modification'] = now
+    return valeurs
+
+
+# ============================================================================
+# MOTEUR DE TRANSITION EN MASSE
+# ============================================================================
+
+def appliquer_transition_en_masse(queryset, nom_transition, ids, commentaire='', on_success=None):
+    """
+    Applique une transition à plusieurs demandes
+
+    - queryset: périmètre visible par l'utilisateur (get_queryset du viewset)
+    - ids: liste d'ids de demandes
+    - on_success: callback(ids_ok) appelé dans la même transaction
+
+    Retourne un dict avec le résultat par id:
+    {'transition', 'total', 'succes', 'echecs', 'resultats': [...]}
+    """
+    if nom_transition not in TRANSITIONS:
+        raise ValueError(f'Transition inconnue: {nom_transition}')
+
+    transition = TRANSITIONS[nom_transition]
+    ids = normaliser_ids(ids)
+    model = queryset.model
+    champs = _champs_modele(model)
+    conditions = {k: v for k, v in transition['conditions'].items() if k in champs}
+
+    resultats = {}
+
+    with transaction.atomic():
+        # 1️⃣ UNE LECTURE VERROUILLÉE : statut actuel de chaque demande
+        lignes = (
+            queryset.filter(id__in=ids)
+            .select_for_update()
+            .order_by()
+            .values('id', 'statut', *conditions.keys())
+        )
+
+        par_statut = {}
+        for ligne in lignes:
+            eligible = ligne['statut'] in transition['sources'] and all(
+                ligne[champ] == valeur for champ, valeur in conditions.items()
+            )
+            if eligible:
+                par_statut.setdefault(ligne['statut'], []).append(ligne['id'])
+            else:
+                resultats[ligne['id']] = {
+                    'id': ligne['id'],
+                    'resultat': RESULTAT_STATUT_INVALIDE,
+                    'statut': ligne['statut'],
+                }
+
+        # 2️⃣ UN UPDATE PAR ÉTAT SOURCE
+        valeurs = construire_mise_a_jour(model, nom_transition, commentaire)
+        ids_ok = []
+        for statut_source, groupe in par_statut.items():
+            nb = model._default_manager.filter(
+                id__in=groupe, statut=statut_source, **conditions
+            ).update(**valeurs)
+
+            if nb == len(groupe):
+                ids_ok.extend(groupe)
+                continue
+
+            # Cas rare : une ligne a changé entre la lecture et l'update
+            maj = set(
+                model._default_manager.filter(
+                    id__in=groupe, statut=transition['cible']
+                ).values_list('id', flat=True)
+            )
+            for id_demande in groupe:
+                if id_demande in maj:
+                    ids_ok.append(id_demande)
+                else:
+                    resultats[id_demande] = {
+                        'id': id_demande,
+                        'resultat': RESULTAT_CONFLIT,
+                        'statut': None,
+                    }
+
+        for id_demande in ids_ok:
+            resultats[id_demande] = {
+                'id': id_demande,
+                'resultat': RESULTAT_OK,
+                'statut': transition['cible'],
+            }
+
+        if on_success and ids_ok:
+            on_success(ids_ok)
+
+    # 3️⃣ IDS HORS PÉRIMÈTRE OU INEXISTANTS
+    for id_demande in ids:
+        if id_demande not in resultats:
+            resultats[id_demande] = {
+                'id': id_demande,
+                'resultat': RESULTAT_INTROUVABLE,
+                'statut': None,
+            }
+
+    liste = [resultats[id_demande] for id_demande in ids]
+    succes = sum(1 for r in liste if r['resultat'] == RESULTAT_OK)
+    return {
+        'transition': nom_transition,
+        'total': len(liste),
+        'succes': succes,
+        'echecs': len(liste) - succes,
+        'resultats': liste,
+    }
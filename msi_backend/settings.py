@@ -31,7 +31,9 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'api.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -136,9 +138,15 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
+    # orjson (repli sur le rendu DRF s'il n'est pas installé), API navigable en DEBUG seulement
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'api.renderers.OrjsonRenderer',
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.OrjsonParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DATETIME_FORMAT': '%Y-%m-%dT%H:%M:%S',
     'DATE_FORMAT': '%Y-%m-%d',
@@ -249,6 +257,15 @@ LOGGING = {
             'backupCount': 10,
             'formatter': 'verbose',
         },
+        'lent': {
+            'level': 'INFO',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': os.path.join(BASE_DIR, 'logs/lent.log'),
+            'delay': True,
+            'maxBytes': 1024 * 1024 * 15,
+            'backupCount': 5,
+            'formatter': 'simple',
+        },
     },
     'root': {
         'handlers': ['console', 'file'],
@@ -260,15 +277,43 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        # DEBUG : chaque requête SQL (développement seulement, SQL_LOG_LEVEL=DEBUG)
         'django.db.backends': {
             'handlers': ['console'],
-            'level': 'DEBUG',
+            'level': config('SQL_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+        # Requêtes HTTP lentes et échantillons SQL (api/metriques_utils.py)
+        'api.lent': {
+            'handlers': ['console', 'lent'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'api.sql': {
+            'handlers': ['console', 'lent'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'api.nplus1': {
+            'handlers': ['console', 'lent'],
+            'level': 'WARNING',
             'propagate': False,
         },
     },
 }
 
 
+# Instrumentation (InstrumentationMiddleware, /metrics)
+METRIQUES_TOKEN = config('METRIQUES_TOKEN', default='')
+METRIQUES_SEUIL_LENT_MS = config('METRIQUES_SEUIL_LENT_MS', default=500, cast=int)
+METRIQUES_SEUIL_REQUETES_SQL = config('METRIQUES_SEUIL_REQUETES_SQL', default=50, cast=int)
+METRIQUES_TAUX_ECHANTILLON_SQL = config('METRIQUES_TAUX_ECHANTILLON_SQL', default=0.1, cast=float)
+
+# Détection des N+1 (api/nplus1_utils.py) : off | log (recette) | raise (tests)
+NPLUS1_MODE = config('NPLUS1_MODE', default='log' if DEBUG else 'off')
+NPLUS1_SEUIL = config('NPLUS1_SEUIL', default=5, cast=int)
+
+
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880
 
@@ -276,13 +321,53 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880
 ALLOWED_UPLOAD_EXTENSIONS = ['pdf', 'doc', 'docx', 'xls', 'xlsx', 'csv', 'txt', 'jpg', 'jpeg', 'png']
 
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'msi-cache',
-    }
+# CACHE_BACKEND :
+# - locmem       : cache propre à chaque worker (défaut, développement)
+# - redis        : cache partagé entre workers (REDIS_URL)
+# - deux_niveaux : LRU local devant le cache partagé, invalidation inter-workers
+# Serveur de substitution en local : python manage.py fauxredis
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+REDIS_URL = config('REDIS_URL', default='redis://127.0.0.1:6379/0')
+
+CACHE_PARTAGE = {
+    'BACKEND': 'api.cache_backends.RespCache',
+    'LOCATION': REDIS_URL,
+    'KEY_PREFIX': 'msi',
+    'OPTIONS': {
+        'SOCKET_TIMEOUT': config('REDIS_SOCKET_TIMEOUT', default=0.5, cast=float),
+        'IGNORER_ERREURS': True,
+    },
 }
 
+if CACHE_BACKEND == 'redis':
+    CACHES = {'default': CACHE_PARTAGE}
+elif CACHE_BACKEND == 'deux_niveaux':
+    CACHES = {
+        'partage': CACHE_PARTAGE,
+        'default': {
+            'BACKEND': 'api.cache_backends.CacheDeuxNiveaux',
+            'OPTIONS': {
+                'PARTAGE': 'partage',
+                'TAILLE': config('CACHE_LOCAL_TAILLE', default=2000, cast=int),
+                'TTL_LOCAL': config('CACHE_LOCAL_TTL', default=30, cast=int),
+                'VERIFICATION': 1.0,
+            },
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'msi-cache',
+        }
+    }
+
+# ETag / Last-Modified sur les viewsets : la version des données vit dans le
+# cache, il doit donc être partagé entre workers (ou serveur mono-processus)
+REQUETES_CONDITIONNELLES = config(
+    'REQUETES_CONDITIONNELLES', default=DEBUG or CACHE_BACKEND != 'locmem', cast=bool,
+)
+
 
 SESSION_COOKIE_SECURE = not DEBUG
 SESSION_COOKIE_HTTPONLY = True
@@ -7,6 +7,8 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
+from api.views import metrics
+
 # ✅ IMPORTER LES FONCTIONS D'ADMIN IMPORT
 from api.admin_views import (
     admin_import_page,
@@ -37,6 +39,11 @@ urlpatterns = [
     # API REST
     # ============================================================================
     path('api/', include('api.urls')),
+
+    # ============================================================================
+    # MÉTRIQUES PROMETHEUS
+    # ============================================================================
+    path('metrics', metrics, name='metrics'),
 ]
 
 # ============================================================================